@@ -0,0 +1,115 @@
+import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from utils.core.embedded_database import EmbeddedDatabase, SQLiteDatabase
+
+
+@pytest.fixture
+def collection():
+    return EmbeddedDatabase()['items']
+
+
+def test_insert_and_duplicate_key(collection):
+    collection.create_index('name', unique = True)
+    result = collection.insert_one({'name' : 'a'})
+
+    assert isinstance(result.inserted_id, ObjectId)
+    assert collection.find_one({'name' : 'a'})['_id'] == result.inserted_id
+
+    with pytest.raises(DuplicateKeyError):
+        collection.insert_one({'name' : 'a'})
+    with pytest.raises(DuplicateKeyError):
+        collection.insert_one({'_id' : result.inserted_id, 'name' : 'b'})
+
+    assert collection.count_documents({}) == 1
+
+
+def test_duplicate_key_on_update_keeps_the_document(collection):
+    collection.create_index('name', unique = True)
+    collection.insert_many([{'_id' : 1, 'name' : 'a'}, {'_id' : 2, 'name' : 'b'}])
+
+    with pytest.raises(DuplicateKeyError):
+        collection.update_one({'_id' : 2}, {'$set' : {'name' : 'a'}})
+
+    assert collection.find_one({'_id' : 2})['name'] == 'b'
+    assert [document['_id'] for document in collection.find({'name' : 'b'})] == [2]
+
+
+def test_partial_unique_index(collection):
+    collection.create_index('code', unique = True, partialFilterExpression = {'active' : True})
+    collection.insert_many([{'code' : 1, 'active' : False}, {'code' : 1, 'active' : True}])
+
+    with pytest.raises(DuplicateKeyError):
+        collection.insert_one({'code' : 1, 'active' : True})
+
+
+def test_upsert_with_set_on_insert(collection):
+    result = collection.update_one(
+        {'name' : 'a'}, {'$set' : {'count' : 1}, '$setOnInsert' : {'created' : 5}}, upsert = True
+    )
+
+    assert result.upserted_id is not None
+    assert collection.find_one({'name' : 'a'}, {'_id' : 0}) == {'name' : 'a', 'count' : 1, 'created' : 5}
+
+    result = collection.update_one(
+        {'name' : 'a'}, {'$inc' : {'count' : 1}, '$setOnInsert' : {'created' : 9}}, upsert = True
+    )
+
+    assert result.upserted_id is None and result.modified_count == 1
+    assert collection.find_one({'name' : 'a'}, {'_id' : 0}) == {'name' : 'a', 'count' : 2, 'created' : 5}
+
+
+def test_array_equality_via_index(collection):
+    collection.create_index('tags')
+    collection.insert_many([
+        {'_id' : 1, 'tags' : ['a', 'b']}, {'_id' : 2, 'tags' : ['b']}, {'_id' : 3, 'tags' : ['b', 'a']},
+        {'_id' : 4, 'tags' : [['a', 'b'], 'c']}, {'_id' : 5, 'tags' : []}, {'_id' : 6}
+    ])
+
+    cursor = collection.find({'tags' : ['a', 'b']})
+    assert cursor.explain()['queryPlanner']['winningPlan']['inputStage']['stage'] == 'IXSCAN'
+    assert [document['_id'] for document in cursor] == [1, 4]
+    assert [document['_id'] for document in collection.find({'tags' : 'b'})] == [1, 2, 3]
+    assert [document['_id'] for document in collection.find({'tags' : ['b']})] == [2]
+    assert [document['_id'] for document in collection.find({'tags' : []})] == [5]
+    assert [document['_id'] for document in collection.find({'tags' : {'$in' : [['b'], 'c']}})] == [2, 4]
+
+
+def test_sort_follows_bson_type_order(collection):
+    object_id, date = ObjectId(), datetime.datetime(2024, 1, 1)
+    values = [date, True, object_id, {'x' : 1}, 'a', 2.5, 1, None]
+    collection.insert_many([{'value' : value} for value in values] + [{}])
+
+    ascending = [document.get('value', 'missing') for document in collection.find().sort('value', 1)]
+    assert ascending == [None, 'missing', 1, 2.5, 'a', {'x' : 1}, object_id, True, date]
+
+    descending = [document.get('value', 'missing') for document in collection.find().sort('value', -1)]
+    assert descending[:7] == [date, True, object_id, {'x' : 1}, 'a', 2.5, 1]
+
+
+def test_sqlite_reopen(tmp_path):
+    path = str(tmp_path / 'database.db')
+    object_id, date = ObjectId(), datetime.datetime(2024, 1, 1, 12, 30)
+
+    database = SQLiteDatabase(path)
+    database['items'].create_index('name', unique = True)
+    database['items'].insert_many([
+        {'_id' : object_id, 'name' : 'a', 'date' : date, 'tags' : ['x'], 'score' : 1.5},
+        {'_id' : 2, 'name' : 'b'}
+    ])
+    database['items'].delete_one({'_id' : 2})
+    database.close()
+
+    database = SQLiteDatabase(path)
+    try:
+        assert list(database['items'].find()) == [
+            {'_id' : object_id, 'name' : 'a', 'date' : date, 'tags' : ['x'], 'score' : 1.5}
+        ]
+        assert 'name_1' in database['items'].index_information()
+        with pytest.raises(DuplicateKeyError):
+            database['items'].insert_one({'name' : 'a'})
+    finally:
+        database.close()
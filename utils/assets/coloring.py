@@ -1,6 +1,13 @@
 import os
+from collections import OrderedDict
+
 import sty
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class Coloring:
     """ Class for coloring and formatting text. """
@@ -18,6 +25,12 @@ class Coloring:
     Form = sty.ef
     Rest = sty.rs
 
+    NUMPY_THRESHOLD = 256
+
+    _codes: dict[tuple[int, int, int], str] = {}
+    _renders: OrderedDict[tuple, str] = OrderedDict()
+    _max_renders = 128
+
 
     @staticmethod
     def init() -> None:
@@ -27,60 +40,102 @@ class Coloring:
 
 
     @staticmethod
-    def _gradient1d(input_str: str, start: tuple[int, int, int], end: tuple[int, int, int]) -> str:
-        """ Helper function for creating 1D gradients. """
+    def _get_code(rgb: tuple[int, int, int]) -> str:
+        """ Helper function for getting the escape code of a color, created only once per color. """
 
-        steps = len(input_str)
-        r_step = (end[0] - start[0]) / (steps - 1)
-        g_step = (end[1] - start[1]) / (steps - 1)
-        b_step = (end[2] - start[2]) / (steps - 1)
+        code = Coloring._codes.get(rgb)
+        if code is None:
+            code = Coloring._codes[rgb] = Coloring.Text(*rgb)
 
-        output_str = ''
-        for i, char in enumerate(input_str):
-            r = int(start[0] + r_step * i)
-            g = int(start[1] + g_step * i)
-            b = int(start[2] + b_step * i)
+        return code
 
-            output_str += f'{Coloring.Text(r, g, b)}{char}'
 
-        return output_str + Coloring.Text.rs
+    @staticmethod
+    def _get_ramp(count: int, start: tuple[int, int, int], end: tuple[int, int, int],
+                  denominator: int | float) -> list[str]:
+        """ Helper function for the escape codes of the first count colors of a gradient with denominator steps. """
+
+        steps = [(end[i] - start[i]) / denominator for i in range(3)]
+
+        if numpy is not None and count >= Coloring.NUMPY_THRESHOLD:
+            colors = numpy.arange(count)[:, None] * numpy.array(steps) + numpy.array(start, dtype = numpy.float64)
+            colors = map(tuple, colors.astype(numpy.int64).tolist())
+        else:
+            colors = (
+                (int(start[0] + steps[0] * i), int(start[1] + steps[1] * i), int(start[2] + steps[2] * i))
+                for i in range(count)
+            )
+
+        return [Coloring._get_code(color) for color in colors]
 
 
     @staticmethod
-    def _gradient2d(lines: list[str], start: tuple[int, int, int], end: tuple[int, int, int]) -> str:
+    def _gradient1d(input_str: str, start: tuple[int, int, int], end: tuple[int, int, int]) -> str:
+        """ Helper function for creating 1D gradients. """
+
+        codes = Coloring._get_ramp(len(input_str), start, end, len(input_str) - 1)
+        return ''.join([code + char for code, char in zip(codes, input_str)]) + Coloring.Text.rs
+
+
+    @staticmethod
+    def _gradient2d(lines: list[str], start: tuple[int, int, int], end: tuple[int, int, int],
+                    mode: str = 'flow') -> str:
         """ Helper function for creating 2D gradients. """
 
-        total_chars = sum(len(line) for line in lines)
-        r_step = (end[0] - start[0]) / total_chars
-        g_step = (end[1] - start[1]) / total_chars
-        b_step = (end[2] - start[2]) / total_chars
+        if mode == 'flow':
+            total_chars = sum(len(line) for line in lines)
+            codes = Coloring._get_ramp(total_chars, start, end, total_chars or 1)
 
-        output_str = ''
-        char_count = 0
+            output, char_count = [], 0
+            for line in lines:
+                output.extend(code + char for code, char in zip(codes[char_count:char_count + len(line)], line))
+                output.append('\n')
+                char_count += len(line)
 
-        for line in lines:
-            for char in line:
-                r = int(start[0] + r_step * char_count)
-                g = int(start[1] + g_step * char_count)
-                b = int(start[2] + b_step * char_count)
+            return ''.join(output) + Coloring.Text.rs
 
-                output_str += f'{Coloring.Text(r, g, b)}{char}'
-                char_count += 1
+        width = max(len(line) for line in lines)
+        match mode:
+            case 'horizontal':
+                count = width
+                position = lambda row, column: column
+            case 'vertical':
+                count = len(lines)
+                position = lambda row, column: row
+            case 'diagonal':
+                count = len(lines) + width - 1
+                position = lambda row, column: row + column
+            case _:
+                raise ValueError(f'Unknown gradient mode "{mode}".')
 
-            output_str += '\n'
+        codes = Coloring._get_ramp(count, start, end, max(count - 1, 1))
 
-        return output_str + Coloring.Text.rs
+        output = []
+        for row, line in enumerate(lines):
+            output.extend(codes[position(row, column)] + char for column, char in enumerate(line))
+            output.append('\n')
+
+        return ''.join(output) + Coloring.Text.rs
 
 
     @staticmethod
-    def gradient(input_str: str, start: tuple[int, int, int], end: tuple[int, int, int]) -> str:
+    def gradient(input_str: str, start: tuple[int, int, int], end: tuple[int, int, int], mode: str = 'flow') -> str:
         """
         Color a string into a gradient.
 
+        Rendered gradients are remembered, so drawing the same text again costs only a lookup.
+
+        Modes:
+            - flow | Colors change with each character, in reading order.
+            - horizontal | Colors change from left to right, the same for every line.
+            - vertical | Colors change from top to bottom, the same for every column.
+            - diagonal | Colors change from the top left to the bottom right.
+
         Arguments:
              input_str: The original string.
              start: The rgb value from which the gradient starts.
              end: The rgb value at which the gradient ends.
+             mode: How the colors change across multiple lines. Single lines always change with each character.
 
         Returns:
             The colored string.
@@ -89,11 +144,23 @@ class Coloring:
         if not input_str or len(input_str) < 2:
             return ''
 
+        key = (input_str, tuple(start), tuple(end), mode)
+        output = Coloring._renders.get(key)
+        if output is not None:
+            Coloring._renders.move_to_end(key)
+            return output
+
         lines = input_str.split('\n')
         if len(lines) == 1:
-            return Coloring._gradient1d(input_str, start, end)
+            output = Coloring._gradient1d(input_str, start, end)
+        else:
+            output = Coloring._gradient2d(lines, start, end, mode)
+
+        Coloring._renders[key] = output
+        if len(Coloring._renders) > Coloring._max_renders:
+            Coloring._renders.popitem(last = False)
 
-        return Coloring._gradient2d(lines, start, end)
+        return output
 
 
 __all__ = ['Coloring']
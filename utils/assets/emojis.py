@@ -1,9 +1,46 @@
+import re
 import random
-import pyemojify
+
+import discord
+from pyemojify.emoji import emoji_table
 
 
 class Emoji:
-    """ Class for using emojis. """
+    """ Class for using emojis, indexed by name and category when the module is imported. """
+
+    CATEGORIES = {
+        'bar' : 'bar.',
+        'loading' : 'loading.',
+        'ping' : 'ping_',
+        'circles' : 'circle_'
+    }
+    FALLBACKS = {
+        'cat_bongo' : '🐱', 'cat_bonk' : '🔨', 'cat_finger' : '🐱', 'cat_punch' : '🥊', 'qwan' : '🐧',
+        'enola' : '🔎', 'blank' : '▫️',
+        'check' : '✅', 'denied' : '⛔', 'error' : '❌', 'error_crit' : '🚨', 'warning' : '⚠️', 'info' : 'ℹ️',
+        'question' : '❓', 'slash' : '➗', 'reply' : '↪️',
+        'ping_good' : '🟢', 'ping_ok' : '🟡', 'ping_bad' : '🔴',
+        'language' : '🌐', 'delete' : '🗑️', 'archive' : '🗃️', 'bookmark' : '🔖', 'calendar' : '📅',
+        'channel' : '#️⃣', 'chat' : '💬', 'time' : '⏰', 'folder' : '📁', 'game' : '🎮', 'globe' : '🌍',
+        'heart' : '❤️', 'home' : '🏠', 'id' : '🆔', 'link' : '🔗', 'megaphone' : '📣', 'message' : '✉️',
+        'note' : '📝', 'pen' : '🖊️', 'lock' : '🔒', 'settings' : '⚙️', 'shield' : '🛡️', 'reload' : '🔄',
+        'speech' : '🗨️', 'tv' : '📺', 'upload' : '📤', 'stats' : '📊', 'ticket' : '🎫', 'trashcan' : '🗑️',
+        'user' : '👤', 'wave' : '👋', 'thumbsup' : '👍', 'thumbsdown' : '👎',
+        'circle_green' : '🟢', 'circle_yellow' : '🟡', 'circle_red' : '🔴', 'circle_blue' : '🔵',
+        'bar.l_empty' : '⬛', 'bar.l_half' : '🟨', 'bar.l_full' : '🟩',
+        'bar.m_empty' : '⬛', 'bar.m_half' : '🟨', 'bar.m_full' : '🟩',
+        'bar.r_empty' : '⬛', 'bar.r_half' : '🟨', 'bar.r_full' : '🟩'
+    }
+    LOADING_FALLBACK = '⏳'
+    SHORTCODE = re.compile(r'(:\S+:)')
+    CUSTOM_EMOJI = re.compile(r'<a?:\w+:(\d+)>')
+
+    _names: dict[str, str] = {}
+    _owners: dict[str, tuple[type, str]] = {}
+    _categories: dict[str, dict[str, str]] = {}
+    _loading: tuple[str, ...] = ()
+    _client: discord.Client = None
+    _validated: bool = False
 
     cat_bongo = '<a:bongo:886287312881864714>'
     cat_bonk = '<a:catbonk:1096384738052284437>'
@@ -17,7 +54,7 @@ class Emoji:
     check = '<:ee:1105122920159772784>'
     denied = '<:ee:1105122927554338960>'
     error = '<:ee:1105122928892334111>'
-    error_crit = None
+    error_crit = '🚨'
     warning = '<:ee:1105509639778467883>'
     info = '<:ee:1105509087896146071>'
     question = '<:ee:1105122980759081030>'
@@ -68,8 +105,6 @@ class Emoji:
     circle_red = '<:ee:1118168055768436879>'
     circle_blue = '<:ee:1247260406565834793>'
 
-    emojify = pyemojify.emojify
-
 
     class unicode:
         """ Subclass for unicode emojis. """
@@ -106,16 +141,161 @@ class Emoji:
         def __init__(self) -> None:
             """ Create a list of all the loading emojis. """
 
-            self.emojis = [
-                attr for attr in vars(self.__class__).keys()
-                if not attr.startswith('__')
-            ]
+            self.emojis = list(Emoji._categories['loading'])
 
         @staticmethod
         def random() -> str:
             """ Get a random loading emoji. """
 
-            return getattr(Emoji.loading, random.choice(Emoji.loading().emojis))
+            return random.choice(Emoji._loading)
+
+
+    @staticmethod
+    def _build() -> None:
+        """ Helper function for indexing all emojis by name and category. """
+
+        Emoji._names, Emoji._owners = {}, {}
+        for owner, prefix in ((Emoji, ''), (Emoji.unicode, 'unicode.'), (Emoji.bar, 'bar.'),
+                              (Emoji.loading, 'loading.')):
+            for attr, value in vars(owner).items():
+                if isinstance(value, str) and not attr.startswith('_') and not attr.isupper():
+                    Emoji._names[prefix + attr] = value
+                    Emoji._owners[prefix + attr] = (owner, attr)
+
+        Emoji._categories = {
+            category : {name[len(prefix):] : value for name, value in Emoji._names.items() if name.startswith(prefix)}
+            for category, prefix in Emoji.CATEGORIES.items()
+        }
+        Emoji._loading = tuple(Emoji._categories['loading'].values())
+
+
+    @staticmethod
+    def get(name: str, default: str = None) -> str | None:
+        """
+        Get an emoji by name.
+
+        Arguments:
+            name: The emoji name. Emojis of subclasses are prefixed with the subclass name, example: bar.l_full .
+            default: What to return if there is no emoji with that name.
+
+        Returns:
+            The emoji.
+        """
+
+        return Emoji._names.get(name, default)
+
+
+    @staticmethod
+    def get_category(category: str) -> dict[str, str]:
+        """
+        Get all emojis of a category.
+
+        Categories:
+            - bar | Progress bar segments.
+            - loading | Animated loading emojis.
+            - ping | Connection quality indicators.
+            - circles | Colored circles.
+
+        Arguments:
+            category: The category name.
+
+        Returns:
+            The emojis of the category by name, without the category prefix. Must not be modified.
+        """
+
+        return Emoji._categories[category]
+
+
+    @staticmethod
+    def emojify(text: str) -> str:
+        """
+        Replace emoji shortcodes like :sparkling_heart: with the emojis themselves, in a single pass.
+
+        Arguments:
+            text: The original text.
+
+        Returns:
+            The text with known shortcodes replaced.
+        """
+
+        parts = Emoji.SHORTCODE.split(text)
+        if len(parts) == 1:
+            return text
+
+        parts[1::2] = [emoji_table.get(shortcode, shortcode) for shortcode in parts[1::2]]
+        return ''.join(parts)
+
+
+    @staticmethod
+    def register(client: discord.Client) -> None:
+        """
+        Validate the custom emojis once the bot has logged in.
+
+        Arguments:
+            client: The Discord bot client.
+        """
+
+        if Emoji._client is client:
+            return
+
+        Emoji._client = client
+        client.add_listener(Emoji._on_ready, 'on_ready')
+
+
+    @staticmethod
+    async def _on_ready() -> None:
+        """ Validate the custom emojis the first time the bot is ready, retrying on later reconnects if it failed. """
+
+        if Emoji._validated:
+            return
+
+        from utils.logging import Logger
+
+        missing = await Emoji.validate(Emoji._client)
+        if missing is None:
+            Logger().warning('Emoji', 'Skipped validating custom emojis, failed to fetch the application emojis.')
+        elif missing:
+            Logger().warning('Emoji', f'Replaced {len(missing)} missing custom emojis: {", ".join(missing)}.')
+
+
+    @staticmethod
+    async def validate(client: discord.Client) -> list[str] | None:
+        """
+        Check that every custom emoji still exists, replacing the missing ones with unicode emojis.
+
+        Uses the emojis of the bot's servers, which are cached after logging in,
+        and the bot's application emojis, which are fetched in a single request.
+        Nothing is replaced if the application emojis can't be fetched, since they can't be checked.
+
+        Arguments:
+            client: The logged in Discord bot client.
+
+        Returns:
+            The names of the emojis that were replaced, or None if the check was skipped.
+        """
+
+        available = {emoji.id for emoji in client.emojis}
+        try:
+            available.update(emoji.id for emoji in await client.fetch_application_emojis())
+        except discord.HTTPException:
+            return None
+
+        missing = []
+        for name, value in Emoji._names.items():
+            match = Emoji.CUSTOM_EMOJI.fullmatch(value)
+            if match and int(match.group(1)) not in available:
+                fallback = Emoji.LOADING_FALLBACK if name.startswith('loading.') else Emoji.FALLBACKS.get(name, '❔')
+                owner, attr = Emoji._owners[name]
+                setattr(owner, attr, fallback)
+                missing.append(name)
+
+        Emoji._build()
+        Emoji._validated = True
+
+        return missing
+
+
+Emoji._build()
 
 
 __all__ = ['Emoji']
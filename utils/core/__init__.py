@@ -1,2 +1,3 @@
 from .bot import *
 from .database import *
+from .settings import *
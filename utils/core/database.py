@@ -1,13 +1,39 @@
+import time
+import atexit
+import asyncio
+import functools
+import itertools
+from typing import Callable, Iterator, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor, Future
+
 from pymongo.mongo_client import MongoClient
+from pymongo.errors import PyMongoError
 from pymongo.collection import InsertOneResult, InsertManyResult, DeleteResult, UpdateResult, Database
 
+from .query_cache import QueryCache
+from .write_buffer import WriteBuffer
+from .index_manager import Index, IndexManager
+from .embedded_database import EmbeddedDatabase
+from .metrics import DBMetrics
+from .retry_policy import RetryPolicy
+
 
 class DB:
     """ Singleton class representing the database. """
 
     _instance = None
     client: MongoClient = None
-    database: Database = None
+    database: Database | EmbeddedDatabase = None
+    executor: ThreadPoolExecutor = None
+    semaphore: asyncio.Semaphore = None
+    timeout: float = None
+    caches: dict[str, QueryCache] = {}
+    buffers: dict[str, WriteBuffer] = {}
+    indexes: dict[str, list[Index]] = {}
+    explain: bool = False
+    _explained: set[tuple[str, str]] = set()
+    metrics: DBMetrics = None
+    retry_policy: RetryPolicy = RetryPolicy()
 
 
     def __new__(cls) -> 'DB':
@@ -15,23 +41,382 @@ class DB:
 
         if cls._instance is None:
             cls._instance = super(DB, cls).__new__(cls)
+            cls._instance.metrics = DBMetrics(on_slow = cls._instance._on_slow_query)
 
         return cls._instance
 
 
-    def setup(self, db_url: str) -> None:
+    def setup(self, db_url: str, max_concurrency: int = 8, timeout: float = 10.0, min_pool_size: int = 0,
+              max_pool_size: int = 100, connect_timeout: float = 5.0, server_selection_timeout: float = 10.0,
+              socket_timeout: float = None, compressors: list[str] = None, warm_up: bool = True) -> None:
         """
         Set up the database.
 
+        Urls starting with memory:// or sqlite:// use an embedded database instead of a MongoDB server,
+        see EmbeddedDatabase.from_url() for details. The connection options only apply to MongoDB.
+
+        Arguments:
+             db_url: A MongoDB or embedded database connection url.
+             max_concurrency: The maximum number of asynchronous calls running at the same time.
+             timeout: The default number of seconds to wait for an asynchronous call.
+             min_pool_size: The number of connections kept open even when idle.
+             max_pool_size: The maximum number of open connections.
+             connect_timeout: The number of seconds to wait for a new connection.
+             server_selection_timeout: The number of seconds to wait for an available server before failing a call.
+             socket_timeout: The number of seconds to wait for a server response. Leave None to wait indefinitely.
+             compressors: Wire compression algorithms to offer the server, in order of preference.
+                          zlib is always available, snappy and zstd need their Python packages.
+             warm_up: Whether to connect and ping the server right away instead of on the first call.
+                      Once connected, the client opens the minimum number of connections in the background,
+                      and the settings are loaded so the first lookup doesn't query the database.
+        """
+
+        start, connected = time.perf_counter(), True
+        if EmbeddedDatabase.is_embedded(db_url):
+            self.client, self.database = None, EmbeddedDatabase.from_url(db_url)
+        else:
+            options = {
+                'minPoolSize' : min_pool_size,
+                'maxPoolSize' : max_pool_size,
+                'connectTimeoutMS' : int(connect_timeout * 1000),
+                'serverSelectionTimeoutMS' : int(server_selection_timeout * 1000),
+                'socketTimeoutMS' : int(socket_timeout * 1000) if socket_timeout is not None else None
+            }
+            if compressors:
+                options['compressors'] = ','.join(compressors)
+
+            self.client = MongoClient(db_url, **options)
+            self.database = self.client['database']
+
+            if warm_up:
+                connected = self._warm_up(start)
+
+        if self.executor:
+            self.executor.shutdown(wait = False)
+
+        self.executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix = 'DB')
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = timeout
+
+        if connected and (warm_up or self.client is None):
+            self._load_settings()
+
+        if not self.indexes:
+            return
+
+        if not connected:
+            self._get_logger().warning(
+                'Database', 'Skipped reconciling indexes, call DB.ensure_indexes() once connected.'
+            )
+            return
+
+        try:
+            self.ensure_indexes()
+        except PyMongoError as error:
+            self._get_logger().warning(
+                'Database', f'Failed to reconcile indexes, call DB.ensure_indexes() once connected: {error}'
+            )
+
+
+    def _load_settings(self) -> None:
+        """ Helper function for loading the settings during setup instead of on the event loop when first used. """
+
+        from .settings import Settings
+
+        try:
+            Settings().load()
+        except PyMongoError as error:
+            self._get_logger().warning('Settings', f'Failed to load settings, retrying on first use: {error}')
+
+
+    def _warm_up(self, start: float) -> bool:
+        """ Helper function for connecting to the server and logging how long it took. Returns whether it worked. """
+
+        logger = self._get_logger()
+        try:
+            self.client.admin.command('ping')
+        except PyMongoError as error:
+            logger.error('Database', f'Failed to connect to MongoDB: {error}')
+            return False
+
+        logger.ok('Database', f'Connected to MongoDB in {(time.perf_counter() - start) * 1000:.1f} ms.', report = False)
+        return True
+
+
+    def set_retry_policy(self, attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0) -> None:
+        """
+        Set how idempotent calls are retried after transient errors such as network errors and failovers.
+
+        Retried calls are finds, deletes that can't remove more than intended,
+        and updates that only use operators which have the same effect when applied twice.
+
+        Arguments:
+            attempts: The maximum number of attempts, including the first one. 1 disables retrying.
+            base_delay: The maximum number of seconds to wait before the first retry.
+            max_delay: The maximum number of seconds to wait before any retry.
+        """
+
+        self.retry_policy = RetryPolicy(attempts, base_delay, max_delay)
+
+
+    def _on_retry(self, operation: str, collection: str) -> Callable[[int, float, Exception], None]:
+        """ Helper function for creating a function that logs retries of a call. """
+
+        def on_retry(attempt: int, delay: float, error: Exception) -> None:
+            self._get_logger().warning(
+                'Database', f'Attempt {attempt} of {operation} on {collection} failed, retrying in '
+                            f'{delay * 1000:.0f} ms: {error}', report = False
+            )
+
+        return on_retry
+
+
+    def declare_index(self, collection: str, keys: str | list[tuple[str, int]], unique: bool = False,
+                      ttl: int = None, partial: dict[str, ...] = None, name: str = None) -> None:
+        """
+        Declare an index of a database collection, created by setup() if it doesn't exist.
+
+        Arguments:
+            collection: Name of the database collection.
+            keys: A field name, or a list of (field name, direction) pairs for compound indexes.
+            unique: Whether the indexed values must be unique.
+            ttl: The number of seconds after which documents are removed, based on a date field.
+            partial: A filter for only indexing the documents that match it.
+            name: The index name. Leave None to let MongoDB generate one.
+        """
+
+        self.indexes.setdefault(collection, []).append(Index(keys, unique, ttl, partial, name))
+
+
+    def ensure_indexes(self, create: bool = True, drop_extra: bool = False) -> dict[str, dict[str, list[str]]]:
+        """
+        Reconcile the declared indexes with the ones in the database and log the differences.
+
+        Arguments:
+            create: Whether to create missing indexes.
+            drop_extra: Whether to drop indexes that aren't declared.
+
+        Returns:
+            The missing, created, failed, extra, and dropped indexes of each collection.
+        """
+
+        reports = {
+            collection : IndexManager.reconcile(self.database[collection], declared, create, drop_extra)
+            for collection, declared in self.indexes.items()
+        }
+
+        logger = self._get_logger()
+        for collection, report in reports.items():
+            details = '\n'.join(f'{key.capitalize()}: {", ".join(values)}' for key, values in report.items() if values)
+            if report['failed']:
+                logger.error('Database', f'Failed to create indexes for {collection}.\n{details}')
+            elif details:
+                logger.notice('Database', f'Reconciled indexes for {collection}.\n{details}')
+
+        return reports
+
+
+    def set_explain(self, enabled: bool = True) -> None:
+        """
+        Enable or disable explaining find() queries and warning about the ones that scan the whole collection.
+
+        Meant for debugging, since every query runs twice.
+
+        Arguments:
+            enabled: Whether to explain queries.
+        """
+
+        self.explain = enabled
+        self._explained.clear()
+
+
+    def _explain(self, collection: str, query: dict[str, ...]) -> None:
+        """ Helper function for warning once per query shape about queries that fall back to a collection scan. """
+
+        shape = self._get_query_shape(query)
+        if (collection, shape) in self._explained:
+            return
+
+        self._explained.add((collection, shape))
+        plan = self.database[collection].find(query).explain()
+        if IndexManager.find_stage(plan.get('queryPlanner', {}).get('winningPlan', plan), 'COLLSCAN'):
+            self._get_logger().warning('Database', f'Query on {collection} uses a collection scan: {shape}')
+
+
+    @staticmethod
+    def _get_query_shape(query: ...) -> str:
+        """ Helper function for describing a query with all of its values replaced by question marks. """
+
+        def redact(value: ...) -> ...:
+            if isinstance(value, dict):
+                return {key : redact(item) for key, item in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [redact(item) for item in value]
+            return '?'
+
+        return str(redact(query))
+
+
+    def set_slow_query_threshold(self, threshold: float | None) -> None:
+        """
+        Set after how long a call is logged as a slow query.
+
+        Arguments:
+            threshold: The number of seconds. Leave None to stop logging slow queries.
+        """
+
+        self.metrics.slow_threshold = threshold
+
+
+    def _on_slow_query(self, collection: str, operation: str, seconds: float, query: ...) -> None:
+        """ Helper function for logging a slow call with the values of its query redacted. """
+
+        shape = f': {self._get_query_shape(query)}' if query is not None else ''
+        self._get_logger().warning(
+            'Database', f'Slow {operation} on {collection} took {seconds * 1000:.1f} ms{shape}', report = False
+        )
+
+
+    def get_metrics(self, reset: bool = False) -> dict[str, ...]:
+        """
+        Get call counts, latency percentiles, document counts and error counts of each operation.
+
+        Buffered writes are measured when they are queued, cache hits when they are returned.
+
+        Arguments:
+            reset: Whether to start counting from zero afterwards.
+
+        Returns:
+            The time counting started and the counters of each operation, grouped by collection.
+        """
+
+        return self.metrics.snapshot(reset)
+
+
+    def enable_cache(self, collection: str, ttl: float = 60.0, max_entries: int = 1024) -> None:
+        """
+        Cache find() results of a database collection.
+
+        The cache is cleared whenever insert(), delete() or update() is called on the same collection.
+
+        Arguments:
+            collection: Name of the database collection.
+            ttl: The number of seconds a result stays valid.
+            max_entries: The maximum number of cached results, the least recently used ones are evicted first.
+        """
+
+        self.caches[collection] = QueryCache(ttl, max_entries)
+
+
+    def disable_cache(self, collection: str) -> None:
+        """
+        Stop caching find() results of a database collection.
+
+        Arguments:
+            collection: Name of the database collection.
+        """
+
+        self.caches.pop(collection, None)
+
+
+    def get_cache_stats(self) -> dict[str, dict[str, int]]:
+        """ Get hit, miss, eviction, coalescing and invalidation counters of each cached collection. """
+
+        return {collection : cache.get_stats() for collection, cache in self.caches.items()}
+
+
+    def _invalidate(self, collection: str) -> None:
+        """ Helper function for clearing the cache of a database collection after a write. """
+
+        cache = self.caches.get(collection)
+        if cache:
+            cache.invalidate()
+
+
+    def enable_write_buffer(self, collection: str, max_operations: int = 500, interval: float = 1.0) -> None:
+        """
+        Buffer insert() and update() calls on a database collection and send them as unordered bulk writes.
+
+        Buffered calls return a future instead of a result, which is resolved or fails per operation.
+        Single document $inc and $set updates of the same document are merged while they wait.
+        Queued writes are sent before any delete() on the same collection and when the program exits.
+
         Arguments:
-             db_url: A MongoDB connection url.
+            collection: Name of the database collection.
+            max_operations: The number of queued operations that triggers a flush.
+            interval: The maximum number of seconds an operation waits before being sent.
         """
 
-        self.client = MongoClient(db_url)
-        self.database = self.client['database']
+        if not self.buffers:
+            atexit.register(self.flush)
+
+        self.disable_write_buffer(collection)
+        self.buffers[collection] = WriteBuffer(
+            self.database[collection], max_operations, interval,
+            on_flush = lambda failed: self._on_flush(collection, failed)
+        )
 
 
-    def find(self, collection: str, query: dict[str, ...], find_many: bool = False) \
+    def disable_write_buffer(self, collection: str) -> None:
+        """
+        Send all queued writes of a database collection and stop buffering them.
+
+        Arguments:
+            collection: Name of the database collection.
+        """
+
+        buffer = self.buffers.pop(collection, None)
+        if buffer:
+            buffer.close()
+
+
+    def flush(self, collection: str = None) -> dict[str, list[tuple[dict[str, ...], Exception]]]:
+        """
+        Send queued writes immediately.
+
+        Arguments:
+            collection: Name of the database collection. Leave None to flush all buffered collections.
+
+        Returns:
+            The failed operations and their errors for each flushed collection.
+        """
+
+        collections = [collection] if collection else list(self.buffers)
+        return {name : self.buffers[name].flush() for name in collections if name in self.buffers}
+
+
+    def _on_flush(self, collection: str, failed: list[tuple[dict[str, ...], Exception]]) -> None:
+        """ Helper function for clearing the cache and logging failed writes after a flush. """
+
+        self._invalidate(collection)
+
+        if failed:
+            self._get_logger().error(
+                'Database', f'{len(failed)} buffered write(s) to {collection} failed:\n' +
+                '\n'.join(f'{operation["type"]}: {error}' for operation, error in failed)
+            )
+
+
+    @staticmethod
+    def _get_logger():
+        """ Helper function for getting the logger, which imports this module and can't be imported before it. """
+
+        from utils.logging import Logger
+        return Logger()
+
+
+    async def _run(self, func: Callable, *args, timeout: float = None, **kwargs) -> ...:
+        """ Helper function for running a synchronous call in the executor without blocking the event loop. """
+
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            call = loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+            return await asyncio.wait_for(call, self.timeout if timeout is None else timeout)
+
+
+    def find(self, collection: str, query: dict[str, ...], find_many: bool = False,
+             projection: dict[str, ...] | list[str] = None, sort: str | list[tuple[str, int]] = None,
+             skip: int = 0, limit: int = 0, batch_size: int = 0) \
             -> tuple[dict[str, ...], ...] | dict[str, ...] | None:
         """
         Find documents in a database collection.
@@ -40,19 +425,158 @@ class DB:
              collection: Name of the database collection.
              query: The search query.
              find_many: Whether to find all documents that satisfy the query or stop at the first one.
+             projection: The fields to include or exclude. Leave None to return whole documents.
+             sort: A field name, or a list of (field name, direction) pairs to sort by.
+             skip: The number of documents to skip.
+             limit: The maximum number of documents to return. 0 means no limit.
+             batch_size: The number of documents fetched per round trip. 0 uses the server default.
 
         Returns:
             The document(s) or None if not found.
         """
 
+        options = {'projection' : projection, 'sort' : sort, 'skip' : skip, 'limit' : limit, 'batch_size' : batch_size}
+
+        with self.metrics.measure(collection, 'find', query) as record:
+            cache = self.caches.get(collection)
+            key = QueryCache.make_key(query, find_many, options) if cache else None
+            if key:
+                result = cache.get(key, lambda: self._find(collection, query, find_many, **options))
+            else:
+                result = self._find(collection, query, find_many, **options)
+
+            record['documents'] = len(result) if find_many else int(result is not None)
+            return result
+
+
+    def _find(self, collection: str, query: dict[str, ...], find_many: bool, **options) \
+            -> tuple[dict[str, ...], ...] | dict[str, ...] | None:
+        """ Helper function for finding documents without the cache. """
+
+        if self.explain:
+            self._explain(collection, query)
+
         if find_many:
-            return tuple(self.database[collection].find(query))
+            return self.retry_policy.run(
+                lambda: tuple(self._cursor(collection, query, **options)), self._on_retry('find', collection)
+            )
+
+        return self.retry_policy.run(
+            lambda: next(self._cursor(collection, query, **{**options, 'limit' : 1}), None),
+            self._on_retry('find', collection)
+        )
+
 
-        return self.database[collection].find_one(query)
+    def _cursor(self, collection: str, query: dict[str, ...], projection: dict[str, ...] | list[str] = None,
+                sort: str | list[tuple[str, int]] = None, skip: int = 0, limit: int = 0, batch_size: int = 0):
+        """ Helper function for creating a cursor with the given options. """
+
+        cursor = self.database[collection].find(query, projection, skip = skip, limit = limit, batch_size = batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        return cursor
+
+
+    def stream(self, collection: str, query: dict[str, ...], projection: dict[str, ...] | list[str] = None,
+               sort: str | list[tuple[str, int]] = None, skip: int = 0, limit: int = 0,
+               batch_size: int = 100) -> Iterator[dict[str, ...]]:
+        """
+        Lazily iterate over documents in a database collection, fetching them in batches.
+
+        Arguments:
+             collection: Name of the database collection.
+             query: The search query.
+             projection: The fields to include or exclude. Leave None to return whole documents.
+             sort: A field name, or a list of (field name, direction) pairs to sort by.
+             skip: The number of documents to skip.
+             limit: The maximum number of documents to return. 0 means no limit.
+             batch_size: The number of documents fetched per round trip.
+
+        Returns:
+            An iterator of documents.
+        """
+
+        if self.explain:
+            self._explain(collection, query)
+
+        cursor = self._cursor(collection, query, projection, sort, skip, limit, batch_size)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+
+    async def astream(self, collection: str, query: dict[str, ...], projection: dict[str, ...] | list[str] = None,
+                      sort: str | list[tuple[str, int]] = None, skip: int = 0, limit: int = 0,
+                      batch_size: int = 100, timeout: float = None) -> AsyncIterator[dict[str, ...]]:
+        """
+        Asynchronously iterate over documents in a database collection. Same as stream(), with an optional timeout
+        for each batch.
+        """
+
+        documents = self.stream(collection, query, projection, sort, skip, limit, batch_size)
+        try:
+            while batch := await self._run(lambda: list(itertools.islice(documents, batch_size)), timeout = timeout):
+                for document in batch:
+                    yield document
+        finally:
+            try:
+                await self._run(documents.close)
+            except ValueError:
+                pass  # A timed out batch is still being fetched, the cursor is closed when it's garbage collected.
+
+
+    def paginate(self, collection: str, query: dict[str, ...], key: str = '_id', page_size: int = 50,
+                 after: ... = None, descending: bool = False, projection: dict[str, ...] | list[str] = None) \
+            -> tuple[tuple[dict[str, ...], ...], ...]:
+        """
+        Get one page of documents using keyset pagination, which stays fast on deep pages unlike skip().
+
+        Pages are ordered by the key. For keys other than _id, _id is used to break ties between equal values.
+
+        Arguments:
+             collection: Name of the database collection.
+             query: The search query.
+             key: The field to order the pages by. It must be included by the projection.
+             page_size: The maximum number of documents per page.
+             after: The position returned along with the previous page. Leave None for the first page.
+             descending: Whether to order the pages from the highest key to the lowest.
+             projection: The fields to include or exclude. Leave None to return whole documents.
+
+        Returns:
+            The documents of the page and the position of the next page, or None if this is the last page.
+        """
+
+        direction, operator = (-1, '$lt') if descending else (1, '$gt')
+        sort = [(key, direction)] if key == '_id' else [(key, direction), ('_id', direction)]
+
+        if after is not None:
+            if key == '_id':
+                position = {'_id' : {operator : after}}
+            else:
+                value, last_id = after
+                position = {'$or' : [{key : {operator : value}}, {key : value, '_id' : {operator : last_id}}]}
+
+            query = {'$and' : [query, position]} if query else position
+
+        documents = self.find(collection, query, True, projection, sort, limit = page_size)
+        if len(documents) < page_size:
+            return documents, None
+
+        last = documents[-1]
+        if key == '_id':
+            return documents, last['_id']
+
+        value = last
+        for part in key.split('.'):
+            value = value.get(part) if isinstance(value, dict) else None
+
+        return documents, (value, last['_id'])
 
 
     def insert(self, collection: str, data: dict[str, ...] | list[dict[str, ...]]) \
-            -> InsertOneResult | InsertManyResult:
+            -> InsertOneResult | InsertManyResult | Future:
         """
         Insert documents to a database collection.
 
@@ -61,13 +585,23 @@ class DB:
             data: The document(s) to insert.
 
         Returns:
-            The result of inserting documents.
+            The result of inserting documents, or a future of it if the collection's writes are buffered.
         """
 
-        if isinstance(data, list):
-            return self.database[collection].insert_many(data)
+        with self.metrics.measure(collection, 'insert') as record:
+            record['documents'] = len(data) if isinstance(data, list) else 1
+
+            buffer = self.buffers.get(collection)
+            if buffer:
+                return buffer.insert(data if isinstance(data, list) else [data])
 
-        return self.database[collection].insert_one(data)
+            if isinstance(data, list):
+                result = self.database[collection].insert_many(data)
+            else:
+                result = self.database[collection].insert_one(data)
+
+            self._invalidate(collection)
+            return result
 
 
     def delete(self, collection: str, query: dict[str, ...], delete_many: bool = False) -> DeleteResult:
@@ -83,14 +617,28 @@ class DB:
             The result of deleting documents.
         """
 
-        if delete_many:
-            return self.database[collection].delete_many(query)
+        if collection in self.buffers:
+            self.buffers[collection].flush()
+
+        with self.metrics.measure(collection, 'delete', query) as record:
+            if delete_many:
+                result = self.retry_policy.run(
+                    lambda: self.database[collection].delete_many(query), self._on_retry('delete', collection)
+                )
+            elif '_id' in query:
+                result = self.retry_policy.run(
+                    lambda: self.database[collection].delete_one(query), self._on_retry('delete', collection)
+                )
+            else:
+                result = self.database[collection].delete_one(query)
 
-        return self.database[collection].delete_one(query)
+            self._invalidate(collection)
+            record['documents'] = result.deleted_count
+            return result
 
 
     def update(self, collection: str, query: dict[str, ...], updates: dict[str, dict[str, ...]],
-               update_many: bool = False, upsert: bool = False) -> UpdateResult:
+               update_many: bool = False, upsert: bool = False) -> UpdateResult | Future:
         """
         Update documents in a database collection.
 
@@ -104,13 +652,63 @@ class DB:
             upsert: Whether to insert a new document if the search fails.
 
         Returns:
-            The result of updating documents.
+            The result of updating documents, or a future of it if the collection's writes are buffered.
+        """
+
+        with self.metrics.measure(collection, 'update', query) as record:
+            buffer = self.buffers.get(collection)
+            if buffer:
+                return buffer.update(query, updates, update_many, upsert)
+
+            func = self.database[collection].update_many if update_many else self.database[collection].update_one
+            if RetryPolicy.is_idempotent_update(updates):
+                result = self.retry_policy.run(
+                    lambda: func(query, updates, upsert = upsert), self._on_retry('update', collection)
+                )
+            else:
+                result = func(query, updates, upsert = upsert)
+
+            self._invalidate(collection)
+            record['documents'] = result.modified_count + (result.upserted_id is not None)
+            return result
+
+
+    async def afind(self, collection: str, query: dict[str, ...], find_many: bool = False,
+                    projection: dict[str, ...] | list[str] = None, sort: str | list[tuple[str, int]] = None,
+                    skip: int = 0, limit: int = 0, batch_size: int = 0, timeout: float = None) \
+            -> tuple[dict[str, ...], ...] | dict[str, ...] | None:
         """
+        Asynchronously find documents in a database collection. Same as find(), with an optional timeout.
+
+        Raises asyncio.TimeoutError if the call takes longer than the timeout.
+        The call itself keeps running in its thread until MongoDB answers.
+        """
+
+        return await self._run(
+            self.find, collection, query, find_many, projection, sort, skip, limit, batch_size, timeout = timeout
+        )
+
+
+    async def ainsert(self, collection: str, data: dict[str, ...] | list[dict[str, ...]], timeout: float = None) \
+            -> InsertOneResult | InsertManyResult | Future:
+        """ Asynchronously insert documents to a database collection. Same as insert(), with an optional timeout. """
+
+        return await self._run(self.insert, collection, data, timeout = timeout)
+
+
+    async def adelete(self, collection: str, query: dict[str, ...], delete_many: bool = False,
+                      timeout: float = None) -> DeleteResult:
+        """ Asynchronously delete documents from a database collection. Same as delete(), with an optional timeout. """
+
+        return await self._run(self.delete, collection, query, delete_many, timeout = timeout)
+
 
-        if update_many:
-            return self.database[collection].update_many(query, updates, upsert = upsert)
+    async def aupdate(self, collection: str, query: dict[str, ...], updates: dict[str, dict[str, ...]],
+                      update_many: bool = False, upsert: bool = False, timeout: float = None) \
+            -> UpdateResult | Future:
+        """ Asynchronously update documents in a database collection. Same as update(), with an optional timeout. """
 
-        return self.database[collection].update_one(query, updates, upsert = upsert)
+        return await self._run(self.update, collection, query, updates, update_many, upsert, timeout = timeout)
 
 
 __all__ = ['DB']
@@ -0,0 +1,820 @@
+import copy
+import time
+import sqlite3
+import datetime
+import itertools
+import threading
+import contextlib
+from typing import Iterator
+
+from bson import ObjectId, json_util
+from pymongo import IndexModel
+from pymongo.operations import InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany
+from pymongo.results import InsertOneResult, InsertManyResult, DeleteResult, UpdateResult, BulkWriteResult
+from pymongo.errors import DuplicateKeyError, WriteError, BulkWriteError, OperationFailure, InvalidOperation
+
+from .query_engine import QueryEngine, MISSING
+
+
+def _freeze(value: ...) -> ...:
+    """ Helper function for turning a document value into a hashable key. """
+
+    if isinstance(value, dict):
+        return 'dict', tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return 'list', tuple(_freeze(item) for item in value)
+    if isinstance(value, bool):
+        return 'bool', value
+
+    return value
+
+
+class EmbeddedCursor:
+    """ Class for lazily running a query on an embedded collection. """
+
+    def __init__(self, collection: 'EmbeddedCollection', query: dict[str, ...],
+                 projection: dict[str, ...] | list[str] = None, skip: int = 0, limit: int = 0) -> None:
+        """
+        Create a new EmbeddedCursor object. The query runs on the first iteration.
+
+        Arguments:
+            collection: The embedded collection.
+            query: The search query.
+            projection: The fields to include or exclude. Leave None to return whole documents.
+            skip: The number of documents to skip.
+            limit: The maximum number of documents to return. 0 means no limit.
+        """
+
+        self.collection, self.query, self.projection, self.skip, self.limit = \
+            collection, query or {}, projection, skip, abs(limit)
+        self._sort: list[tuple[str, int]] = []
+        self._documents: Iterator[dict[str, ...]] | None = None
+
+
+    def sort(self, key_or_list: str | list[tuple[str, int]], direction: int = None) -> 'EmbeddedCursor':
+        """
+        Set the sort order of the results.
+
+        Arguments:
+            key_or_list: A field name, or a list of (field name, direction) pairs.
+            direction: The direction to sort a single field by.
+
+        Returns:
+            The cursor itself.
+        """
+
+        if self._documents is not None:
+            raise InvalidOperation('cannot set options after executing query')
+
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction or 1)]
+        else:
+            self._sort = list(key_or_list.items() if isinstance(key_or_list, dict) else key_or_list)
+
+        return self
+
+
+    def __iter__(self) -> 'EmbeddedCursor':
+        return self
+
+
+    def __next__(self) -> dict[str, ...]:
+        if self._documents is None:
+            self._documents = iter(self.collection._fetch(self.query, self.projection, self._sort, self.skip, self.limit))
+
+        return next(self._documents)
+
+
+    def close(self) -> None:
+        """ Discard the remaining results. """
+
+        self._documents = iter(())
+
+
+    def explain(self) -> dict[str, ...]:
+        """ Describe how the query finds its documents, in the same shape as MongoDB's explain output. """
+
+        return {'queryPlanner' : {'winningPlan' : self.collection._plan(self.query)}}
+
+
+class EmbeddedCollection:
+    """ Class representing a collection of an embedded database. """
+
+    def __init__(self, database: 'EmbeddedDatabase', name: str) -> None:
+        """
+        Create a new EmbeddedCollection object.
+
+        Arguments:
+            database: The embedded database.
+            name: Name of the collection.
+        """
+
+        self.database, self.name = database, name
+
+        self._documents: dict[..., dict[str, ...]] = {}
+        self._positions: dict[..., int] = {}
+        self._counter = itertools.count()
+        self._indexes: dict[str, dict[str, ...]] = {}
+        self._entries: dict[str, dict[tuple, set]] = {}
+        self._expired_at = 0.0
+
+
+    def _load(self, documents: list[dict[str, ...]], indexes: dict[str, dict[str, ...]]) -> None:
+        """ Helper function for filling the collection with stored documents and indexes. """
+
+        for document in documents:
+            key = _freeze(document['_id'])
+            self._documents[key], self._positions[key] = document, next(self._counter)
+
+        for name, info in indexes.items():
+            self._indexes[name] = info
+            self._entries[name] = {}
+            for key, document in self._documents.items():
+                self._add_entries(name, key, document)
+
+
+    def _index_keys(self, name: str, document: dict[str, ...]) -> list[tuple]:
+        """ Helper function for getting the index keys of a document, one for each combination of array elements. """
+
+        info = self._indexes[name]
+        partial = info.get('partialFilterExpression')
+        if partial is not None and not QueryEngine.match(document, partial):
+            return []
+
+        fields = []
+        for field, _ in info['key']:
+            values = []
+            for value in QueryEngine.resolve(document, field):
+                values.extend(value if isinstance(value, list) else [value])
+            fields.append([_freeze(value) for value in values] or [None])
+
+        return list(itertools.product(*fields))
+
+
+    def _add_entries(self, name: str, key: ..., document: dict[str, ...]) -> None:
+        """ Helper function for adding a document to an index. """
+
+        for index_key in self._index_keys(name, document):
+            self._entries[name].setdefault(index_key, set()).add(key)
+
+
+    def _remove_entries(self, name: str, key: ..., document: dict[str, ...]) -> None:
+        """ Helper function for removing a document from an index. """
+
+        for index_key in self._index_keys(name, document):
+            keys = self._entries[name].get(index_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._entries[name][index_key]
+
+
+    def _check_unique(self, key: ..., document: dict[str, ...], is_insert: bool) -> None:
+        """ Helper function for raising a DuplicateKeyError if a document would break a unique index. """
+
+        if is_insert and key in self._documents:
+            raise self._duplicate('_id_', {'_id' : document['_id']})
+
+        for name, info in self._indexes.items():
+            if not info.get('unique'):
+                continue
+
+            for index_key in self._index_keys(name, document):
+                if self._entries[name].get(index_key, set()) - {key}:
+                    fields = {field : QueryEngine.get(document, field) for field, _ in info['key']}
+                    raise self._duplicate(name, {
+                        field : None if value is MISSING else value for field, value in fields.items()
+                    })
+
+
+    def _duplicate(self, name: str, values: dict[str, ...]) -> DuplicateKeyError:
+        """ Helper function for creating a duplicate key error in the same format as MongoDB. """
+
+        message = f'E11000 duplicate key error collection: {self.database.name}.{self.name} index: {name} ' \
+                  f'dup key: {values}'
+
+        return DuplicateKeyError(message, 11000, {'code' : 11000, 'errmsg' : message, 'keyValue' : values})
+
+
+    def _store(self, key: ..., old: dict[str, ...] | None, new: dict[str, ...]) -> None:
+        """ Helper function for saving a document and updating the indexes. """
+
+        for name in self._indexes:
+            if old is not None:
+                self._remove_entries(name, key, old)
+            self._add_entries(name, key, new)
+
+        if old is None:
+            self._positions[key] = next(self._counter)
+
+        self._documents[key] = new
+        self.database._write(self.name, new)
+
+
+    def _erase(self, key: ...) -> None:
+        """ Helper function for removing a document and its index entries. """
+
+        document = self._documents.pop(key)
+        del self._positions[key]
+        for name in self._indexes:
+            self._remove_entries(name, key, document)
+
+        self.database._erase(self.name, document['_id'])
+
+
+    @staticmethod
+    def _equalities(query: dict[str, ...]) -> dict[str, list]:
+        """ Helper function for getting the fields of a query that are matched against exact values. """
+
+        equalities = {}
+        for field, condition in query.items():
+            if field == '$and':
+                for subquery in condition:
+                    equalities.update(EmbeddedCollection._equalities(subquery))
+                continue
+            if field.startswith('$'):
+                continue
+
+            if isinstance(condition, dict):
+                if len(condition) != 1 or not ({'$eq', '$in'} & set(condition)):
+                    continue
+                values = [condition['$eq']] if '$eq' in condition else list(condition['$in'])
+            else:
+                values = [condition]
+
+            if all(not isinstance(value, dict) and not hasattr(value, 'pattern') for value in values):
+                equalities[field] = values
+
+        return equalities
+
+
+    @staticmethod
+    def _lookup_keys(value: ...) -> list:
+        """
+        Helper function for the index keys under which documents equal to a value can be found.
+
+        Arrays are indexed by their elements, so a document whose field equals an array is found by its first element,
+        or by the whole array if it's nested in another array. Empty arrays are indexed like missing fields.
+        """
+
+        if not isinstance(value, list):
+            return [_freeze(value)]
+
+        return [_freeze(value[0]) if value else None, _freeze(value)]
+
+
+    def _plan(self, query: dict[str, ...]) -> dict[str, ...]:
+        """ Helper function for choosing how to find the documents of a query. """
+
+        equalities = self._equalities(query)
+        if '_id' in equalities:
+            return {'stage' : 'IDHACK', 'values' : equalities['_id']}
+
+        for name, info in self._indexes.items():
+            if 'partialFilterExpression' in info:
+                continue
+            fields = [field for field, _ in info['key']]
+            if all(field in equalities for field in fields):
+                return {'stage' : 'FETCH', 'inputStage' : {
+                    'stage' : 'IXSCAN', 'indexName' : name, 'values' : [equalities[field] for field in fields]
+                }}
+
+        return {'stage' : 'COLLSCAN'}
+
+
+    def _select(self, query: dict[str, ...]) -> list[tuple[..., dict[str, ...]]]:
+        """ Helper function for finding the stored documents that match a query, in insertion order. """
+
+        self._expire()
+        plan = self._plan(query)
+
+        if plan['stage'] == 'COLLSCAN':
+            candidates = self._documents.items()
+        else:
+            if plan['stage'] == 'IDHACK':
+                keys = {key for value in plan['values'] for key in self._lookup_keys(value)}
+            else:
+                stage = plan['inputStage']
+                entries = self._entries[stage['indexName']]
+                keys = set()
+                lookups = ([key for value in values for key in self._lookup_keys(value)] for values in stage['values'])
+                for index_key in itertools.product(*lookups):
+                    keys |= entries.get(index_key, set())
+
+            candidates = [(key, self._documents[key]) for key in sorted(
+                (key for key in keys if key in self._documents), key = self._positions.__getitem__
+            )]
+
+        return [(key, document) for key, document in candidates if QueryEngine.match(document, query)]
+
+
+    def _expire(self) -> None:
+        """ Helper function for removing documents past the expiry of a TTL index, checked at most once a minute. """
+
+        now = time.monotonic()
+        if now < self._expired_at:
+            return
+
+        self._expired_at = now + 60
+        utc_now = datetime.datetime.now(datetime.timezone.utc)
+
+        for info in self._indexes.values():
+            if 'expireAfterSeconds' not in info:
+                continue
+
+            field, limit = info['key'][0][0], datetime.timedelta(seconds = info['expireAfterSeconds'])
+            for key, document in list(self._documents.items()):
+                dates = [value for value in QueryEngine.resolve(document, field) if isinstance(value, datetime.datetime)]
+                dates = [value if value.tzinfo else value.replace(tzinfo = datetime.timezone.utc) for value in dates]
+                if dates and min(dates) + limit <= utc_now:
+                    self._erase(key)
+
+
+    def _fetch(self, query: dict[str, ...], projection: dict[str, ...] | list[str] | None,
+               sort: list[tuple[str, int]], skip: int, limit: int) -> list[dict[str, ...]]:
+        """ Helper function for running a query and copying the results. """
+
+        with self.database.lock:
+            documents = [document for _, document in self._select(query)]
+
+        if sort:
+            QueryEngine.sort(documents, sort)
+
+        documents = documents[skip:skip + limit] if limit else documents[skip:]
+        return [QueryEngine.project(copy.deepcopy(document), projection) for document in documents]
+
+
+    def find(self, filter: dict[str, ...] = None, projection: dict[str, ...] | list[str] = None,
+             skip: int = 0, limit: int = 0, batch_size: int = 0, sort: list[tuple[str, int]] = None) -> EmbeddedCursor:
+        """ Create a cursor for documents that match a query. The batch size is accepted for compatibility. """
+
+        cursor = EmbeddedCursor(self, filter, projection, skip, limit)
+        return cursor.sort(sort) if sort else cursor
+
+
+    def find_one(self, filter: dict[str, ...] = None, projection: dict[str, ...] | list[str] = None,
+                 **options) -> dict[str, ...] | None:
+        """ Find the first document that matches a query. """
+
+        return next(self.find(filter, projection, **{**options, 'limit' : 1}), None)
+
+
+    def count_documents(self, filter: dict[str, ...]) -> int:
+        """ Count the documents that match a query. """
+
+        with self.database.lock:
+            return len(self._select(filter))
+
+
+    def _insert(self, document: dict[str, ...]) -> ...:
+        """ Helper function for inserting a document, adding an _id to it if it doesn't have one. """
+
+        if '_id' not in document:
+            document['_id'] = ObjectId()
+
+        stored = copy.deepcopy(document)
+        key = _freeze(stored['_id'])
+        self._check_unique(key, stored, True)
+        self._store(key, None, stored)
+
+        return document['_id']
+
+
+    def insert_one(self, document: dict[str, ...]) -> InsertOneResult:
+        """ Insert a document. """
+
+        with self.database.lock, self.database.transaction():
+            return InsertOneResult(self._insert(document), True)
+
+
+    def insert_many(self, documents: list[dict[str, ...]], ordered: bool = True) -> InsertManyResult:
+        """ Insert documents. """
+
+        result = self.bulk_write([InsertOne(document) for document in documents], ordered)
+        return InsertManyResult([document['_id'] for document in documents], result.acknowledged)
+
+
+    def _update(self, query: dict[str, ...], updates: dict[str, dict[str, ...]],
+                update_many: bool, upsert: bool) -> dict[str, ...]:
+        """ Helper function for updating documents. Returns the raw result in the same format as MongoDB. """
+
+        QueryEngine.validate_update(updates)
+
+        matches = self._select(query)
+        if not update_many:
+            matches = matches[:1]
+
+        if not matches:
+            if not upsert:
+                return {'n' : 0, 'nModified' : 0, 'ok' : 1.0}
+
+            document = QueryEngine.seed(query)
+            self._apply(document, updates, True)
+            if '_id' not in document:
+                document['_id'] = ObjectId()
+
+            key = _freeze(document['_id'])
+            self._check_unique(key, document, True)
+            self._store(key, None, document)
+            return {'n' : 1, 'nModified' : 0, 'upserted' : document['_id'], 'ok' : 1.0}
+
+        modified = 0
+        for key, document in matches:
+            updated = copy.deepcopy(document)
+            self._apply(updated, updates, False)
+            if _freeze(updated.get('_id')) != key:
+                raise WriteError("Performing an update on the path '_id' would modify the immutable field '_id'", 66)
+            if updated != document:
+                self._check_unique(key, updated, False)
+                self._store(key, document, updated)
+                modified += 1
+
+        return {'n' : len(matches), 'nModified' : modified, 'ok' : 1.0}
+
+
+    @staticmethod
+    def _apply(document: dict[str, ...], updates: dict[str, dict[str, ...]], is_insert: bool) -> None:
+        """ Helper function for applying update operators, reporting invalid ones the way MongoDB does. """
+
+        try:
+            QueryEngine.update(document, updates, is_insert)
+        except ValueError as error:
+            raise WriteError(str(error), 2, {'code' : 2, 'errmsg' : str(error)})
+
+
+    def update_one(self, filter: dict[str, ...], update: dict[str, dict[str, ...]], upsert: bool = False) -> UpdateResult:
+        """ Update the first document that matches a query. """
+
+        with self.database.lock, self.database.transaction():
+            return UpdateResult(self._update(filter, update, False, upsert), True)
+
+
+    def update_many(self, filter: dict[str, ...], update: dict[str, dict[str, ...]], upsert: bool = False) -> UpdateResult:
+        """ Update all documents that match a query. """
+
+        with self.database.lock, self.database.transaction():
+            return UpdateResult(self._update(filter, update, True, upsert), True)
+
+
+    def _delete(self, query: dict[str, ...], delete_many: bool) -> int:
+        """ Helper function for deleting documents. Returns the number of deleted documents. """
+
+        matches = self._select(query)
+        if not delete_many:
+            matches = matches[:1]
+
+        for key, _ in matches:
+            self._erase(key)
+
+        return len(matches)
+
+
+    def delete_one(self, filter: dict[str, ...]) -> DeleteResult:
+        """ Delete the first document that matches a query. """
+
+        with self.database.lock, self.database.transaction():
+            return DeleteResult({'n' : self._delete(filter, False), 'ok' : 1.0}, True)
+
+
+    def delete_many(self, filter: dict[str, ...]) -> DeleteResult:
+        """ Delete all documents that match a query. """
+
+        with self.database.lock, self.database.transaction():
+            return DeleteResult({'n' : self._delete(filter, True), 'ok' : 1.0}, True)
+
+
+    def bulk_write(self, requests: list, ordered: bool = True) -> BulkWriteResult:
+        """
+        Run insert, update, and delete operations in one transaction.
+
+        Arguments:
+            requests: The pymongo operations.
+            ordered: Whether to stop at the first failed operation instead of running the rest.
+
+        Returns:
+            The combined result. A BulkWriteError holding it is raised if any operation failed.
+        """
+
+        result = {
+            'writeErrors' : [], 'writeConcernErrors' : [], 'nInserted' : 0, 'nUpserted' : 0,
+            'nMatched' : 0, 'nModified' : 0, 'nRemoved' : 0, 'upserted' : []
+        }
+
+        with self.database.lock, self.database.transaction():
+            for index, request in enumerate(requests):
+                try:
+                    if isinstance(request, InsertOne):
+                        self._insert(request._doc)
+                        result['nInserted'] += 1
+                    elif isinstance(request, (UpdateOne, UpdateMany)):
+                        raw = self._update(request._filter, request._doc, isinstance(request, UpdateMany),
+                                           bool(request._upsert))
+                        if 'upserted' in raw:
+                            result['nUpserted'] += 1
+                            result['upserted'].append({'index' : index, '_id' : raw['upserted']})
+                        else:
+                            result['nMatched'] += raw['n']
+                            result['nModified'] += raw['nModified']
+                    elif isinstance(request, (DeleteOne, DeleteMany)):
+                        result['nRemoved'] += self._delete(request._filter, isinstance(request, DeleteMany))
+                    else:
+                        raise TypeError(f'{request!r} is not supported by the embedded database')
+                except (WriteError, OperationFailure) as error:
+                    result['writeErrors'].append({
+                        'index' : index, 'code' : error.code, 'errmsg' : str(error), 'op' : request
+                    })
+                    if ordered:
+                        break
+
+        if result['writeErrors']:
+            raise BulkWriteError(result)
+
+        return BulkWriteResult(result, True)
+
+
+    def index_information(self) -> dict[str, dict[str, ...]]:
+        """ Get the indexes of the collection in the same format as MongoDB. """
+
+        with self.database.lock:
+            indexes = {'_id_' : {'v' : 2, 'key' : [('_id', 1)]}}
+            for name, info in self._indexes.items():
+                indexes[name] = {'v' : 2, **copy.deepcopy(info)}
+
+            return indexes
+
+
+    def create_indexes(self, indexes: list[IndexModel]) -> list[str]:
+        """ Create indexes, building their entries from the existing documents. """
+
+        names = []
+        with self.database.lock:
+            for model in indexes:
+                document = dict(model.document)
+                name = document.pop('name')
+                info = {'key' : list(document.pop('key').items())}
+                info.update({option : document[option] for option in (
+                    'unique', 'expireAfterSeconds', 'partialFilterExpression'
+                ) if document.get(option) is not None})
+
+                if name in self._indexes:
+                    if self._indexes[name] != info:
+                        raise OperationFailure(f'An existing index has the same name as the requested index: {name}', 86)
+                    names.append(name)
+                    continue
+
+                self._indexes[name], self._entries[name] = info, {}
+                try:
+                    for key, document in self._documents.items():
+                        if info.get('unique'):
+                            self._check_unique(key, document, False)
+                        self._add_entries(name, key, document)
+                except DuplicateKeyError:
+                    del self._indexes[name], self._entries[name]
+                    raise
+
+                self.database._write_index(self.name, name, info)
+                self._expired_at = 0.0
+                names.append(name)
+
+        return names
+
+
+    def create_index(self, keys: str | list[tuple[str, int]], **options) -> str:
+        """ Create an index. """
+
+        return self.create_indexes([IndexModel(keys, **options)])[0]
+
+
+    def drop_index(self, name: str) -> None:
+        """ Drop an index by its name. """
+
+        with self.database.lock:
+            if name not in self._indexes:
+                raise OperationFailure(f'index not found with name [{name}]', 27)
+
+            del self._indexes[name], self._entries[name]
+            self.database._erase_index(self.name, name)
+
+
+class EmbeddedDatabase:
+    """ Class representing an in-process database with the same interface as the subset of pymongo that DB uses. """
+
+    SCHEMES = ('memory', 'sqlite')
+
+
+    def __init__(self, name: str = 'database') -> None:
+        """
+        Create a new in-memory EmbeddedDatabase object.
+
+        Arguments:
+            name: Name of the database.
+        """
+
+        self.name = name
+        self.lock = threading.RLock()
+        self.collections: dict[str, EmbeddedCollection] = {}
+
+
+    @staticmethod
+    def is_embedded(url: str) -> bool:
+        """ Check whether a connection url points to an embedded database. """
+
+        return url.split(':', 1)[0].lower() in EmbeddedDatabase.SCHEMES
+
+
+    @staticmethod
+    def from_url(url: str) -> 'EmbeddedDatabase':
+        """
+        Create an embedded database from a connection url.
+
+        Urls:
+            - memory:// | Keep all documents in memory only.
+            - sqlite:///path/to/file.db | Keep documents in memory and persist them to an absolute SQLite file path.
+            - sqlite://file.db | Same as above, with a path relative to the working directory.
+
+        Arguments:
+            url: The connection url.
+
+        Returns:
+            The embedded database.
+        """
+
+        scheme, _, path = url.partition('://')
+        match scheme.lower():
+            case 'memory':
+                return EmbeddedDatabase()
+            case 'sqlite' if path:
+                return SQLiteDatabase(path)
+            case _:
+                raise ValueError(f'Invalid embedded database url: {url}')
+
+
+    def __getitem__(self, name: str) -> EmbeddedCollection:
+        """ Get a collection, creating it if it doesn't exist. """
+
+        collection = self.collections.get(name)
+        if collection is not None:
+            return collection
+
+        with self.lock:
+            if name not in self.collections:
+                collection = EmbeddedCollection(self, name)
+                collection._load(*self._load(name))
+                self.collections[name] = collection
+
+            return self.collections[name]
+
+
+    def list_collection_names(self) -> list[str]:
+        """ Get the names of all collections. """
+
+        return list(self.collections)
+
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """ Group the writes made inside the block, which lets persistent databases save them at once. """
+
+        yield
+
+
+    def close(self) -> None:
+        """ Release the resources of the database. """
+
+
+    def _load(self, collection: str) -> tuple[list[dict[str, ...]], dict[str, dict[str, ...]]]:
+        """ Helper function for loading the stored documents and indexes of a collection. """
+
+        return [], {}
+
+
+    def _write(self, collection: str, document: dict[str, ...]) -> None:
+        """ Helper function for persisting a document. """
+
+
+    def _erase(self, collection: str, _id: ...) -> None:
+        """ Helper function for removing a persisted document. """
+
+
+    def _write_index(self, collection: str, name: str, info: dict[str, ...]) -> None:
+        """ Helper function for persisting an index. """
+
+
+    def _erase_index(self, collection: str, name: str) -> None:
+        """ Helper function for removing a persisted index. """
+
+
+class SQLiteDatabase(EmbeddedDatabase):
+    """ Class representing an embedded database that keeps its documents in memory and writes them through to SQLite. """
+
+    JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS.with_options(tz_aware = False)
+
+
+    def __init__(self, path: str, name: str = 'database') -> None:
+        """
+        Create a new SQLiteDatabase object, creating the file if it doesn't exist.
+
+        Collections are read from the file the first time they are used. Writes are saved immediately.
+
+        Arguments:
+            path: Path to the SQLite file.
+            name: Name of the database.
+        """
+
+        super().__init__(name)
+
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread = False, isolation_level = None)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS documents (collection TEXT, id TEXT, document TEXT, PRIMARY KEY (collection, id))'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS indexes (collection TEXT, name TEXT, info TEXT, PRIMARY KEY (collection, name))'
+        )
+        self._depth = 0
+
+
+    def _dumps(self, value: ...) -> str:
+        """ Helper function for serializing a value without losing its BSON type. """
+
+        return json_util.dumps(value, json_options = self.JSON_OPTIONS)
+
+
+    def _loads(self, text: str) -> ...:
+        """ Helper function for deserializing a value. """
+
+        return json_util.loads(text, json_options = self.JSON_OPTIONS)
+
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Save the writes made inside the block in one SQLite transaction.
+
+        The transaction is committed even if the block fails, since the writes it made are already applied in memory.
+        """
+
+        with self.lock:
+            if self._depth == 0:
+                self.connection.execute('BEGIN')
+            self._depth += 1
+
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.connection.execute('COMMIT')
+
+
+    def close(self) -> None:
+        """ Close the SQLite connection. """
+
+        with self.lock:
+            self.connection.close()
+
+
+    def _load(self, collection: str) -> tuple[list[dict[str, ...]], dict[str, dict[str, ...]]]:
+        documents = [
+            self._loads(document) for document, in self.connection.execute(
+                'SELECT document FROM documents WHERE collection = ? ORDER BY rowid', (collection,)
+            )
+        ]
+        indexes = {
+            name : self._loads(info) for name, info in self.connection.execute(
+                'SELECT name, info FROM indexes WHERE collection = ?', (collection,)
+            )
+        }
+
+        for info in indexes.values():
+            info['key'] = [tuple(pair) for pair in info['key']]
+
+        return documents, indexes
+
+
+    def _write(self, collection: str, document: dict[str, ...]) -> None:
+        self.connection.execute(
+            'INSERT INTO documents (collection, id, document) VALUES (?, ?, ?) '
+            'ON CONFLICT (collection, id) DO UPDATE SET document = excluded.document',
+            (collection, self._dumps(document['_id']), self._dumps(document))
+        )
+
+
+    def _erase(self, collection: str, _id: ...) -> None:
+        self.connection.execute('DELETE FROM documents WHERE collection = ? AND id = ?', (collection, self._dumps(_id)))
+
+
+    def _write_index(self, collection: str, name: str, info: dict[str, ...]) -> None:
+        self.connection.execute(
+            'INSERT OR REPLACE INTO indexes (collection, name, info) VALUES (?, ?, ?)',
+            (collection, name, self._dumps(info))
+        )
+
+
+    def _erase_index(self, collection: str, name: str) -> None:
+        self.connection.execute('DELETE FROM indexes WHERE collection = ? AND name = ?', (collection, name))
+
+
+__all__ = ['EmbeddedDatabase', 'SQLiteDatabase', 'EmbeddedCollection', 'EmbeddedCursor']
@@ -0,0 +1,147 @@
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+
+
+class Index:
+    """ Class for declaring an index of a database collection. """
+
+    def __init__(self, keys: str | list[tuple[str, int]], unique: bool = False, ttl: int = None,
+                 partial: dict[str, ...] = None, name: str = None) -> None:
+        """
+        Create a new Index object.
+
+        Arguments:
+            keys: A field name, or a list of (field name, direction) pairs for compound indexes.
+            unique: Whether the indexed values must be unique.
+            ttl: The number of seconds after which documents are removed, based on a date field.
+            partial: A filter for only indexing the documents that match it.
+            name: The index name. Leave None to let MongoDB generate one.
+        """
+
+        self.keys = [(keys, 1)] if isinstance(keys, str) else [(field, direction) for field, direction in keys]
+        self.unique, self.ttl, self.partial, self.name = unique, ttl, partial, name
+
+
+    def to_model(self) -> IndexModel:
+        """ Convert the declaration into a pymongo index model. """
+
+        options = {}
+        if self.unique:
+            options['unique'] = True
+        if self.ttl is not None:
+            options['expireAfterSeconds'] = self.ttl
+        if self.partial is not None:
+            options['partialFilterExpression'] = self.partial
+        if self.name:
+            options['name'] = self.name
+
+        return IndexModel(self.keys, **options)
+
+
+    def matches(self, info: dict[str, ...]) -> bool:
+        """
+        Check whether an existing index satisfies the declaration.
+
+        Arguments:
+            info: The index information, as returned by index_information().
+
+        Returns:
+            Whether the index has the same keys and options.
+        """
+
+        return (
+            [(field, direction) for field, direction in info['key']] == self.keys
+            and bool(info.get('unique', False)) == self.unique
+            and info.get('expireAfterSeconds') == self.ttl
+            and info.get('partialFilterExpression') == self.partial
+        )
+
+
+    def __repr__(self) -> str:
+        """ Get a readable representation of the declaration. """
+
+        options = [
+            option for option, enabled in (
+                ('unique', self.unique), (f'ttl={self.ttl}', self.ttl is not None),
+                (f'partial={self.partial}', self.partial is not None)
+            ) if enabled
+        ]
+
+        keys = ', '.join(f'{field}:{direction}' for field, direction in self.keys)
+        return f'Index({keys}{"; " if options else ""}{", ".join(options)})'
+
+
+class IndexManager:
+    """ Class for reconciling declared indexes with the ones in the database. """
+
+    @staticmethod
+    def reconcile(collection, declared: list[Index], create: bool = True,
+                  drop_extra: bool = False) -> dict[str, list[str]]:
+        """
+        Compare the declared indexes of a collection with the existing ones.
+
+        Arguments:
+            collection: The database collection.
+            declared: The declared indexes.
+            create: Whether to create missing indexes.
+            drop_extra: Whether to drop indexes that aren't declared.
+
+        Returns:
+            The missing, created, failed, extra, and dropped indexes.
+        """
+
+        existing = {name : info for name, info in collection.index_information().items() if name != '_id_'}
+        report = {'missing' : [], 'created' : [], 'failed' : [], 'extra' : [], 'dropped' : []}
+
+        matched = set()
+        for index in declared:
+            name = next((name for name, info in existing.items() if index.matches(info)), None)
+            if name is not None:
+                matched.add(name)
+                continue
+
+            report['missing'].append(repr(index))
+            if create:
+                try:
+                    collection.create_indexes([index.to_model()])
+                    report['created'].append(repr(index))
+                except PyMongoError as error:
+                    report['failed'].append(f'{index!r}: {error}')
+
+        for name in existing:
+            if name in matched:
+                continue
+
+            report['extra'].append(name)
+            if drop_extra:
+                collection.drop_index(name)
+                report['dropped'].append(name)
+
+        return report
+
+
+    @staticmethod
+    def find_stage(plan: dict[str, ...] | list, stage: str) -> bool:
+        """
+        Check whether a query plan contains a specific stage.
+
+        Arguments:
+            plan: The query plan, or any part of an explain() output.
+            stage: The stage name, for example COLLSCAN.
+
+        Returns:
+            Whether the stage appears anywhere in the plan.
+        """
+
+        if isinstance(plan, dict):
+            if plan.get('stage') == stage:
+                return True
+            return any(IndexManager.find_stage(value, stage) for value in plan.values())
+
+        if isinstance(plan, list):
+            return any(IndexManager.find_stage(value, stage) for value in plan)
+
+        return False
+
+
+__all__ = ['Index', 'IndexManager']
@@ -1,10 +1,17 @@
 import sys
 import os
+import json
+import hashlib
 import subprocess
 from importlib import metadata
+from concurrent.futures import ThreadPoolExecutor
 from packaging import requirements
 
+import discord
+
 from utils.logging import Logger
+from .database import DB
+from .settings import Settings
 
 
 Logger = Logger()
@@ -13,33 +20,150 @@ Logger = Logger()
 class Installer:
     """ Class for installing python modules. """
 
-    def check_requirements(self) -> dict[str, str]:
+    REQUIREMENTS_FILE = 'requirements.txt'
+    CACHE_FILE = '.requirements_cache.json'
+    MAX_WORKERS = 8
+
+    _parsed: tuple[str, list[tuple[str, requirements.Requirement]]] = None
+
+
+    @staticmethod
+    def _hash_requirements(path: str) -> tuple[str, bytes]:
+        """ Helper function for reading the requirements file and hashing its contents. """
+
+        with open(path, 'rb') as file:
+            content = file.read()
+
+        return hashlib.sha256(content).hexdigest(), content
+
+
+    @staticmethod
+    def get_environment_fingerprint() -> str:
         """
-        Check the required modules.
+        Get a fingerprint of the installed distributions.
+
+        Installing, updating or removing a distribution changes the modification time of the directory it lives in,
+        so the fingerprint only needs the modification times of the directories on the module search path.
+        The bot's own directory and the working directory are left out, since files are created there all the time.
 
         Returns:
-             A dictionary with missing or outdated requirements.
+            The fingerprint.
         """
 
-        Logger.info('Installer', 'Checking requirements...')
+        excluded = {os.path.abspath(sys.path[0] or os.curdir), os.path.abspath(os.curdir)}
+
+        entries = []
+        for path in sys.path:
+            if os.path.abspath(path or os.curdir) in excluded:
+                continue
+
+            try:
+                entries.append(f'{path}:{os.stat(path).st_mtime_ns}')
+            except OSError:
+                continue
+
+        return hashlib.sha256('\n'.join(entries).encode()).hexdigest()
+
+
+    def parse_requirements(self, path: str = None) -> list[tuple[str, requirements.Requirement]]:
+        """
+        Parse the requirements file, reusing the result while the file doesn't change.
+
+        Arguments:
+            path: Path to the requirements file.
 
-        with open('requirements.txt', 'r') as file:
-            lines = file.readlines()
+        Returns:
+            The requirement lines and their parsed requirements.
+        """
+
+        path = path or self.REQUIREMENTS_FILE
+        file_hash, content = self._hash_requirements(path)
+        if self._parsed and self._parsed[0] == file_hash:
+            return self._parsed[1]
 
-        bad_reqs = {}
-        for line in lines:
+        reqs = []
+        for line in content.decode().splitlines():
             line = line.strip()
             if not line or line.startswith('#'):
                 continue
 
-            is_ok, req, info = self.check_module(line)
+            reqs.append((line, requirements.Requirement(line)))
 
-            if not is_ok:
-                bad_reqs[req.name] = info
-                Logger.info('Installer', f'Module {req.name} is {info}.')
+        Installer._parsed = (file_hash, reqs)
+        return reqs
+
+
+    def _is_cached(self, path: str) -> bool:
+        """ Helper function for checking whether the requirements were satisfied the last time nothing changed. """
+
+        try:
+            with open(self.CACHE_FILE, 'r') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        return cache == {
+            'requirements' : self._hash_requirements(path)[0],
+            'environment' : self.get_environment_fingerprint()
+        }
+
+
+    def _save_cache(self, path: str) -> None:
+        """ Helper function for remembering that the requirements are satisfied in the current environment. """
+
+        cache = {
+            'requirements' : self._hash_requirements(path)[0],
+            'environment' : self.get_environment_fingerprint()
+        }
 
+        try:
+            with open(self.CACHE_FILE, 'w') as file:
+                json.dump(cache, file)
+        except OSError as error:
+            Logger.warning('Installer', f'Failed to save the requirements cache: {error}')
+
+
+    def _check_all(self, path: str) -> list[tuple[str, requirements.Requirement, str]]:
+        """ Helper function for checking all requirements concurrently, returning the ones that aren't satisfied. """
+
+        lines = [line for line, _ in self.parse_requirements(path)]
+        with ThreadPoolExecutor(min(self.MAX_WORKERS, len(lines) or 1), thread_name_prefix = 'Installer') as executor:
+            results = list(executor.map(self.check_module, lines))
+
+        bad_reqs = []
+        for line, (is_ok, req, info) in zip(lines, results):
+            if is_ok:
+                Logger.info('Installer', f'Module {req.name} is up to date.')
             else:
-                Logger.info('Installer', f'Module {req.name} is already installed.')
+                Logger.info('Installer', f'Module {req.name} is {info}.')
+                bad_reqs.append((line, req, info))
+
+        return bad_reqs
+
+
+    def check_requirements(self, path: str = None, use_cache: bool = True) -> dict[str, str]:
+        """
+        Check the required modules.
+
+        Arguments:
+            path: Path to the requirements file.
+            use_cache: Whether to skip the check if neither the requirements nor the installed modules changed
+                       since the last time all requirements were satisfied.
+
+        Returns:
+             A dictionary with missing or outdated requirements.
+        """
+
+        path = path or self.REQUIREMENTS_FILE
+        Logger.info('Installer', 'Checking requirements...')
+
+        if use_cache and self._is_cached(path):
+            Logger.ok('Installer', 'Requirements unchanged since the last check.')
+            return {}
+
+        bad_reqs = {req.name : info for _, req, info in self._check_all(path)}
+        if not bad_reqs:
+            self._save_cache(path)
 
         Logger.ok('Installer', 'Finished checking requirements.')
         return bad_reqs
@@ -59,8 +183,6 @@ class Installer:
 
         req = requirements.Requirement(module)
         try:
-            metadata.distribution(req.name)
-
             installed_version = metadata.version(req.name)
             if req.specifier and not req.specifier.contains(installed_version):
                 return False, req, 'outdated'
@@ -71,6 +193,35 @@ class Installer:
         return True, req, 'OK'
 
 
+    @staticmethod
+    def install_modules(modules: list[str], upgrade: bool = False, wheelhouse: str = None,
+                        offline: bool = False) -> None:
+        """
+        Install or update python modules with a single pip command.
+
+        Arguments:
+             modules: The python modules being installed with optional version specifiers.
+             upgrade: Whether to upgrade modules that are already installed.
+             wheelhouse: Path to a directory of wheels to install from before looking online.
+             offline: Whether to install only from the wheelhouse, without looking online.
+        """
+
+        if not modules:
+            return
+
+        command = [sys.executable, '-m', 'pip', 'install', *modules]
+        if upgrade:
+            command.append('--upgrade')
+        if wheelhouse:
+            command += ['--find-links', wheelhouse]
+        if offline:
+            command.append('--no-index')
+
+        Logger.info('Installer', f'Installing modules {", ".join(modules)}...')
+        subprocess.check_call(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+        Logger.ok('Installer', f'Finished installing modules: {", ".join(modules)}.')
+
+
     @staticmethod
     def install_module(module: str) -> None:
         """
@@ -80,10 +231,7 @@ class Installer:
              module: The python module being installed with optional version specifiers.
         """
 
-        Logger.info('Installer', f'Installing module {module}...')
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', module],
-                              stdout = subprocess.PIPE, stderr = subprocess.PIPE)
-        Logger.ok('Installer', f'Finished installing module: {module}.')
+        Installer.install_modules([module])
 
 
     @staticmethod
@@ -95,47 +243,83 @@ class Installer:
              module: The python module being updated with optional version specifiers.
         """
 
-        Logger.info('Installer', f'Updating module {module}...')
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', module, '--upgrade'],
-                              stdout = subprocess.PIPE, stderr = subprocess.PIPE)
-        Logger.ok('Installer', f'Finished updating module: {module}.')
+        Installer.install_modules([module], upgrade = True)
+
 
+    def ensure_requirements(self, path: str = None, wheelhouse: str = None, offline: bool = False,
+                            use_cache: bool = True) -> None:
+        """
+        Check for and install any missing or outdated requirements.
 
-    def ensure_requirements(self) -> None:
-        """ Check for and install any missing or outdated requirements. """
+        Arguments:
+            path: Path to the requirements file.
+            wheelhouse: Path to a directory of wheels to install from before looking online.
+            offline: Whether to install only from the wheelhouse, without looking online.
+            use_cache: Whether to skip the check if neither the requirements nor the installed modules changed
+                       since the last time all requirements were satisfied.
+        """
 
+        path = path or self.REQUIREMENTS_FILE
         Logger.info('Installer', 'Checking requirements...')
 
-        with open('requirements.txt', 'r') as file:
-            lines = file.readlines()
+        if use_cache and self._is_cached(path):
+            Logger.ok('Installer', 'Requirements unchanged since the last check.')
+            return
 
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
+        bad_reqs = self._check_all(path)
+        self.install_modules(
+            [line for line, _, _ in bad_reqs], any(info == 'outdated' for _, _, info in bad_reqs), wheelhouse, offline
+        )
 
-            is_ok, req, info = self.check_module(line)
-            if is_ok:
-                Logger.info('Installer', f'Module {req.name} is up to date.')
-                continue
+        self._save_cache(path)
 
-            Logger.info('Installer', f'Module {req.name} is {info}.')
 
-            if info == 'missing':
-                self.install_module(line)
+    @staticmethod
+    def _hand_over() -> None:
+        """ Helper function for saving everything that is still queued, since exec skips the exit handlers. """
+
+        Settings().flush()
+        DB().flush()
+        Logger.close()
 
-            elif info == 'outdated':
-                self.update_module(line)
+        sys.stdout.flush()
+        sys.stderr.flush()
 
 
     @staticmethod
     def restart() -> None:
-        """ Restart the bot. """
+        """
+        Restart the bot by replacing the current process with a new one, started with the same arguments.
+
+        Queued log entries and database writes are saved first. Use restart_client() while the bot is connected,
+        or reload extensions with ExtensionManager.reload() to apply code changes without reconnecting.
+        On Windows, where exec can't replace the process, the new process runs as a child in the same console
+        and this one exits with its exit code once it stops.
+        """
 
         Logger.warning('Installer', 'Restarting...')
-        os.system('cls' if os.name == 'nt' else 'clear')
-        os.system('python main.py')
-        sys.exit(0)
+        Installer._hand_over()
+
+        if os.name == 'nt':
+            os.system('cls')
+            sys.exit(subprocess.run([sys.executable, *sys.argv]).returncode)
+
+        os.system('clear')
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+
+
+    @staticmethod
+    async def restart_client(client: discord.Client) -> None:
+        """
+        Close the connection to Discord cleanly, then restart the bot.
+
+        Arguments:
+            client: The Discord bot client.
+        """
+
+        await Logger.stop_reporter()
+        await client.close()
+        Installer.restart()
 
 
 __all__ = ['Installer']
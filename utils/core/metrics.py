@@ -0,0 +1,186 @@
+import math
+import time
+import threading
+import contextlib
+from typing import Callable, Iterator
+
+
+class LatencyHistogram:
+    """ Class for recording latencies in logarithmic buckets, which keeps memory constant no matter the call count. """
+
+    BASE = 1e-6
+    GROWTH = 2 ** 0.25
+    BUCKETS = 112
+
+
+    def __init__(self) -> None:
+        """ Create a new LatencyHistogram object. Percentiles are accurate to within about 10%. """
+
+        self.counts = [0] * self.BUCKETS
+        self.count, self.total, self.max = 0, 0.0, 0.0
+
+
+    def add(self, seconds: float) -> None:
+        """
+        Record a latency.
+
+        Arguments:
+            seconds: The latency in seconds.
+        """
+
+        index = 0 if seconds <= self.BASE else min(int(math.log(seconds / self.BASE, self.GROWTH)) + 1, self.BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimate a percentile of the recorded latencies.
+
+        Arguments:
+            percent: The percentile, from 0 to 100.
+
+        Returns:
+            The upper bound of the bucket holding the percentile in seconds, or 0 if nothing was recorded.
+        """
+
+        if not self.count:
+            return 0.0
+
+        target, seen = max(math.ceil(self.count * percent / 100), 1), 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.BASE * self.GROWTH ** index, self.max)
+
+        return self.max
+
+
+class OperationStats:
+    """ Class for the counters of one operation on one database collection. """
+
+    def __init__(self) -> None:
+        """ Create a new OperationStats object. """
+
+        self.calls, self.errors, self.documents, self.slow = 0, 0, 0, 0
+        self.latency = LatencyHistogram()
+
+
+    def to_dict(self) -> dict[str, int | float]:
+        """ Get the counters, with latencies in milliseconds. """
+
+        return {
+            'calls' : self.calls,
+            'errors' : self.errors,
+            'documents' : self.documents,
+            'slow' : self.slow,
+            'mean_ms' : round(self.latency.total / self.latency.count * 1000, 3) if self.latency.count else 0.0,
+            'p50_ms' : round(self.latency.percentile(50) * 1000, 3),
+            'p95_ms' : round(self.latency.percentile(95) * 1000, 3),
+            'p99_ms' : round(self.latency.percentile(99) * 1000, 3),
+            'max_ms' : round(self.latency.max * 1000, 3)
+        }
+
+
+class DBMetrics:
+    """ Class for collecting call counts, latencies, document counts and errors of database operations. """
+
+    def __init__(self, slow_threshold: float | None = 0.25,
+                 on_slow: Callable[[str, str, float, ...], None] = None) -> None:
+        """
+        Create a new DBMetrics object.
+
+        Arguments:
+            slow_threshold: The number of seconds after which a call counts as slow. Leave None to disable.
+            on_slow: A function called with the collection, operation, latency and query of each slow call.
+        """
+
+        self.slow_threshold, self.on_slow = slow_threshold, on_slow
+        self.started = time.time()
+
+        self._stats: dict[tuple[str, str], OperationStats] = {}
+        self._lock = threading.Lock()
+
+
+    @contextlib.contextmanager
+    def measure(self, collection: str, operation: str, query: ... = None) -> Iterator[dict[str, int]]:
+        """
+        Measure a call made inside the block.
+
+        The block can set the number of documents it returned or changed through the 'documents' key of
+        the yielded dictionary. Exceptions are counted as errors and raised again.
+
+        Arguments:
+            collection: Name of the database collection.
+            operation: Name of the operation.
+            query: The search query, passed on to the slow call function.
+        """
+
+        record = {'documents' : 0}
+        start, error = time.perf_counter(), False
+        try:
+            yield record
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.add(collection, operation, time.perf_counter() - start, record['documents'], error, query)
+
+
+    def add(self, collection: str, operation: str, seconds: float, documents: int = 0,
+            error: bool = False, query: ... = None) -> None:
+        """
+        Record a call.
+
+        Arguments:
+            collection: Name of the database collection.
+            operation: Name of the operation.
+            seconds: The latency of the call in seconds.
+            documents: The number of documents the call returned or changed.
+            error: Whether the call failed.
+            query: The search query, passed on to the slow call function.
+        """
+
+        is_slow = self.slow_threshold is not None and seconds >= self.slow_threshold
+
+        with self._lock:
+            stats = self._stats.get((collection, operation))
+            if stats is None:
+                stats = self._stats[(collection, operation)] = OperationStats()
+
+            stats.calls += 1
+            stats.errors += error
+            stats.documents += documents
+            stats.slow += is_slow
+            stats.latency.add(seconds)
+
+        if is_slow and self.on_slow:
+            self.on_slow(collection, operation, seconds, query)
+
+
+    def snapshot(self, reset: bool = False) -> dict[str, ...]:
+        """
+        Get the counters of every measured operation.
+
+        Arguments:
+            reset: Whether to start counting from zero afterwards.
+
+        Returns:
+            The time counting started and the counters of each operation, grouped by collection.
+        """
+
+        with self._lock:
+            stats, started = self._stats, self.started
+            if reset:
+                self._stats, self.started = {}, time.time()
+
+            collections = {}
+            for (collection, operation), operation_stats in sorted(stats.items()):
+                collections.setdefault(collection, {})[operation] = operation_stats.to_dict()
+
+        return {'since' : started, 'collections' : collections}
+
+
+__all__ = ['DBMetrics', 'OperationStats', 'LatencyHistogram']
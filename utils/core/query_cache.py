@@ -0,0 +1,155 @@
+import copy
+import time
+import threading
+from typing import Callable
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import bson
+from bson.errors import InvalidDocument
+
+
+class QueryCache:
+    """ Class for caching query results of a database collection. """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024) -> None:
+        """
+        Create a new QueryCache object.
+
+        Arguments:
+            ttl: The number of seconds a result stays valid.
+            max_entries: The maximum number of cached results, the least recently used ones are evicted first.
+        """
+
+        self.ttl, self.max_entries = ttl, max_entries
+        self.hits, self.misses, self.evictions, self.coalesced, self.invalidations = 0, 0, 0, 0, 0
+
+        self._entries: OrderedDict[bytes, tuple[float, ...]] = OrderedDict()
+        self._in_flight: dict[bytes, Future] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def _normalise(value: ..., top_level: bool = False) -> ...:
+        """ Helper function for sorting the keys of top level and operator dictionaries, whose order is irrelevant. """
+
+        if isinstance(value, dict):
+            items = value.items()
+            if top_level or (value and all(isinstance(key, str) and key.startswith('$') for key in value)):
+                items = sorted(items, key = lambda item: item[0])
+            return {key : QueryCache._normalise(item) for key, item in items}
+
+        if isinstance(value, (list, tuple)):
+            return [QueryCache._normalise(item) for item in value]
+
+        return value
+
+
+    @staticmethod
+    def make_key(*parts) -> bytes | None:
+        """
+        Create a cache key from a query and its options.
+
+        The keys of each part and of operator dictionaries like {'$gte' : 1, '$lt' : 5} are sorted.
+        Embedded documents keep their key order, since MongoDB compares them field by field in order.
+        The parts are BSON encoded, so values of different types, such as an ObjectId and its string, never match.
+
+        Arguments:
+            parts: The query and its options.
+
+        Returns:
+            The cache key, or None if the parts can't be encoded.
+        """
+
+        try:
+            return bson.encode({'parts' : [QueryCache._normalise(part, top_level = True) for part in parts]})
+        except (InvalidDocument, TypeError):
+            return None
+
+
+    def get(self, key: bytes, loader: Callable[[], ...]) -> ...:
+        """
+        Get a cached result, loading it on a miss.
+
+        Concurrent misses for the same key wait for a single load instead of running their own.
+
+        Arguments:
+            key: The cache key.
+            loader: A function that runs the query.
+
+        Returns:
+            A copy of the result.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+
+                del self._entries[key]
+                self.evictions += 1
+
+            future = self._in_flight.get(key)
+            is_loader = future is None
+            if is_loader:
+                self.misses += 1
+                future = self._in_flight[key] = Future()
+                generation = self._generation
+            else:
+                self.coalesced += 1
+
+        if not is_loader:
+            return copy.deepcopy(future.result())
+
+        try:
+            value = loader()
+        except BaseException as error:
+            with self._lock:
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last = False)
+                    self.evictions += 1
+
+        future.set_result(value)
+        return copy.deepcopy(value)
+
+
+    def invalidate(self) -> None:
+        """ Discard all cached results, including results of queries that are still running. """
+
+        with self._lock:
+            self._entries.clear()
+            self._in_flight.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+
+    def get_stats(self) -> dict[str, int]:
+        """ Get the cache counters and the current number of cached results. """
+
+        return {
+            'hits' : self.hits,
+            'misses' : self.misses,
+            'evictions' : self.evictions,
+            'coalesced' : self.coalesced,
+            'invalidations' : self.invalidations,
+            'size' : len(self._entries)
+        }
+
+
+__all__ = ['QueryCache']
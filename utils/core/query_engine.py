@@ -0,0 +1,477 @@
+import re
+import copy
+import datetime
+
+from bson import ObjectId
+
+
+MISSING = object()
+
+
+class QueryEngine:
+    """ Class for evaluating MongoDB queries, updates, and projections on plain documents. """
+
+    REGEX_FLAGS = {'i' : re.IGNORECASE, 'm' : re.MULTILINE, 's' : re.DOTALL, 'x' : re.VERBOSE}
+
+
+    @staticmethod
+    def resolve(document: dict[str, ...], path: str) -> list:
+        """
+        Get all values at a dotted path, descending into arrays of subdocuments.
+
+        Arguments:
+            document: The document.
+            path: The dotted field path.
+
+        Returns:
+            The values found, empty if the path doesn't exist.
+        """
+
+        values = [document]
+        for part in path.split('.'):
+            found = []
+            for value in values:
+                if isinstance(value, dict):
+                    if part in value:
+                        found.append(value[part])
+                elif isinstance(value, list):
+                    if part.isdigit():
+                        if int(part) < len(value):
+                            found.append(value[int(part)])
+                    else:
+                        found.extend(item[part] for item in value if isinstance(item, dict) and part in item)
+            values = found
+
+        return values
+
+
+    @staticmethod
+    def _expand(values: list) -> list:
+        """ Helper function for including array elements along with the arrays themselves. """
+
+        expanded = []
+        for value in values:
+            expanded.append(value)
+            if isinstance(value, list):
+                expanded.extend(value)
+
+        return expanded
+
+
+    @staticmethod
+    def equals(a: ..., b: ...) -> bool:
+        """ Check whether two values are equal, without treating booleans as numbers. """
+
+        if isinstance(a, bool) != isinstance(b, bool):
+            return False
+
+        return a == b
+
+
+    @staticmethod
+    def order_key(value: ...) -> tuple:
+        """
+        Get a key for ordering values of any type the way MongoDB does.
+
+        Arguments:
+            value: The value.
+
+        Returns:
+            A tuple of the type's rank and a comparable form of the value.
+        """
+
+        if value is None or value is MISSING:
+            return 1, 0
+        if isinstance(value, bool):
+            return 8, int(value)
+        if isinstance(value, (int, float)):
+            return 2, value
+        if isinstance(value, str):
+            return 3, value
+        if isinstance(value, dict):
+            return 4, repr(value)
+        if isinstance(value, list):
+            return 5, repr(value)
+        if isinstance(value, bytes):
+            return 6, value
+        if isinstance(value, ObjectId):
+            return 7, value.binary
+        if isinstance(value, datetime.datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo = datetime.timezone.utc)
+            return 9, value.timestamp()
+
+        return 10, repr(value)
+
+
+    @staticmethod
+    def _compare(value: ..., operator: str, target: ...) -> bool:
+        """ Helper function for comparing two values of the same type class. """
+
+        value_key, target_key = QueryEngine.order_key(value), QueryEngine.order_key(target)
+        if value_key[0] != target_key[0] or value_key[0] in (4, 5, 10):
+            return False
+
+        match operator:
+            case '$gt':
+                return value_key > target_key
+            case '$gte':
+                return value_key >= target_key
+            case '$lt':
+                return value_key < target_key
+            case _:
+                return value_key <= target_key
+
+
+    @staticmethod
+    def _match_equal(values: list, target: ...) -> bool:
+        """ Helper function for matching values against an equality condition. """
+
+        if target is None:
+            return not values or any(value is None for value in values)
+
+        if isinstance(target, re.Pattern):
+            return any(isinstance(value, str) and target.search(value) for value in QueryEngine._expand(values))
+
+        return any(QueryEngine.equals(value, target) for value in QueryEngine._expand(values))
+
+
+    @staticmethod
+    def _match_element(element: ..., condition: dict[str, ...]) -> bool:
+        """ Helper function for the $elemMatch operator. """
+
+        if all(key.startswith('$') for key in condition):
+            return QueryEngine._match_operators([element], condition)
+
+        return isinstance(element, dict) and QueryEngine.match(element, condition)
+
+
+    @staticmethod
+    def _match_operators(values: list, condition: dict[str, ...]) -> bool:
+        """ Helper function for matching values against a dictionary of query operators. """
+
+        for operator, argument in condition.items():
+            match operator:
+                case '$eq':
+                    is_ok = QueryEngine._match_equal(values, argument)
+                case '$ne':
+                    is_ok = not QueryEngine._match_equal(values, argument)
+                case '$gt' | '$gte' | '$lt' | '$lte':
+                    is_ok = any(
+                        QueryEngine._compare(value, operator, argument) for value in QueryEngine._expand(values)
+                    )
+                case '$in':
+                    is_ok = any(QueryEngine._match_equal(values, item) for item in argument)
+                case '$nin':
+                    is_ok = not any(QueryEngine._match_equal(values, item) for item in argument)
+                case '$exists':
+                    is_ok = bool(values) == bool(argument)
+                case '$size':
+                    is_ok = any(isinstance(value, list) and len(value) == argument for value in values)
+                case '$all':
+                    is_ok = any(
+                        isinstance(value, list) and all(
+                            any(QueryEngine.equals(item, wanted) for item in value) for wanted in argument
+                        ) for value in values
+                    )
+                case '$elemMatch':
+                    is_ok = any(
+                        isinstance(value, list) and any(QueryEngine._match_element(item, argument) for item in value)
+                        for value in values
+                    )
+                case '$regex':
+                    flags = 0
+                    for option in condition.get('$options', ''):
+                        flags |= QueryEngine.REGEX_FLAGS.get(option, 0)
+                    pattern = re.compile(argument, flags) if isinstance(argument, str) else argument
+                    is_ok = QueryEngine._match_equal(values, pattern)
+                case '$options':
+                    continue
+                case '$not':
+                    if isinstance(argument, dict):
+                        is_ok = not QueryEngine._match_operators(values, argument)
+                    else:
+                        is_ok = not QueryEngine._match_equal(values, argument)
+                case '$mod':
+                    divisor, remainder = argument
+                    is_ok = any(
+                        isinstance(value, (int, float)) and not isinstance(value, bool) and value % divisor == remainder
+                        for value in QueryEngine._expand(values)
+                    )
+                case _:
+                    raise ValueError(f'Unsupported query operator: {operator}')
+
+            if not is_ok:
+                return False
+
+        return True
+
+
+    @staticmethod
+    def match(document: dict[str, ...], query: dict[str, ...]) -> bool:
+        """
+        Check whether a document matches a query.
+
+        Arguments:
+            document: The document.
+            query: The search query.
+
+        Returns:
+            Whether the document matches.
+        """
+
+        for key, condition in query.items():
+            match key:
+                case '$and':
+                    is_ok = all(QueryEngine.match(document, subquery) for subquery in condition)
+                case '$or':
+                    is_ok = any(QueryEngine.match(document, subquery) for subquery in condition)
+                case '$nor':
+                    is_ok = not any(QueryEngine.match(document, subquery) for subquery in condition)
+                case _ if key.startswith('$'):
+                    raise ValueError(f'Unsupported query operator: {key}')
+                case _:
+                    values = QueryEngine.resolve(document, key)
+                    if isinstance(condition, dict) and condition and all(name.startswith('$') for name in condition):
+                        is_ok = QueryEngine._match_operators(values, condition)
+                    else:
+                        is_ok = QueryEngine._match_equal(values, condition)
+
+            if not is_ok:
+                return False
+
+        return True
+
+
+    @staticmethod
+    def get(document: dict[str, ...], path: str) -> ...:
+        """ Get the value at a dotted path without descending into arrays, or MISSING if it doesn't exist. """
+
+        value = document
+        for part in path.split('.'):
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+            elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            else:
+                return MISSING
+
+        return value
+
+
+    @staticmethod
+    def set(document: dict[str, ...], path: str, value: ...) -> None:
+        """ Set the value at a dotted path, creating subdocuments along the way. """
+
+        *parents, last = path.split('.')
+        target = document
+        for part in parents:
+            if isinstance(target, list) and part.isdigit():
+                target = target[int(part)]
+            else:
+                target = target.setdefault(part, {})
+
+        if isinstance(target, list) and last.isdigit():
+            index = int(last)
+            target.extend([None] * (index + 1 - len(target)))
+            target[index] = value
+        elif isinstance(target, dict):
+            target[last] = value
+        else:
+            raise ValueError(f'Cannot create field {last!r} in element {target!r}')
+
+
+    @staticmethod
+    def unset(document: dict[str, ...], path: str) -> None:
+        """ Remove the value at a dotted path if it exists. """
+
+        *parents, last = path.split('.')
+        parent = QueryEngine.get(document, '.'.join(parents)) if parents else document
+        if isinstance(parent, dict):
+            parent.pop(last, None)
+        elif isinstance(parent, list) and last.isdigit() and int(last) < len(parent):
+            parent[int(last)] = None
+
+
+    @staticmethod
+    def _number(value: ..., path: str, operator: str) -> int | float:
+        """ Helper function for validating the operands of arithmetic update operators. """
+
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f'Cannot apply {operator} to a non-numeric value at {path!r}')
+
+        return value
+
+
+    @staticmethod
+    def _array(document: dict[str, ...], path: str, operator: str) -> list:
+        """ Helper function for getting or creating the array targeted by an array update operator. """
+
+        current = QueryEngine.get(document, path)
+        if current is MISSING:
+            current = []
+            QueryEngine.set(document, path, current)
+        elif not isinstance(current, list):
+            raise ValueError(f'Cannot apply {operator} to a non-array value at {path!r}')
+
+        return current
+
+
+    @staticmethod
+    def update(document: dict[str, ...], updates: dict[str, dict[str, ...]], is_insert: bool = False) -> None:
+        """
+        Apply update operators onto a document in place.
+
+        Arguments:
+            document: The document.
+            updates: Update modifications to apply onto the document.
+            is_insert: Whether the document is being inserted by an upsert, which enables $setOnInsert.
+        """
+
+        QueryEngine.validate_update(updates)
+
+        for operator, fields in updates.items():
+            for path, value in fields.items():
+                current = QueryEngine.get(document, path)
+                match operator:
+                    case '$set':
+                        QueryEngine.set(document, path, copy.deepcopy(value))
+                    case '$setOnInsert':
+                        if is_insert:
+                            QueryEngine.set(document, path, copy.deepcopy(value))
+                    case '$unset':
+                        QueryEngine.unset(document, path)
+                    case '$inc' | '$mul':
+                        amount = QueryEngine._number(value, path, operator)
+                        base = 0 if current is MISSING else QueryEngine._number(current, path, operator)
+                        QueryEngine.set(document, path, base + amount if operator == '$inc' else base * amount)
+                    case '$min' | '$max':
+                        if current is MISSING or QueryEngine._compare(value, '$lt' if operator == '$min' else '$gt', current):
+                            QueryEngine.set(document, path, copy.deepcopy(value))
+                    case '$push' | '$addToSet':
+                        array = QueryEngine._array(document, path, operator)
+                        items = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                        for item in items:
+                            if operator == '$push' or not any(QueryEngine.equals(item, other) for other in array):
+                                array.append(copy.deepcopy(item))
+                    case '$pull':
+                        array = QueryEngine._array(document, path, operator)
+                        if isinstance(value, dict):
+                            array[:] = [item for item in array if not QueryEngine._match_element(item, value)]
+                        else:
+                            array[:] = [item for item in array if not QueryEngine.equals(item, value)]
+                    case '$pop':
+                        array = QueryEngine._array(document, path, operator)
+                        if array:
+                            array.pop(0 if value == -1 else -1)
+                    case '$rename':
+                        if current is not MISSING:
+                            QueryEngine.unset(document, path)
+                            QueryEngine.set(document, value, current)
+                    case '$currentDate':
+                        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo = None)
+                        QueryEngine.set(document, path, now)
+                    case _:
+                        raise ValueError(f'Unsupported update operator: {operator}')
+
+
+    @staticmethod
+    def validate_update(updates: dict[str, dict[str, ...]]) -> None:
+        """ Check that an update only consists of update operators, like pymongo does. """
+
+        if not updates:
+            raise ValueError('update cannot be empty')
+
+        if not all(operator.startswith('$') for operator in updates):
+            raise ValueError('update only works with $ operators')
+
+
+    @staticmethod
+    def seed(query: dict[str, ...]) -> dict[str, ...]:
+        """
+        Create the base of a document inserted by an upsert from the equality conditions of a query.
+
+        Arguments:
+            query: The search query.
+
+        Returns:
+            A new document.
+        """
+
+        document = {}
+        for key, condition in query.items():
+            if key == '$and':
+                for subquery in condition:
+                    for path, value in QueryEngine.seed(subquery).items():
+                        document[path] = value
+            elif key.startswith('$'):
+                continue
+            elif isinstance(condition, dict) and condition and all(name.startswith('$') for name in condition):
+                if '$eq' in condition:
+                    QueryEngine.set(document, key, copy.deepcopy(condition['$eq']))
+            else:
+                QueryEngine.set(document, key, copy.deepcopy(condition))
+
+        return document
+
+
+    @staticmethod
+    def project(document: dict[str, ...], projection: dict[str, ...] | list[str] | None) -> dict[str, ...]:
+        """
+        Apply a projection onto a document.
+
+        Arguments:
+            document: The document, which may be modified if no projection is given.
+            projection: The fields to include or exclude.
+
+        Returns:
+            The projected document.
+        """
+
+        if projection is None:
+            return document
+
+        if isinstance(projection, (list, tuple)):
+            projection = {field : 1 for field in projection}
+
+        fields = {field : enabled for field, enabled in projection.items() if field != '_id'}
+        include_id = projection.get('_id', True)
+
+        if fields and all(fields.values()):
+            result = {'_id' : document['_id']} if include_id and '_id' in document else {}
+            for path in fields:
+                value = QueryEngine.get(document, path)
+                if value is not MISSING:
+                    QueryEngine.set(result, path, value)
+            return result
+
+        for path, enabled in fields.items():
+            if not enabled:
+                QueryEngine.unset(document, path)
+        if not include_id:
+            document.pop('_id', None)
+
+        return document
+
+
+    @staticmethod
+    def sort(documents: list[dict[str, ...]], spec: list[tuple[str, int]]) -> None:
+        """
+        Sort documents in place by a sort specification.
+
+        Arguments:
+            documents: The documents.
+            spec: A list of (field name, direction) pairs.
+        """
+
+        for path, direction in reversed(spec):
+            def key(document: dict[str, ...]) -> tuple:
+                values = QueryEngine._expand(QueryEngine.resolve(document, path))
+                values = [value for value in values if not isinstance(value, list)] or values or [MISSING]
+                keys = [QueryEngine.order_key(value) for value in values]
+                return min(keys) if direction > 0 else max(keys)
+
+            documents.sort(key = key, reverse = direction < 0)
+
+
+__all__ = ['QueryEngine', 'MISSING']
@@ -0,0 +1,107 @@
+import time
+import random
+import itertools
+from typing import Callable
+
+from pymongo.errors import PyMongoError, ConnectionFailure
+
+
+class RetryPolicy:
+    """ Class for retrying idempotent database calls that fail because of transient errors. """
+
+    IDEMPOTENT_UPDATES = ('$set', '$unset', '$setOnInsert', '$min', '$max', '$addToSet', '$pull')
+
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0) -> None:
+        """
+        Create a new RetryPolicy object.
+
+        Waiting times grow exponentially with each attempt and are randomised between 0 and their maximum,
+        so that clients which failed together don't retry together.
+
+        Arguments:
+            attempts: The maximum number of attempts, including the first one. 1 disables retrying.
+            base_delay: The maximum number of seconds to wait before the first retry.
+            max_delay: The maximum number of seconds to wait before any retry.
+        """
+
+        self.attempts, self.base_delay, self.max_delay = attempts, base_delay, max_delay
+        self.retries = 0
+
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """
+        Check whether an error is transient.
+
+        Arguments:
+            error: The error.
+
+        Returns:
+            Whether the error is a network error, a failed server selection, or labelled retryable by the server.
+        """
+
+        if isinstance(error, ConnectionFailure):
+            return True
+
+        return isinstance(error, PyMongoError) and (
+            error.has_error_label('RetryableWriteError') or error.has_error_label('RetryableReadError')
+        )
+
+
+    @staticmethod
+    def is_idempotent_update(updates: dict[str, dict[str, ...]]) -> bool:
+        """
+        Check whether applying an update twice has the same effect as applying it once.
+
+        Arguments:
+            updates: Update modifications to apply onto the documents.
+
+        Returns:
+            Whether the update only uses idempotent operators.
+        """
+
+        return all(operator in RetryPolicy.IDEMPOTENT_UPDATES for operator in updates)
+
+
+    def get_delay(self, attempt: int) -> float:
+        """
+        Get a random waiting time before a retry.
+
+        Arguments:
+            attempt: The number of the failed attempt, starting from 1.
+
+        Returns:
+            The number of seconds to wait.
+        """
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+    def run(self, func: Callable[[], ...], on_retry: Callable[[int, float, Exception], None] = None) -> ...:
+        """
+        Call a function, retrying it after transient errors.
+
+        Arguments:
+            func: The function to call. It must be safe to call more than once.
+            on_retry: A function called with the attempt number, waiting time and error before each retry.
+
+        Returns:
+            The result of the function.
+        """
+
+        for attempt in itertools.count(1):
+            try:
+                return func()
+            except PyMongoError as error:
+                if attempt >= self.attempts or not self.is_retryable(error):
+                    raise
+
+                delay = self.get_delay(attempt)
+                self.retries += 1
+                if on_retry:
+                    on_retry(attempt, delay, error)
+                time.sleep(delay)
+
+
+__all__ = ['RetryPolicy']
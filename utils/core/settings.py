@@ -0,0 +1,202 @@
+import copy
+import threading
+from uuid import getnode as get_mac_address
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from .bot import Bot
+from .database import DB
+
+
+class Settings:
+    """ Singleton class for device and guild settings, kept in memory and written through to the database. """
+
+    _instance = None
+    devices: dict[str, dict[str, ...]] = {}
+    guilds: dict[int, dict[str, ...]] = {}
+    loaded: bool = False
+    mac_address: str = None
+    _lock = threading.RLock()
+    _executor: ThreadPoolExecutor = None
+
+
+    def __new__(cls) -> 'Settings':
+        """ Create a new instance of the Settings class if it doesn't already exist. """
+
+        if cls._instance is None:
+            cls._instance = super(Settings, cls).__new__(cls)
+
+        return cls._instance
+
+
+    def load(self) -> None:
+        """
+        Load all device and guild settings into memory, replacing the ones already loaded.
+
+        Called by DB.setup(), or on first use if that wasn't possible. Call it again to pick up changes
+        made outside this process.
+        """
+
+        devices = DB().find('devices', {}, True)
+        guilds = DB().find('guilds', {}, True)
+
+        with self._lock:
+            self.devices = {device['mac_address'] : device for device in devices if 'mac_address' in device}
+            self.guilds = {guild['_id'] : guild for guild in guilds}
+            self.loaded = True
+
+
+    def _ensure_loaded(self) -> None:
+        """ Helper function for loading the settings the first time they are needed. """
+
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+
+
+    def _write(self, collection: str, query: dict[str, ...], updates: dict[str, dict[str, ...]]) -> Future:
+        """ Helper function for saving a change in the background, in the same order the changes were made. """
+
+        if self._executor is None:
+            Settings._executor = ThreadPoolExecutor(1, thread_name_prefix = 'Settings')
+
+        future = self._executor.submit(DB().update, collection, query, updates, upsert = True)
+        future.add_done_callback(lambda done: self._on_write(collection, done))
+
+        return future
+
+
+    @staticmethod
+    def _on_write(collection: str, future: Future) -> None:
+        """ Helper function for logging failed writes. """
+
+        error = future.exception()
+        if error:
+            DB()._get_logger().error('Settings', f'Failed to save {collection} settings: {error}')
+
+
+    def get_mac_address(self) -> str:
+        """ Get the MAC address of the current device, computed once per process. """
+
+        if self.mac_address is None:
+            Settings.mac_address = ':'.join(('%012X' % get_mac_address())[i:i + 2] for i in range(0, 12, 2))
+
+        return self.mac_address
+
+
+    def get_location(self, auto: bool = False) -> dict[str, str]:
+        """
+        Get information about the current hosting location of the bot.
+
+        Arguments:
+            auto: Whether to use the hosting location saved for this device instead of the configured one.
+
+        Returns:
+            A dictionary containing hosting location information.
+        """
+
+        self._ensure_loaded()
+        mac_address = self.get_mac_address()
+
+        with self._lock:
+            device = self.devices.get(mac_address)
+            if auto and device:
+                return dict(device)
+
+            host = Bot().location if Bot().location else 'unknown'
+            if device is None or device.get('host') != host:
+                self.devices[mac_address] = {**(device or {}), 'mac_address' : mac_address, 'host' : host}
+                self._write('devices', {'mac_address' : mac_address}, {'$set' : {'host' : host}})
+
+        return {'mac_address' : mac_address, 'host' : host}
+
+
+    def get_guild(self, guild_id: int) -> dict[str, ...]:
+        """
+        Get all settings of a guild.
+
+        Arguments:
+            guild_id: ID of the guild.
+
+        Returns:
+            A copy of the guild's settings, empty if it has none.
+        """
+
+        self._ensure_loaded()
+
+        with self._lock:
+            return copy.deepcopy(self.guilds.get(guild_id, {}))
+
+
+    def get(self, guild_id: int, key: str, default: ... = None) -> ...:
+        """
+        Get a setting of a guild.
+
+        Arguments:
+            guild_id: ID of the guild.
+            key: Name of the setting, for example prefix, timezone or toggles.
+            default: The value to return if the setting isn't set.
+
+        Returns:
+            The value of the setting.
+        """
+
+        self._ensure_loaded()
+
+        guild = self.guilds.get(guild_id)
+        return guild.get(key, default) if guild else default
+
+
+    def set(self, guild_id: int, key: str, value: ...) -> Future:
+        """
+        Change a setting of a guild. The change is visible right away and saved in the background.
+
+        Arguments:
+            guild_id: ID of the guild.
+            key: Name of the setting.
+            value: The new value.
+
+        Returns:
+            A future resolved with the result of saving the change.
+        """
+
+        self._ensure_loaded()
+
+        with self._lock:
+            self.guilds.setdefault(guild_id, {'_id' : guild_id})[key] = copy.deepcopy(value)
+            return self._write('guilds', {'_id' : guild_id}, {'$set' : {key : value}})
+
+
+    def unset(self, guild_id: int, key: str) -> Future:
+        """
+        Remove a setting of a guild. The change is visible right away and saved in the background.
+
+        Arguments:
+            guild_id: ID of the guild.
+            key: Name of the setting.
+
+        Returns:
+            A future resolved with the result of saving the change.
+        """
+
+        self._ensure_loaded()
+
+        with self._lock:
+            self.guilds.get(guild_id, {}).pop(key, None)
+            return self._write('guilds', {'_id' : guild_id}, {'$unset' : {key : ''}})
+
+
+    def flush(self) -> None:
+        """ Wait until all changes are saved. Changes made afterwards start a new background writer. """
+
+        with self._lock:
+            executor, Settings._executor = self._executor, None
+
+        if executor:
+            executor.shutdown(wait = True)
+
+
+DB().declare_index('devices', 'mac_address', unique = True)
+
+
+__all__ = ['Settings']
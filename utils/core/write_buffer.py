@@ -0,0 +1,245 @@
+import threading
+from typing import Callable
+from concurrent.futures import Future
+
+import bson
+from bson.errors import InvalidDocument
+from pymongo.collection import Collection
+from pymongo.operations import InsertOne, UpdateOne, UpdateMany
+from pymongo.results import BulkWriteResult
+from pymongo.errors import BulkWriteError, WriteError
+
+
+class WriteBuffer:
+    """ Class for queueing writes to a database collection and sending them in bulk. """
+
+    MERGEABLE = ('$inc', '$set')
+
+
+    def __init__(self, collection: Collection, max_operations: int = 500, interval: float = 1.0,
+                 on_flush: Callable[[list[tuple[dict[str, ...], Exception]]], None] = None) -> None:
+        """
+        Create a new WriteBuffer object and start its timer.
+
+        Arguments:
+            collection: The database collection.
+            max_operations: The number of queued operations that triggers a flush.
+            interval: The maximum number of seconds an operation waits before being sent.
+            on_flush: A function called after each flush with the failed operations and their errors.
+        """
+
+        self.collection, self.max_operations, self.interval, self.on_flush = \
+            collection, max_operations, interval, on_flush
+        self.queued, self.merged, self.flushes = 0, 0, 0
+
+        self._operations: list[dict[str, ...]] = []
+        self._mergeable: dict[bytes, dict[str, ...]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(target = self._run, name = f'WriteBuffer-{collection.name}', daemon = True)
+        self._thread.start()
+
+
+    def insert(self, documents: list[dict[str, ...]]) -> Future:
+        """
+        Queue documents for insertion.
+
+        Arguments:
+            documents: The documents to insert.
+
+        Returns:
+            A future resolved with the bulk write result once the documents are sent.
+        """
+
+        future = Future()
+        with self._lock:
+            for document in documents:
+                self._operations.append({'type' : 'insert', 'document' : document, 'futures' : [future]})
+            self._queued(len(documents))
+
+        return future
+
+
+    def update(self, query: dict[str, ...], updates: dict[str, dict[str, ...]],
+               update_many: bool = False, upsert: bool = False) -> Future:
+        """
+        Queue an update, merging it into a queued update of the same document where possible.
+
+        Only single document updates using $inc and $set are merged.
+
+        Arguments:
+            query: The search query.
+            updates: Update modifications to apply onto the documents.
+            update_many: Whether to update all documents that satisfy the query or just the first one.
+            upsert: Whether to insert a new document if the search fails.
+
+        Returns:
+            A future resolved with the bulk write result once the update is sent.
+        """
+
+        future = Future()
+        mergeable = not update_many and updates and all(operator in self.MERGEABLE for operator in updates)
+        key = self._make_key(query, upsert) if mergeable else None
+
+        with self._lock:
+            pending = self._mergeable.get(key) if key else None
+            if pending and self._merge(pending['updates'], updates):
+                pending['futures'].append(future)
+                self.merged += 1
+                return future
+
+            operation = {
+                'type' : 'update', 'query' : query, 'updates' : {op : dict(fields) for op, fields in updates.items()},
+                'many' : update_many, 'upsert' : upsert, 'futures' : [future]
+            }
+            self._operations.append(operation)
+            if key:
+                self._mergeable[key] = operation
+            self._queued(1)
+
+        return future
+
+
+    @staticmethod
+    def _make_key(query: dict[str, ...], upsert: bool) -> bytes | None:
+        """ Helper function for a merge key that keeps value types apart, or None if the query can't be encoded. """
+
+        try:
+            return bson.encode({'query' : query, 'upsert' : upsert})
+        except (InvalidDocument, TypeError):
+            return None
+
+
+    @staticmethod
+    def _merge(target: dict[str, dict[str, ...]], updates: dict[str, dict[str, ...]]) -> bool:
+        """ Helper function for merging $inc and $set updates. Returns whether the merge was possible. """
+
+        target_set, target_inc = target.get('$set', {}), target.get('$inc', {})
+        fields = set(target_set) | set(target_inc)
+
+        for new_fields in updates.values():
+            for field in new_fields:
+                for other in fields:
+                    if field != other and (field.startswith(f'{other}.') or other.startswith(f'{field}.')):
+                        return False
+
+        for field in updates.get('$inc', {}):
+            if field in target_set and not isinstance(target_set[field], (int, float)):
+                return False
+
+        for field, value in updates.get('$inc', {}).items():
+            if field in target_set:
+                target_set[field] += value
+            else:
+                target_inc[field] = target_inc.get(field, 0) + value
+
+        for field, value in updates.get('$set', {}).items():
+            target_set[field] = value
+            target_inc.pop(field, None)
+
+        for operator, merged in (('$set', target_set), ('$inc', target_inc)):
+            if merged:
+                target[operator] = merged
+            else:
+                target.pop(operator, None)
+
+        return True
+
+
+    def _queued(self, count: int) -> None:
+        """ Helper function for counting queued operations. Must be called while holding the lock. """
+
+        self.queued += count
+        if len(self._operations) >= self.max_operations:
+            self._wakeup.set()
+
+
+    def _run(self) -> None:
+        """ Flush queued operations on a timer or whenever the buffer fills up. """
+
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The futures are resolved by flush() itself, so a failing callback must not stop the timer.
+                continue
+
+
+    def flush(self) -> list[tuple[dict[str, ...], Exception]]:
+        """
+        Send all queued operations as one unordered bulk write.
+
+        Returns:
+            The failed operations and their errors.
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                operations, self._operations, self._mergeable = self._operations, [], {}
+
+            if not operations:
+                return []
+
+            failed, result = [], None
+            try:
+                requests = []
+                for operation in operations:
+                    if operation['type'] == 'insert':
+                        requests.append(InsertOne(operation['document']))
+                        continue
+
+                    update = UpdateMany if operation['many'] else UpdateOne
+                    requests.append(update(operation['query'], operation['updates'], upsert = operation['upsert']))
+
+                result = self.collection.bulk_write(requests, ordered = False)
+            except BulkWriteError as error:
+                result = BulkWriteResult(error.details, True)
+                for write_error in error.details.get('writeErrors', []):
+                    operation = operations[write_error['index']]
+                    failed.append((operation, WriteError(write_error['errmsg'], write_error['code'], write_error)))
+            except Exception as error:
+                failed = [(operation, error) for operation in operations]
+
+            self.flushes += 1
+            errors = {id(operation) : error for operation, error in failed}
+            outcomes: dict[Future, Exception | None] = {}
+            for operation in operations:
+                for future in operation['futures']:
+                    if id(operation) in errors:
+                        outcomes[future] = errors[id(operation)]
+                    else:
+                        outcomes.setdefault(future, None)
+
+            for future, error in outcomes.items():
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+            if self.on_flush:
+                self.on_flush(failed)
+
+            return failed
+
+
+    def close(self) -> list[tuple[dict[str, ...], Exception]]:
+        """
+        Stop the timer and send all queued operations.
+
+        Returns:
+            The failed operations and their errors.
+        """
+
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+
+        return self.flush()
+
+
+__all__ = ['WriteBuffer']
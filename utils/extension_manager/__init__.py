@@ -0,0 +1 @@
+from .extension_manager import *
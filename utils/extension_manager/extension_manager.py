@@ -0,0 +1,175 @@
+import os
+import time
+import importlib
+import importlib.util
+
+from discord.ext import commands
+
+from utils.core import Bot
+from utils.logging import Logger
+
+
+Bot = Bot()
+Logger = Logger()
+
+
+class ExtensionManager:
+    """ Singleton class for loading extensions and reloading the changed ones without reconnecting to Discord. """
+
+    _instance = None
+    extensions: dict[str, int] = {}
+
+
+    def __new__(cls) -> 'ExtensionManager':
+        """ Create a new instance of the ExtensionManager class if it doesn't already exist. """
+
+        if cls._instance is None:
+            cls._instance = super(ExtensionManager, cls).__new__(cls)
+
+        return cls._instance
+
+
+    @staticmethod
+    def _get_mtime(name: str) -> int | None:
+        """ Helper function for the latest modification time of an extension's files, including its submodules. """
+
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.origin is None:
+            return None
+
+        paths = [spec.origin]
+        for location in spec.submodule_search_locations or []:
+            for root, _, files in os.walk(location):
+                paths += [os.path.join(root, file) for file in files if file.endswith('.py')]
+
+        return max(os.stat(path).st_mtime_ns for path in paths)
+
+
+    @staticmethod
+    def discover(package: str = 'extensions') -> list[str]:
+        """
+        Find the extension modules of a package.
+
+        Arguments:
+            package: The package containing the extensions, as a directory relative to the working directory.
+
+        Returns:
+            The names of the extension modules, skipping the ones starting with an underscore.
+        """
+
+        names = []
+        for root, dirs, files in os.walk(package.replace('.', os.sep)):
+            dirs[:] = sorted(folder for folder in dirs if not folder.startswith(('_', '.')))
+            module = root.replace(os.sep, '.')
+            names += [f'{module}.{file[:-3]}' for file in sorted(files) if file.endswith('.py') and file[0] != '_']
+
+        return names
+
+
+    async def load(self, name: str) -> bool:
+        """
+        Load an extension.
+
+        Arguments:
+            name: The name of the extension module, example: extensions.fun.roll .
+
+        Returns:
+            True if the extension was loaded, False otherwise.
+        """
+
+        try:
+            await Bot.client.load_extension(name)
+        except commands.ExtensionError as error:
+            Logger.error('Extensions', f'Failed to load {name}: {error}')
+            return False
+
+        self.extensions[name] = self._get_mtime(name)
+        return True
+
+
+    async def load_all(self, package: str = 'extensions') -> list[str]:
+        """
+        Load all extensions of a package.
+
+        Arguments:
+            package: The package containing the extensions.
+
+        Returns:
+            The names of the loaded extensions.
+        """
+
+        loaded = [name for name in self.discover(package) if await self.load(name)]
+        Logger.ok('Extensions', f'Loaded {len(loaded)} extensions.')
+
+        return loaded
+
+
+    async def unload(self, name: str) -> bool:
+        """
+        Unload an extension.
+
+        Arguments:
+            name: The name of the extension module.
+
+        Returns:
+            True if the extension was unloaded, False otherwise.
+        """
+
+        try:
+            await Bot.client.unload_extension(name)
+        except commands.ExtensionError as error:
+            Logger.error('Extensions', f'Failed to unload {name}: {error}')
+            return False
+
+        self.extensions.pop(name, None)
+        return True
+
+
+    def get_changed(self) -> list[str]:
+        """ Get the loaded extensions whose files changed since they were loaded. """
+
+        return [name for name, mtime in self.extensions.items() if self._get_mtime(name) != mtime]
+
+
+    async def reload(self, names: list[str] = None, sync: bool = False) -> dict[str, bool]:
+        """
+        Reimport extensions and register their commands, events and scheduled tasks again, staying connected.
+
+        Each extension is unloaded through its teardown, so cogs must stop their task loops in cog_unload().
+        If reloading an extension fails, the previous version is kept.
+
+        Arguments:
+            names: The extensions to reload. Reloads the extensions that changed if None.
+            sync: Whether to sync the application commands with Discord after reloading.
+
+        Returns:
+            Whether each extension was reloaded.
+        """
+
+        importlib.invalidate_caches()
+        names = self.get_changed() if names is None else names
+
+        results = {}
+        for name in names:
+            start = time.perf_counter()
+            try:
+                await Bot.client.reload_extension(name)
+            except commands.ExtensionNotLoaded:
+                results[name] = await self.load(name)
+                continue
+            except commands.ExtensionError as error:
+                Logger.error('Extensions', f'Failed to reload {name}, keeping the previous version: {error}')
+                results[name] = False
+                continue
+
+            self.extensions[name] = self._get_mtime(name)
+            results[name] = True
+            Logger.ok('Extensions', f'Reloaded {name} in {(time.perf_counter() - start) * 1000:.1f} ms.')
+
+        if sync and any(results.values()):
+            await Bot.client.tree.sync()
+
+        return results
+
+
+__all__ = ['ExtensionManager']
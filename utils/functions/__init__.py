@@ -1 +1,2 @@
 from .miscellaneous import *
+from .progress_reporter import *
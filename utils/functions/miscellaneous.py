@@ -1,25 +1,31 @@
 import datetime
-import random
-import time
-import pytz
 from thefuzz import fuzz
 from difflib import SequenceMatcher
-from uuid import getnode as get_mac_address
 
 import discord
 
-from utils.core import Bot, DB
+from utils.core import Bot, Settings
 from utils.assets import Emoji
+from utils.helpers import MemberIndex, MemberPool, Autocompleter, Similarity, Leaderboard, Clock
 
 
 Bot = Bot()
-DB = DB()
+Settings = Settings()
+Clock = Clock()
 client = Bot.client
 
+if client:
+    Emoji.register(client)
+    MemberIndex.register(client)
+    MemberPool.register(client)
+
 
 class Misc:
     """ Class for various miscellaneous functions that don't fit elsewhere. """
 
+    _progress_bars: dict[tuple[tuple[str, ...], ...], tuple[str, ...]] = {}
+
+
     @staticmethod
     def get_location(auto: bool = False) -> dict[str, str]:
         """
@@ -32,33 +38,27 @@ class Misc:
             A dictionary containing hosting location information.
         """
 
-        mac_address = ':'.join(('%012X' % get_mac_address())[i:i + 2] for i in range(0, 12, 2))
-        host = Bot.location if Bot.location else 'unknown'
-
-        if auto:
-            doc = DB.find('devices', {'mac_address' : mac_address})
-            if doc:
-                return doc
-
-        DB.update('devices', {'mac_address' : mac_address}, {
-            'set' : {'host' : host}
-        }, upsert = True)
-
-        return {'mac_address' : mac_address, 'host' : host}
+        return Settings.get_location(auto)
 
 
     @staticmethod
-    def get_prefix(auto: bool = False) -> str | None:
+    def get_prefix(auto: bool = False, guild_id: int = None) -> str | None:
         """
         Get the bot's commands prefix.
 
         Arguments:
             auto: Whether to automatically pick the prefix based on the bot's hosting location.
+            guild_id: ID of a guild whose own prefix takes priority if it has one.
 
         Returns:
             The bot's commands prefix or None if not set/found.
         """
 
+        if guild_id is not None:
+            prefix = Settings.get(guild_id, 'prefix')
+            if prefix:
+                return prefix
+
         if auto:
             match Misc.get_location()['host']:
                 case 'home':
@@ -100,6 +100,46 @@ class Misc:
         return bar_pre, bar_suf, bar_l_seg, bar_m_seg, bar_r_seg
 
 
+    @staticmethod
+    def get_progress_bar_step(percent: int | float) -> int | None:
+        """
+        Get the number of filled half-segments of a progress bar.
+
+        Arguments:
+            percent: The progress as a percentage.
+
+        Returns:
+            A number from 0 to 20, or None if the percentage is over 100.
+        """
+
+        if percent < 10:
+            return 0 if percent < 5 else 1
+        if percent == 100:
+            return 20
+        if percent > 100:
+            return None
+
+        return 2 * int(percent / 10) + (percent % 10 >= 5)
+
+
+    @staticmethod
+    def _get_progress_bars(bar_type: str) -> tuple[str, ...]:
+        """ Helper function for the bar of every step of a progress bar style, built once per set of segments. """
+
+        _, _, bar_l_seg, bar_m_seg, bar_r_seg = Misc._get_progress_bar_segments(bar_type)
+        key = (bar_l_seg, bar_m_seg, bar_r_seg)
+
+        bars = Misc._progress_bars.get(key)
+        if bars is None:
+            fill = lambda step, segment: min(max(step - 2 * segment, 0), 2)
+            bars = Misc._progress_bars[key] = tuple(
+                bar_l_seg[fill(step, 0)] + ''.join(bar_m_seg[fill(step, segment)] for segment in range(1, 9))
+                + bar_r_seg[fill(step, 9)] for step in range(21)
+            )
+
+        return bars
+
+
     @staticmethod
     def create_progress_bar(bar_type: str, progress: int | float, total: int | float,
                             display_left: str = None, display_right: str = None) -> str:
@@ -144,20 +184,12 @@ class Misc:
         if display_right == 'percent' or display_right == 'both':
             info_right += f' {bar_pre}{percent:<{6}}%{bar_suf}'
 
-        if percent < 10:
-            bar = bar_l_seg[0] if percent < 5 else bar_l_seg[1]
-            bar += bar_m_seg[0] * 8 + bar_r_seg[0]
-
-        elif percent == 100:
-            bar = bar_l_seg[2] + 8 * bar_m_seg[2] + bar_r_seg[2]
-
+        step = Misc.get_progress_bar_step(percent)
+        if step is None:
+            bar = bar_l_seg[2] + bar_m_seg[2] * (segments - 1) + (bar_m_seg[0] if remaining < 5 else bar_m_seg[1])
+            bar += bar_r_seg[0]
         else:
-            bar = bar_l_seg[2] + bar_m_seg[2] * (segments - 1)
-            if segments == 9:
-                bar += bar_r_seg[0] if remaining < 5 else bar_r_seg[1]
-            else:
-                bar += bar_m_seg[0] if remaining < 5 else bar_m_seg[1]
-                bar += bar_m_seg[0] * (8 - segments) + bar_r_seg[0]
+            bar = Misc._get_progress_bars(bar_type)[step]
 
         return f'{info_left}{bar_pre}{bar}{bar_suf}{info_right}'
 
@@ -191,6 +223,7 @@ class Misc:
              reverse: Whether to reverse the scoreboard. True for descending, False for ascending.
              names: The participant names to display on the scoreboard.
                     Uses the scores keys if None, otherwise this dictionary must have the same keys as scores.
+                    For scores that change often, keep them in a Leaderboard and use its render() instead.
              suffixes: The suffixes to show after each score.
                        The first string is for singular, and the second for plural.
 
@@ -198,49 +231,14 @@ class Misc:
             A scoreboard with Discord message formatting.
         """
 
-        if emoji is None:
-            emoji = ''
-        if names is None:
-            names = {key : key for key in scores.keys()}
-        if suffixes is None:
-            suffixes = ('', '')
-
-        board = f'## {emoji} {title}'
-        if len(scores) == 0:
-            board += f'\n> There aren’t any entries yet.'
-            return board
-
-        name_spacing, score_spacing = 0, 0
-        for name, score in names.items():
-            name_spacing = max(name_spacing, len(name))
-            score_spacing = max(score_spacing, len(str(score)))
-
-        scores = Misc.sort_dict(scores, reverse)
-        counter = 0
-        for key, val in scores.items():
-            counter += 1
-            match counter:
-                case 1: medal = '🥇'
-                case 2: medal = '🥈'
-                case 3: medal = '🥉'
-                case _: medal = Emoji.blank
-
-            name, score = names[key], f'{val:,}'
-            suffix = suffixes[0] if val == 1 else suffixes[1]
-            board += f'\n> {medal} `{name:<{name_spacing}} | {score:>{score_spacing}} {suffix}`'
-
-            if counter == 10:
-                if len(scores) > 10:
-                    remaining = len(scores) - 10
-                    board += f'\n> \n> ... and {remaining:,} more ...'
-                break
-
-        return board
+        return Leaderboard.render_entries(
+            Leaderboard.get_top(scores, 10, reverse), len(scores), title, emoji, names, suffixes
+        )
 
 
     @staticmethod
     def get_current_time(seconds_only: bool = False, timezone: str = 'default',
-                         time_format: str = '%d-%m-%Y %H:%M:%S', as_dt: bool = False) -> str | float | datetime:
+                         time_format: str = '%d-%m-%Y %H:%M:%S', as_dt: bool = False) -> str | float | datetime.datetime:
         """
         Get the current time.
 
@@ -255,18 +253,12 @@ class Misc:
         """
 
         if seconds_only:
-            return time.time()
-
-        if timezone == 'default':
-            timezone = Bot.timezone
-
-        timezone = pytz.timezone(timezone)
-        datetime_now = datetime.datetime.now(timezone).replace(microsecond = 0)
+            return Clock.time()
 
         if as_dt:
-            return datetime_now
+            return Clock.now(timezone)
 
-        return datetime_now.strftime(time_format)
+        return Clock.format(time_format, timezone)
 
 
     @staticmethod
@@ -287,11 +279,7 @@ class Misc:
             The specified time as an object or a formatted string.
         """
 
-        if timezone == 'default':
-            timezone = Bot.timezone
-
-        timezone = pytz.timezone(timezone)
-        datetime_specific = datetime.time(hour, minute, second, microsecond, timezone)
+        datetime_specific = datetime.time(hour, minute, second, microsecond, Clock.get_timezone(timezone))
 
         if time_format:
             return datetime_specific.strftime(time_format)
@@ -299,6 +287,24 @@ class Misc:
         return datetime_specific
 
 
+    @staticmethod
+    def convert_times(timestamps: list[float | datetime.datetime], timezones: list[str],
+                      time_format: str = None) -> dict[str, list[datetime.datetime | str]]:
+        """
+        Convert many points in time to many timezones at once.
+
+        Arguments:
+             timestamps: Seconds since the Epoch or timezone-aware datetime objects.
+             timezones: The timezones to convert to.
+             time_format: A datetime format, example: %d/%m/%Y, %H:%M:%S . Returns datetime objects if None.
+
+        Returns:
+            The converted times for each timezone, in the same order as the timestamps.
+        """
+
+        return Clock.convert(timestamps, timezones, time_format)
+
+
     @staticmethod
     def format_datetime(dt: datetime.datetime, style: str = None) -> str:
         """
@@ -405,27 +411,67 @@ class Misc:
         return ratio
 
 
+    @staticmethod
+    def get_similarity_ratios(string: str, candidates: list[str], mode: str = 'sequence',
+                              score_cutoff: float = 0.0, limit: int = None) -> list[tuple[str, float, int]]:
+        """
+        Get the similarity ratios between a string and many candidates at once.
+
+        The ratios are the same as get_similarity_ratio(string, candidate, mode) would give.
+
+        Arguments:
+            string: The string to compare.
+            candidates: The strings to compare it to.
+            mode: The mode to use when calculating the similarity ratios, see get_similarity_ratio().
+            score_cutoff: The lowest ratio to return. Candidates that can't reach it are skipped early.
+            limit: The maximum number of results. Leave None to return all of them.
+
+        Returns:
+            The candidates, their ratios and their indexes, from most to least similar.
+        """
+
+        return Similarity.extract(string, candidates, mode, score_cutoff, limit)
+
+
+    @staticmethod
+    def get_similarity_matrix(strings: list[str], candidates: list[str], mode: str = 'sequence',
+                              score_cutoff: float = 0.0) -> list[list[float]]:
+        """
+        Get the similarity ratios between every string and every candidate.
+
+        Arguments:
+            strings: The strings to compare.
+            candidates: The strings to compare them to.
+            mode: The mode to use when calculating the similarity ratios, see get_similarity_ratio().
+            score_cutoff: The lowest ratio to keep, lower ratios are set to 0.
+
+        Returns:
+            One row of ratios for each string, with one ratio for each candidate.
+        """
+
+        return Similarity.matrix(strings, candidates, mode, score_cutoff)
+
+
     @staticmethod
     def autocomplete(query: str, completions: tuple[str, ...],
-                     defaults: tuple[str, ...] = None) -> tuple[str, ...] | None:
+                     defaults: tuple[str, ...] = None, limit: int = 25) -> tuple[str, ...] | None:
         """
         Get autocomplete suggestions based on a list of possible completions.
 
+        Completions starting with the query come first, followed by completions with similar words.
+        The completions are indexed the first time they are used, so pass the same tuple on every call.
+
         Arguments:
              query: The string to complete.
              completions: Possible completions.
              defaults: Default suggestions to return if no other suggestions are found.
+             limit: The maximum number of suggestions, at most 25 which is Discord's limit.
 
         Returns:
             A list of suggestions or the default list if no other suggestions are found.
         """
 
-        query = query.lower()
-        suggestions = tuple(
-            string for string in completions
-            if string.lower().startswith(query)
-            or Misc.get_similarity_ratio(string, query, mode = 'token_set') > 0.5
-        )
+        suggestions = Autocompleter.get(completions).complete(query, limit)
 
         if suggestions:
             return suggestions
@@ -454,22 +500,25 @@ class Misc:
             if user:
                 return user
 
-        query = query.lower()
-        best_match, best_ratio = None, 0
-        for member in server.members:
-            ratio = max(
-                Misc.get_similarity_ratio(query, member.display_name, mode = 'positional'),
-                Misc.get_similarity_ratio(query, member.name, mode = 'sequence'),
-            )
+        matches = MemberIndex.get(server).search(query.lower())
+        return matches[0][0] if matches else None
 
-            if ratio >= 0.6 and ratio > best_ratio:
-                best_match = member
-                best_ratio = ratio
 
-                if ratio == 1:
-                    break
+    @staticmethod
+    def find_members(query: str, server: discord.Guild, limit: int = 5) -> list[discord.Member]:
+        """
+        Find the members of a specific Discord server that best match a given query.
+
+        Arguments:
+            query: The members' name or nickname.
+            server: The Discord server to search.
+            limit: The maximum number of members to return.
+
+        Returns:
+            The Discord member objects, from best to worst match.
+        """
 
-        return best_match
+        return [member for member, _ in MemberIndex.get(server).search(query.lower(), limit)]
 
 
     @staticmethod
@@ -487,17 +536,49 @@ class Misc:
               A randomly chosen member object or None if there are no valid choices.
         """
 
-        members = list(server.members)
-        if exclude_member:
-            members.remove(exclude_member)
+        exclude = {exclude_member.id} if exclude_member else None
+        return MemberPool.get(server).choice(exclude, exclude_bots)
 
-        if exclude_bots:
-            members = [member for member in members if not member.bot]
 
-        if len(members) == 0:
-            return None
+    @staticmethod
+    def get_random_members(server: discord.Guild, count: int, exclude_member: discord.Member = None,
+                           exclude_bots: bool = False) -> list[discord.Member]:
+        """
+        Get distinct random members from the specified Discord server.
+
+        Arguments:
+            server: The Discord server to search.
+            count: The number of members to get.
+            exclude_member: The member to exclude, usually the command author.
+            exclude_bots: Whether to exclude bots from the possible choices.
+
+        Returns:
+            The randomly chosen member objects, fewer than requested if there aren't enough valid choices.
+        """
+
+        exclude = {exclude_member.id} if exclude_member else None
+        return MemberPool.get(server).sample(count, exclude, exclude_bots)
+
+
+    @staticmethod
+    def get_weighted_member(server: discord.Guild, weights: dict[int, int | float],
+                            exclude_member: discord.Member = None, exclude_bots: bool = False) -> discord.Member | None:
+        """
+        Get a random member from the specified Discord server, with chances proportional to their weights.
+
+        Arguments:
+            server: The Discord server to search.
+            weights: The weight of each member ID. Members without a weight can't be chosen.
+            exclude_member: The member to exclude, usually the command author.
+            exclude_bots: Whether to exclude bots from the possible choices.
+
+        Returns:
+            A randomly chosen member object or None if there are no valid choices.
+        """
 
-        return random.choice(members)
+        exclude = {exclude_member.id} if exclude_member else None
+        members = MemberPool.get(server).weighted(weights, 1, exclude, exclude_bots)
+        return members[0] if members else None
 
 
 __all__ = ['Misc']
@@ -0,0 +1,197 @@
+from typing import Iterable, AsyncIterable
+
+import discord
+
+from utils.helpers import Clock
+from utils.functions.miscellaneous import Misc
+
+
+class ProgressReporter:
+    """ Class for showing the progress of a long-running job in a Discord message without editing it too often. """
+
+    def __init__(self, message: discord.Message, iterable: Iterable | AsyncIterable = None,
+                 total: int | float = None, bar_type: str = 'text', title: str = None, interval: float = 2.0,
+                 display_left: str = None, display_right: str = 'percent', show_stats: bool = True) -> None:
+        """
+        Create a new ProgressReporter object.
+
+        The message is edited at most once per interval, and only if the progress bar changed since the last edit.
+        The final state is always shown when the reporter is closed.
+
+        Arguments:
+            message: The Discord message to edit.
+            iterable: The items of the job, if iterating over the reporter.
+            total: The maximum progress value. Uses the length of the iterable if None.
+            bar_type: The type of progress bar, see Misc.create_progress_bar().
+            title: The text shown above the progress bar.
+            interval: The minimum number of seconds between edits.
+            display_left: What to display left of the bar, see Misc.create_progress_bar().
+            display_right: What to display right of the bar, see Misc.create_progress_bar().
+            show_stats: Whether to show the throughput and estimated time remaining below the bar.
+        """
+
+        if total is None and iterable is not None and hasattr(iterable, '__len__'):
+            total = len(iterable)
+        if not total:
+            raise ValueError('The total progress must be known and more than 0.')
+
+        self.message, self.iterable, self.total = message, iterable, total
+        self.bar_type, self.title, self.interval = bar_type, title, interval
+        self.display_left, self.display_right, self.show_stats = display_left, display_right, show_stats
+
+        self.progress = 0
+        self.edits = 0
+        self._started = Clock().monotonic()
+        self._last_edit = -float('inf')
+        self._last_bar: str = None
+
+
+    async def __aenter__(self) -> 'ProgressReporter':
+        """ Restart the clock and show the initial progress. """
+
+        self._started = Clock().monotonic()
+        await self.refresh(force = True)
+        return self
+
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        """ Show the final progress, without hiding an error raised inside the block if that fails. """
+
+        if exc is None:
+            await self.refresh(force = True)
+            return
+
+        try:
+            await self.refresh(force = True)
+        except Exception:
+            pass
+
+
+    async def __aiter__(self):
+        """ Iterate over the items of the job, updating the progress after each one. """
+
+        if self.iterable is None:
+            raise ValueError('The reporter has nothing to iterate over.')
+
+        if hasattr(self.iterable, '__aiter__'):
+            async for item in self.iterable:
+                yield item
+                await self.update()
+        else:
+            for item in self.iterable:
+                yield item
+                await self.update()
+
+
+    def _get_bar(self) -> str:
+        """ Helper function for rendering the progress bar. """
+
+        progress = min(self.progress, self.total)
+        return Misc.create_progress_bar(self.bar_type, progress, self.total, self.display_left, self.display_right)
+
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        """ Helper function for formatting a number of seconds as a short duration. """
+
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+
+        if hours:
+            return f'{hours}h {minutes:02}m'
+        if minutes:
+            return f'{minutes}m {seconds:02}s'
+        return f'{seconds}s'
+
+
+    def get_stats(self) -> tuple[float, float | None]:
+        """
+        Get the current throughput and estimated time remaining.
+
+        Returns:
+            The progress per second and the seconds remaining, or None if it can't be estimated yet.
+        """
+
+        elapsed = Clock().monotonic() - self._started
+        if elapsed <= 0 or self.progress <= 0:
+            return 0.0, None
+
+        rate = self.progress / elapsed
+        return rate, max(self.total - self.progress, 0) / rate
+
+
+    def render(self, bar: str = None) -> str:
+        """
+        Render the message content.
+
+        Arguments:
+            bar: The progress bar, rendered again if None.
+
+        Returns:
+            The message content.
+        """
+
+        lines = [self.title] if self.title else []
+        lines.append(bar or self._get_bar())
+
+        if self.show_stats:
+            rate, remaining = self.get_stats()
+            eta = self._format_duration(remaining) if remaining is not None else '?'
+            if self.progress >= self.total:
+                eta = self._format_duration(Clock().monotonic() - self._started) + ' total'
+            lines.append(f'-# {rate:,.2f}/s • ETA {eta}')
+
+        return '\n'.join(lines)
+
+
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        Edit the message if the interval passed and the progress bar changed.
+
+        Arguments:
+            force: Whether to edit the message even if the interval didn't pass yet.
+
+        Returns:
+            True if the message was edited, False otherwise.
+        """
+
+        now = Clock().monotonic()
+        if not force and now - self._last_edit < self.interval:
+            return False
+
+        bar = self._get_bar()
+        if bar == self._last_bar and not force:
+            return False
+
+        await self.message.edit(content = self.render(bar))
+        self._last_edit, self._last_bar = now, bar
+        self.edits += 1
+
+        return True
+
+
+    async def update(self, amount: int | float = 1) -> None:
+        """
+        Add to the progress and edit the message if needed.
+
+        Arguments:
+            amount: The amount to add.
+        """
+
+        self.progress += amount
+        await self.refresh()
+
+
+    async def set(self, progress: int | float) -> None:
+        """
+        Set the progress and edit the message if needed.
+
+        Arguments:
+            progress: The new progress value.
+        """
+
+        self.progress = progress
+        await self.refresh()
+
+
+__all__ = ['ProgressReporter']
@@ -0,0 +1,6 @@
+from .member_index import *
+from .autocompleter import *
+from .similarity import *
+from .leaderboard import *
+from .member_pool import *
+from .clock import *
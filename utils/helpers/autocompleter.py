@@ -0,0 +1,138 @@
+import bisect
+from collections import OrderedDict
+
+from rapidfuzz import process, fuzz
+from thefuzz.utils import full_process
+
+
+class Autocompleter:
+    """ Class for suggesting completions from a fixed set, precomputed once and reused for every query. """
+
+    LIMIT = 25
+    FUZZY_CUTOFF = 50.5
+
+    _instances: OrderedDict[int, 'Autocompleter'] = OrderedDict()
+    _max_instances = 32
+
+
+    def __init__(self, completions: tuple[str, ...], cache_size: int = 128) -> None:
+        """
+        Create a new Autocompleter object.
+
+        Arguments:
+            completions: Possible completions.
+            cache_size: The number of recent queries to remember.
+        """
+
+        self.source = completions
+        self.completions = tuple(completions)
+        self.cache_size = cache_size
+
+        keys = [completion.lower() for completion in self.completions]
+        self.prefixes = sorted((key, i) for i, key in enumerate(keys))
+        self.prefix_keys = [key for key, _ in self.prefixes]
+        self.processed = [self.process(completion) for completion in self.completions]
+
+        self._cache: OrderedDict[str, tuple[tuple[int, int], tuple[str, ...]]] = OrderedDict()
+
+
+    @classmethod
+    def get(cls, completions: tuple[str, ...]) -> 'Autocompleter':
+        """
+        Get the autocompleter of a set of completions, creating it the first time it is needed.
+
+        Autocompleters are looked up by the identity of the completions, so the same object must be passed
+        on every call and must not be modified.
+
+        Arguments:
+            completions: Possible completions.
+
+        Returns:
+            The autocompleter.
+        """
+
+        key = id(completions)
+        instance = cls._instances.get(key)
+        if instance is None or instance.source is not completions:
+            instance = cls._instances[key] = Autocompleter(completions)
+            cls._instances.move_to_end(key)
+            if len(cls._instances) > cls._max_instances:
+                cls._instances.popitem(last = False)
+        else:
+            cls._instances.move_to_end(key)
+
+        return instance
+
+
+    @staticmethod
+    def process(string: str) -> str:
+        """ Normalise a string the same way thefuzz does for token ratios. """
+
+        return full_process(string, force_ascii = True)
+
+
+    def _get_prefix_range(self, query: str) -> tuple[int, int]:
+        """ Helper function for finding the completions starting with the query, narrowed by a cached shorter query. """
+
+        lo, hi = 0, len(self.prefix_keys)
+        for length in range(len(query) - 1, 0, -1):
+            cached = self._cache.get(query[:length])
+            if cached:
+                lo, hi = cached[0]
+                break
+
+        lo = bisect.bisect_left(self.prefix_keys, query, lo, hi)
+        end = lo
+        while end < hi and self.prefix_keys[end].startswith(query):
+            end += 1
+
+        return lo, end
+
+
+    def complete(self, query: str, limit: int = LIMIT) -> tuple[str, ...]:
+        """
+        Get ranked suggestions for a query.
+
+        Completions starting with the query come first, in their original order, with an exact match at the top.
+        They are followed by completions whose words match the query, from best to worst.
+
+        Arguments:
+            query: The string to complete.
+            limit: The maximum number of suggestions.
+
+        Returns:
+            The suggestions.
+        """
+
+        query = query.lower()
+        cached = self._cache.get(query)
+        if cached:
+            self._cache.move_to_end(query)
+            return cached[1][:limit]
+
+        prefix_range = self._get_prefix_range(query)
+        prefixed = sorted(
+            (i for _, i in self.prefixes[prefix_range[0]:prefix_range[1]]),
+            key = lambda i: (self.completions[i].lower() != query, i)
+        )
+
+        seen = set(prefixed)
+        matches = process.extract(
+            self.process(query), self.processed, scorer = fuzz.token_set_ratio, processor = None,
+            score_cutoff = self.FUZZY_CUTOFF, limit = None
+        )
+        fuzzy = [
+            i for _, score, i in sorted(matches, key = lambda match: (-match[1], match[2]))
+            if int(round(score)) > 50 and i not in seen
+        ]
+
+        suggestions = tuple(self.completions[i] for i in prefixed + fuzzy)[:self.LIMIT]
+
+        self._cache[query] = (prefix_range, suggestions)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last = False)
+
+        return suggestions[:limit]
+
+
+__all__ = ['Autocompleter']
@@ -0,0 +1,213 @@
+import time
+import datetime
+import threading
+from typing import Iterable
+from contextlib import contextmanager
+
+import pytz
+
+from utils.core import Bot
+
+
+class Clock:
+    """ Singleton class for the current time, with cached timezones and formatted strings. """
+
+    _instance = None
+    _timezones: dict[str, datetime.tzinfo] = {}
+    _now: dict[datetime.tzinfo, tuple[int, datetime.datetime]] = {}
+    _formatted: dict[tuple[str, datetime.tzinfo], tuple[int, str]] = {}
+    _frozen: tuple[float, float] = None
+    _offset: float = 0.0
+    _lock = threading.Lock()
+
+
+    def __new__(cls) -> 'Clock':
+        """ Create a new instance of the Clock class if it doesn't already exist. """
+
+        if cls._instance is None:
+            cls._instance = super(Clock, cls).__new__(cls)
+
+        return cls._instance
+
+
+    def get_timezone(self, timezone: str | datetime.tzinfo = 'default') -> datetime.tzinfo:
+        """
+        Get a timezone object, resolving each timezone name only once.
+
+        Arguments:
+            timezone: The timezone name or object. Uses the bot's timezone if 'default'.
+
+        Returns:
+            The timezone object.
+        """
+
+        if isinstance(timezone, datetime.tzinfo):
+            return timezone
+
+        if timezone == 'default':
+            timezone = Bot().timezone
+
+        tz = self._timezones.get(timezone)
+        if tz is None:
+            tz = self._timezones[timezone] = pytz.timezone(timezone)
+
+        return tz
+
+
+    def time(self) -> float:
+        """ Get the number of seconds since the Epoch. """
+
+        if self._frozen is not None:
+            return self._frozen[0] + self._offset
+
+        return time.time() + self._offset
+
+
+    def monotonic(self) -> float:
+        """ Get a monotonic number of seconds for measuring durations, which is cheaper than building datetimes. """
+
+        if self._frozen is not None:
+            return self._frozen[1] + self._offset
+
+        return time.monotonic() + self._offset
+
+
+    def now(self, timezone: str | datetime.tzinfo = 'default') -> datetime.datetime:
+        """
+        Get the current time without microseconds, built at most once per second for each timezone.
+
+        Arguments:
+            timezone: The timezone name or object.
+
+        Returns:
+            The current time as a timezone-aware datetime object.
+        """
+
+        tz = self.get_timezone(timezone)
+        second = int(self.time())
+
+        cached = self._now.get(tz)
+        if cached and cached[0] == second:
+            return cached[1]
+
+        now = datetime.datetime.fromtimestamp(second, tz)
+        self._now[tz] = (second, now)
+
+        return now
+
+
+    def format(self, time_format: str = '%d-%m-%Y %H:%M:%S', timezone: str | datetime.tzinfo = 'default') -> str:
+        """
+        Get the current time as a string, formatted at most once per second for each format and timezone.
+
+        Arguments:
+            time_format: A datetime format, example: %d/%m/%Y, %H:%M:%S .
+            timezone: The timezone name or object.
+
+        Returns:
+            The formatted current time.
+        """
+
+        tz = self.get_timezone(timezone)
+        second = int(self.time())
+
+        key = (time_format, tz)
+        cached = self._formatted.get(key)
+        if cached and cached[0] == second:
+            return cached[1]
+
+        formatted = self.now(tz).strftime(time_format)
+        self._formatted[key] = (second, formatted)
+
+        return formatted
+
+
+    def convert(self, timestamps: Iterable[float | datetime.datetime], timezones: Iterable[str | datetime.tzinfo],
+                time_format: str = None) -> dict[str | datetime.tzinfo, list[datetime.datetime | str]]:
+        """
+        Convert many points in time to many timezones at once, for example for schedule listings.
+
+        Each timezone is resolved once, and repeated timestamps are only converted and formatted once per timezone.
+
+        Arguments:
+            timestamps: Seconds since the Epoch or timezone-aware datetime objects.
+            timezones: The timezone names or objects.
+            time_format: A datetime format. Returns datetime objects if None.
+
+        Returns:
+            The converted times for each timezone, in the same order as the timestamps.
+        """
+
+        seconds = [
+            timestamp.timestamp() if isinstance(timestamp, datetime.datetime) else timestamp
+            for timestamp in timestamps
+        ]
+
+        converted = {}
+        for timezone in timezones:
+            tz = self.get_timezone(timezone)
+            results = {}
+            for timestamp in seconds:
+                if timestamp not in results:
+                    dt = datetime.datetime.fromtimestamp(timestamp, tz)
+                    results[timestamp] = dt.strftime(time_format) if time_format else dt
+            converted[timezone] = [results[timestamp] for timestamp in seconds]
+
+        return converted
+
+
+    def freeze(self, at: float | datetime.datetime = None) -> None:
+        """
+        Stop the clock, for tests and benchmarks.
+
+        Arguments:
+            at: The time to freeze at, as seconds since the Epoch or a datetime object. Uses the current time if None.
+        """
+
+        with self._lock:
+            if at is None:
+                at = self.time()
+            elif isinstance(at, datetime.datetime):
+                at = at.timestamp()
+
+            Clock._frozen = (at - self._offset, self.monotonic() - self._offset)
+
+
+    def advance(self, seconds: float) -> None:
+        """
+        Move the clock forward, whether it's frozen or not.
+
+        Arguments:
+            seconds: The number of seconds to move forward. Negative numbers move it back.
+        """
+
+        with self._lock:
+            Clock._offset += seconds
+
+
+    def reset(self) -> None:
+        """ Unfreeze the clock and undo all moves, going back to the real time. """
+
+        with self._lock:
+            Clock._frozen, Clock._offset = None, 0.0
+            self._now.clear()
+            self._formatted.clear()
+
+
+    @contextmanager
+    def frozen(self, at: float | datetime.datetime = None):
+        """
+        Freeze the clock for the duration of a with block, then reset it.
+
+        Arguments:
+            at: The time to freeze at, see freeze().
+        """
+
+        self.freeze(at)
+        try:
+            yield self
+        finally:
+            self.reset()
+
+
+__all__ = ['Clock']
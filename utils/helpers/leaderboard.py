@@ -0,0 +1,364 @@
+import math
+import random
+import heapq
+import itertools
+
+from utils.core import DB
+from utils.assets import Emoji
+
+
+class _Node:
+    """ A node of the skip list. """
+
+    __slots__ = ('key', 'player', 'score', 'next', 'width')
+
+
+    def __init__(self, key: tuple, player: ..., score: int | float, levels: int) -> None:
+        """ Create a new _Node object linked on the given number of levels. """
+
+        self.key, self.player, self.score = key, player, score
+        self.next: list['_Node'] = [None] * levels
+        self.width: list[int] = [1] * levels
+
+
+class Leaderboard:
+    """ Class for keeping scores in order, with fast updates, rank lookups and top entries. """
+
+    MAX_LEVELS = 32
+    MEDALS = ('🥇', '🥈', '🥉')
+
+
+    def __init__(self, name: str = None, reverse: bool = True) -> None:
+        """
+        Create a new empty Leaderboard object.
+
+        Scores are kept in an indexable skip list, which makes updates and rank lookups O(log n)
+        and reading the top k entries O(k). Equal scores are ordered by when each player first got a score.
+
+        Arguments:
+            name: The name the leaderboard is saved under in the database.
+            reverse: Whether higher scores rank first. True for descending, False for ascending.
+        """
+
+        self.name, self.reverse = name, reverse
+        self.keys: dict[..., tuple] = {}
+
+        self._nil = _Node((math.inf, math.inf), None, None, 0)
+        self._head = _Node((-math.inf, -math.inf), None, None, self.MAX_LEVELS)
+        self._head.next = [self._nil] * self.MAX_LEVELS
+        self._levels = 1
+        self._counter = itertools.count()
+
+
+    def __len__(self) -> int:
+        """ Get the number of players with a score. """
+
+        return len(self.keys)
+
+
+    def __contains__(self, player: ...) -> bool:
+        """ Check whether a player has a score. """
+
+        return player in self.keys
+
+
+    def _make_key(self, score: int | float, order: int) -> tuple:
+        """ Helper function for the sort key of a score. """
+
+        return -score if self.reverse else score, order
+
+
+    def _find(self, key: tuple) -> tuple[list[_Node], list[int]]:
+        """ Helper function for finding the last node before a key on each level and its position. """
+
+        chain, steps = [self._head] * self.MAX_LEVELS, [0] * self.MAX_LEVELS
+        node, position = self._head, 0
+        for level in reversed(range(self._levels)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level], steps[level] = node, position
+
+        return chain, steps
+
+
+    def _insert(self, key: tuple, player: ..., score: int | float) -> None:
+        """ Helper function for adding a node to the skip list. """
+
+        levels = 1
+        while levels < self.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        self._levels = max(self._levels, levels)
+
+        chain, steps = self._find(key)
+        node = _Node(key, player, score, levels)
+        for level in range(levels):
+            previous = chain[level]
+            distance = steps[0] - steps[level]
+            node.next[level] = previous.next[level]
+            node.width[level] = previous.width[level] - distance
+            previous.next[level] = node
+            previous.width[level] = distance + 1
+
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+
+
+    def _delete(self, key: tuple) -> None:
+        """ Helper function for removing a node from the skip list. """
+
+        chain, _ = self._find(key)
+        node = chain[0].next[0]
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+
+        for level in range(len(node.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+
+
+    def get(self, player: ...) -> int | float | None:
+        """
+        Get the score of a player.
+
+        Arguments:
+            player: The player.
+
+        Returns:
+            The score or None if the player has none.
+        """
+
+        key = self.keys.get(player)
+        if key is None:
+            return None
+
+        return -key[0] if self.reverse else key[0]
+
+
+    def set(self, player: ..., score: int | float) -> None:
+        """
+        Set the score of a player.
+
+        Arguments:
+            player: The player, usually a member ID.
+            score: The new score.
+        """
+
+        key = self.keys.get(player)
+        if key is not None:
+            self._delete(key)
+            order = key[1]
+        else:
+            order = next(self._counter)
+
+        key = self.keys[player] = self._make_key(score, order)
+        self._insert(key, player, score)
+
+
+    def add(self, player: ..., amount: int | float = 1) -> int | float:
+        """
+        Add to the score of a player, starting from 0 if they have none.
+
+        Arguments:
+            player: The player.
+            amount: The amount to add.
+
+        Returns:
+            The new score.
+        """
+
+        score = (self.get(player) or 0) + amount
+        self.set(player, score)
+
+        return score
+
+
+    def remove(self, player: ...) -> None:
+        """
+        Remove a player from the leaderboard.
+
+        Arguments:
+            player: The player.
+        """
+
+        key = self.keys.pop(player, None)
+        if key is not None:
+            self._delete(key)
+
+
+    def rank(self, player: ...) -> int | None:
+        """
+        Get the rank of a player.
+
+        Arguments:
+            player: The player.
+
+        Returns:
+            The rank starting from 1, or None if the player has no score.
+        """
+
+        key = self.keys.get(player)
+        if key is None:
+            return None
+
+        _, steps = self._find(key)
+        return steps[0] + 1
+
+
+    def top(self, count: int = 10, start: int = 0) -> list[tuple[..., int | float]]:
+        """
+        Get the best entries of the leaderboard.
+
+        Arguments:
+            count: The number of entries.
+            start: The number of best entries to skip, for showing later pages.
+
+        Returns:
+            The players and their scores, from best to worst.
+        """
+
+        node, position = self._head, 0
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not self._nil and position + node.width[level] <= start:
+                position += node.width[level]
+                node = node.next[level]
+
+        entries = []
+        node = node.next[0]
+        while node is not self._nil and len(entries) < count:
+            entries.append((node.player, node.score))
+            node = node.next[0]
+
+        return entries
+
+
+    def items(self) -> list[tuple[..., int | float]]:
+        """ Get all entries of the leaderboard, from best to worst. """
+
+        return self.top(len(self))
+
+
+    def render(self, title: str, emoji: str = None, names: dict[..., str] = None,
+               suffixes: tuple[str, str] = None, size: int = 10) -> str:
+        """
+        Create a scoreboard from the best entries, like Misc.make_scoreboard().
+
+        Arguments:
+            title: The scoreboard title.
+            emoji: The scoreboard title emoji.
+            names: The participant names to display on the scoreboard. Uses the players if None.
+            suffixes: The suffixes to show after each score.
+                      The first string is for singular, and the second for plural.
+            size: The number of entries to show.
+
+        Returns:
+            A scoreboard with Discord message formatting.
+        """
+
+        return self.render_entries(self.top(size), len(self), title, emoji, names, suffixes)
+
+
+    @staticmethod
+    def render_entries(entries: list[tuple[..., int | float]], total: int, title: str, emoji: str = None,
+                       names: dict[..., str] = None, suffixes: tuple[str, str] = None) -> str:
+        """
+        Create a scoreboard from entries that are already in order.
+
+        Arguments:
+            entries: The players and scores to show, from best to worst.
+            total: The total number of participants, for counting the ones not shown.
+            title: The scoreboard title.
+            emoji: The scoreboard title emoji.
+            names: The participant names to display on the scoreboard. Uses the players if None.
+            suffixes: The suffixes to show after each score.
+                      The first string is for singular, and the second for plural.
+
+        Returns:
+            A scoreboard with Discord message formatting.
+        """
+
+        if emoji is None:
+            emoji = ''
+        if suffixes is None:
+            suffixes = ('', '')
+
+        board = f'## {emoji} {title}'
+        if total == 0:
+            board += f'\n> There aren’t any entries yet.'
+            return board
+
+        rows = [(names[player] if names is not None else str(player), score) for player, score in entries]
+        name_spacing = max(len(name) for name, _ in rows)
+        score_spacing = max(len(f'{score:,}') for _, score in rows)
+
+        for counter, (name, val) in enumerate(rows):
+            medal = Leaderboard.MEDALS[counter] if counter < len(Leaderboard.MEDALS) else Emoji.blank
+            score = f'{val:,}'
+            suffix = suffixes[0] if val == 1 else suffixes[1]
+            board += f'\n> {medal} `{name:<{name_spacing}} | {score:>{score_spacing}} {suffix}`'
+
+        if total > len(rows):
+            board += f'\n> \n> ... and {total - len(rows):,} more ...'
+
+        return board
+
+
+    @staticmethod
+    def get_top(scores: dict[..., int | float], count: int = 10, reverse: bool = True) -> list[tuple[..., int | float]]:
+        """
+        Get the best entries of a dictionary of scores without sorting all of it.
+
+        Arguments:
+            scores: Dictionary of scores for each participant.
+            count: The number of entries.
+            reverse: Whether higher scores rank first.
+
+        Returns:
+            The players and their scores, ordered the same way as a stable sort of the dictionary.
+        """
+
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return select(count, scores.items(), key = lambda item: item[1])
+
+
+    def save(self, collection: str = 'leaderboards') -> None:
+        """
+        Save the leaderboard to the database.
+
+        Arguments:
+            collection: Name of the database collection.
+        """
+
+        if self.name is None:
+            raise ValueError('The leaderboard needs a name to be saved.')
+
+        entries = [[player, self.get(player)] for player, _ in sorted(self.keys.items(), key = lambda item: item[1][1])]
+        DB().update(collection, {'_id' : self.name}, {
+            '$set' : {'reverse' : self.reverse, 'entries' : entries}
+        }, upsert = True)
+
+
+    @staticmethod
+    def load(name: str, collection: str = 'leaderboards', reverse: bool = True) -> 'Leaderboard':
+        """
+        Load a leaderboard from the database.
+
+        Arguments:
+            name: The name the leaderboard was saved under.
+            collection: Name of the database collection.
+            reverse: Whether higher scores rank first, if the leaderboard doesn't exist yet.
+
+        Returns:
+            The leaderboard, empty if it wasn't saved before.
+        """
+
+        document = DB().find(collection, {'_id' : name}) or {}
+        leaderboard = Leaderboard(name, document.get('reverse', reverse))
+        for player, score in document.get('entries', []):
+            leaderboard.set(player, score)
+
+        return leaderboard
+
+
+__all__ = ['Leaderboard']
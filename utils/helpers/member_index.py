@@ -0,0 +1,287 @@
+import math
+from collections import Counter
+from difflib import SequenceMatcher
+
+import discord
+
+
+class MemberIndex:
+    """ Class for searching the members of a Discord server by name without comparing the query to every member. """
+
+    THRESHOLD = 0.6
+    GRAM_SIZE = 3
+
+    _indexes: dict[int, 'MemberIndex'] = {}
+    _client: discord.Client = None
+
+
+    def __init__(self, server: discord.Guild) -> None:
+        """
+        Create a new MemberIndex object and index all members of a Discord server.
+
+        Display names are indexed by character trigrams, to find the ones containing the query.
+        Usernames are indexed by their characters, counting repeats, to find the ones that share enough characters
+        with the query to reach the similarity threshold. Only those candidates are compared to the query.
+
+        Arguments:
+            server: The Discord server.
+        """
+
+        self.server = server
+        self.members: dict[int, tuple[int, str, str, frozenset[tuple[str, int]]]] = {}
+        self.names: dict[str, set[int]] = {}
+        self.grams: dict[str, set[int]] = {}
+        self.chars: dict[tuple[str, int], set[int]] = {}
+        self._counter = 0
+
+        for member in server.members:
+            self.add(member)
+
+        self.snapshot = self._get_snapshot(server)
+
+
+    @classmethod
+    def get(cls, server: discord.Guild) -> 'MemberIndex':
+        """
+        Get the index of a Discord server, building it the first time it is needed.
+
+        Indexes are kept up to date by the events registered with register().
+        The index is rebuilt if the server's member count or member cache changed without an event,
+        for example if events were missed or more members were cached.
+
+        Arguments:
+            server: The Discord server.
+
+        Returns:
+            The member index.
+        """
+
+        index = cls._indexes.get(server.id)
+        if index is None or index.snapshot != cls._get_snapshot(server):
+            index = cls._indexes[server.id] = MemberIndex(server)
+
+        return index
+
+
+    @staticmethod
+    def _get_snapshot(server: discord.Guild) -> tuple[int | None, int]:
+        """ Helper function for the member count and number of cached members of a server, both read in O(1). """
+
+        return server.member_count, len(server.members)
+
+
+    @classmethod
+    def register(cls, client: discord.Client) -> None:
+        """
+        Keep the indexes up to date with member join, leave and update events.
+
+        Arguments:
+            client: The Discord bot client.
+        """
+
+        if cls._client is client:
+            return
+
+        cls._client = client
+        client.add_listener(cls._on_member_join, 'on_member_join')
+        client.add_listener(cls._on_member_remove, 'on_member_remove')
+        client.add_listener(cls._on_member_update, 'on_member_update')
+        client.add_listener(cls._on_user_update, 'on_user_update')
+        client.add_listener(cls._on_guild_remove, 'on_guild_remove')
+
+
+    @classmethod
+    async def _on_member_join(cls, member: discord.Member) -> None:
+        """ Add a member who joined to the index of their server. """
+
+        index = cls._indexes.get(member.guild.id)
+        if index:
+            index.add(member)
+            index.snapshot = cls._get_snapshot(member.guild)
+
+
+    @classmethod
+    async def _on_member_remove(cls, member: discord.Member) -> None:
+        """ Remove a member who left from the index of their server. """
+
+        index = cls._indexes.get(member.guild.id)
+        if index:
+            index.remove(member.id)
+            index.snapshot = cls._get_snapshot(member.guild)
+
+
+    @classmethod
+    async def _on_member_update(cls, before: discord.Member, after: discord.Member) -> None:
+        """ Index the new names of a member. """
+
+        index = cls._indexes.get(after.guild.id)
+        if index and (before.name, before.display_name) != (after.name, after.display_name):
+            index.add(after)
+
+
+    @classmethod
+    async def _on_user_update(cls, before: discord.User, after: discord.User) -> None:
+        """ Index the new names of a user in every server they share with the bot. """
+
+        if (before.name, before.display_name) == (after.name, after.display_name):
+            return
+
+        for index in cls._indexes.values():
+            member = index.server.get_member(after.id)
+            if member:
+                index.add(member)
+
+
+    @classmethod
+    async def _on_guild_remove(cls, server: discord.Guild) -> None:
+        """ Drop the index of a server the bot left. """
+
+        cls._indexes.pop(server.id, None)
+
+
+    def _get_grams(self, string: str) -> set[str]:
+        """ Helper function for getting the character trigrams of a string. """
+
+        return {string[i:i + self.GRAM_SIZE] for i in range(len(string) - self.GRAM_SIZE + 1)}
+
+
+    @staticmethod
+    def _get_chars(string: str) -> frozenset[tuple[str, int]]:
+        """ Helper function for turning a string into character tokens, one for each repeat of a character. """
+
+        return frozenset((char, i) for char, count in Counter(string).items() for i in range(count))
+
+
+    def add(self, member: discord.Member) -> None:
+        """
+        Add a member to the index, or update them if they are already indexed.
+
+        Arguments:
+            member: The Discord member.
+        """
+
+        if member.id in self.members:
+            order = self.members[member.id][0]
+            self.remove(member.id)
+        else:
+            order = self._counter
+            self._counter += 1
+
+        name, display_name = member.name, member.display_name
+        chars = self._get_chars(name)
+        self.members[member.id] = (order, name, display_name, chars)
+
+        self.names.setdefault(name, set()).add(member.id)
+        for gram in self._get_grams(display_name):
+            self.grams.setdefault(gram, set()).add(member.id)
+        for char in chars:
+            self.chars.setdefault(char, set()).add(member.id)
+
+
+    def remove(self, member_id: int) -> None:
+        """
+        Remove a member from the index.
+
+        Arguments:
+            member_id: ID of the Discord member.
+        """
+
+        entry = self.members.pop(member_id, None)
+        if entry is None:
+            return
+
+        _, name, display_name, chars = entry
+        for postings, key in [(self.names, name)] + [(self.grams, gram) for gram in self._get_grams(display_name)] + \
+                             [(self.chars, char) for char in chars]:
+            ids = postings.get(key)
+            if ids is not None:
+                ids.discard(member_id)
+                if not ids:
+                    del postings[key]
+
+
+    def _find_containing(self, query: str) -> set[int]:
+        """ Helper function for finding members whose display name contains the query. """
+
+        if len(query) < self.GRAM_SIZE:
+            return {member_id for member_id, entry in self.members.items() if query in entry[2]}
+
+        grams = sorted((self.grams.get(gram, set()) for gram in self._get_grams(query)), key = len)
+        candidates = set(grams[0]).intersection(*grams[1:])
+
+        return {member_id for member_id in candidates if query in self.members[member_id][2]}
+
+
+    def _find_similar(self, query: str) -> dict[int, float]:
+        """ Helper function for finding members whose username reaches the similarity threshold. """
+
+        length = len(query)
+        chars = self._get_chars(query)
+
+        # A ratio of 2M / (a + b) >= 0.6 needs M >= 0.3 * (a + b) matching characters, which is at least 3a / 7.
+        min_length, max_length = math.ceil(3 * length / 7), math.floor(7 * length / 3)
+        min_overlap = math.ceil(3 * (length + min_length) / 10)
+
+        # Any name sharing at least min_overlap characters shares one of the (a - min_overlap + 1) rarest ones.
+        tokens = sorted(chars, key = lambda char: len(self.chars.get(char, ())))
+        candidates = set()
+        for token in tokens[:length - min_overlap + 1]:
+            candidates |= self.chars.get(token, set())
+
+        ratios = {}
+        matcher = SequenceMatcher(None, query, '')
+        for member_id in candidates:
+            _, name, _, name_chars = self.members[member_id]
+            if not min_length <= len(name) <= max_length:
+                continue
+
+            if 10 * len(chars & name_chars) < 3 * (length + len(name)):
+                continue
+
+            matcher.set_seq2(name)
+            ratio = matcher.ratio()
+            if ratio >= self.THRESHOLD:
+                ratios[member_id] = ratio
+
+        return ratios
+
+
+    def search(self, query: str, limit: int = 1) -> list[tuple[discord.Member, float]]:
+        """
+        Find the members that best match a query.
+
+        Gives the same results as comparing the query to every display name in positional mode and every username
+        in sequence mode. Display names containing the query are perfect matches, and ties are broken
+        by the order members appear in the server.
+
+        Arguments:
+            query: The lowercase name to search for.
+            limit: The maximum number of members to return.
+
+        Returns:
+            The matching members and their similarity ratios, from best to worst.
+        """
+
+        if not query:
+            return []
+
+        ratios = {member_id : 1.0 for member_id in self._find_containing(query)}
+        ratios.update({member_id : 1.0 for member_id in self.names.get(query, ())})
+        if len(ratios) < limit:
+            for member_id, ratio in self._find_similar(query).items():
+                ratios.setdefault(member_id, ratio)
+
+        ranked = sorted(ratios.items(), key = lambda item: (-item[1], self.members[item[0]][0]))
+
+        results = []
+        for member_id, ratio in ranked:
+            member = self.server.get_member(member_id)
+            if member:
+                results.append((member, ratio))
+                if len(results) == limit:
+                    break
+
+        return results
+
+
+__all__ = ['MemberIndex']
@@ -0,0 +1,303 @@
+import random
+
+import discord
+
+
+class _Pool:
+    """ A set of member IDs that supports O(1) adding, removing and random picks. """
+
+    def __init__(self) -> None:
+        """ Create a new empty _Pool object. """
+
+        self.ids: list[int] = []
+        self.positions: dict[int, int] = {}
+
+
+    def __len__(self) -> int:
+        """ Get the number of member IDs in the pool. """
+
+        return len(self.ids)
+
+
+    def __contains__(self, member_id: int) -> bool:
+        """ Check whether a member ID is in the pool. """
+
+        return member_id in self.positions
+
+
+    def add(self, member_id: int) -> None:
+        """ Add a member ID to the end of the pool, unless it's already in it. """
+
+        if member_id not in self.positions:
+            self.positions[member_id] = len(self.ids)
+            self.ids.append(member_id)
+
+
+    def remove(self, member_id: int) -> None:
+        """ Remove a member ID by moving the last ID into its place. """
+
+        position = self.positions.pop(member_id, None)
+        if position is None:
+            return
+
+        last = self.ids.pop()
+        if last != member_id:
+            self.ids[position] = last
+            self.positions[last] = position
+
+
+    def swap(self, i: int, j: int) -> None:
+        """ Swap the member IDs at two positions. """
+
+        self.ids[i], self.ids[j] = self.ids[j], self.ids[i]
+        self.positions[self.ids[i]], self.positions[self.ids[j]] = i, j
+
+
+class MemberPool:
+    """ Class for picking random members of a Discord server without copying the member list. """
+
+    MAX_ATTEMPTS = 64
+
+    _pools: dict[int, 'MemberPool'] = {}
+    _client: discord.Client = None
+
+
+    def __init__(self, server: discord.Guild) -> None:
+        """
+        Create a new MemberPool object with all members of a Discord server.
+
+        Arguments:
+            server: The Discord server.
+        """
+
+        self.server = server
+        self.members, self.humans = _Pool(), _Pool()
+
+        for member in server.members:
+            self.add(member)
+
+        self.snapshot = self._get_snapshot(server)
+
+
+    @classmethod
+    def get(cls, server: discord.Guild) -> 'MemberPool':
+        """
+        Get the member pool of a Discord server, building it the first time it is needed.
+
+        Pools are kept up to date by the events registered with register().
+        The pool is rebuilt if the server's member count or member cache changed without an event,
+        for example if events were missed or more members were cached.
+
+        Arguments:
+            server: The Discord server.
+
+        Returns:
+            The member pool.
+        """
+
+        pool = cls._pools.get(server.id)
+        if pool is None or pool.snapshot != cls._get_snapshot(server):
+            pool = cls._pools[server.id] = MemberPool(server)
+
+        return pool
+
+
+    @staticmethod
+    def _get_snapshot(server: discord.Guild) -> tuple[int | None, int]:
+        """ Helper function for the member count and number of cached members of a server, both read in O(1). """
+
+        return server.member_count, len(server.members)
+
+
+    @classmethod
+    def register(cls, client: discord.Client) -> None:
+        """
+        Keep the pools up to date with member join and leave events.
+
+        Arguments:
+            client: The Discord bot client.
+        """
+
+        if cls._client is client:
+            return
+
+        cls._client = client
+        client.add_listener(cls._on_member_join, 'on_member_join')
+        client.add_listener(cls._on_member_remove, 'on_member_remove')
+        client.add_listener(cls._on_guild_remove, 'on_guild_remove')
+
+
+    @classmethod
+    async def _on_member_join(cls, member: discord.Member) -> None:
+        """ Add a member who joined to the pool of their server. """
+
+        pool = cls._pools.get(member.guild.id)
+        if pool:
+            pool.add(member)
+            pool.snapshot = cls._get_snapshot(member.guild)
+
+
+    @classmethod
+    async def _on_member_remove(cls, member: discord.Member) -> None:
+        """ Remove a member who left from the pool of their server. """
+
+        pool = cls._pools.get(member.guild.id)
+        if pool:
+            pool.remove(member.id)
+            pool.snapshot = cls._get_snapshot(member.guild)
+
+
+    @classmethod
+    async def _on_guild_remove(cls, server: discord.Guild) -> None:
+        """ Drop the pool of a server the bot left. """
+
+        cls._pools.pop(server.id, None)
+
+
+    def add(self, member: discord.Member) -> None:
+        """
+        Add a member to the pool.
+
+        Arguments:
+            member: The Discord member.
+        """
+
+        self.members.add(member.id)
+        if not member.bot:
+            self.humans.add(member.id)
+
+
+    def remove(self, member_id: int) -> None:
+        """
+        Remove a member from the pool.
+
+        Arguments:
+            member_id: ID of the Discord member.
+        """
+
+        self.members.remove(member_id)
+        self.humans.remove(member_id)
+
+
+    def _get_member(self, member_id: int) -> discord.Member | None:
+        """ Helper function for getting a member, dropping them from the pool if they aren't cached anymore. """
+
+        member = self.server.get_member(member_id)
+        if member is None:
+            self.remove(member_id)
+
+        return member
+
+
+    def choice(self, exclude: set[int] = None, exclude_bots: bool = False) -> discord.Member | None:
+        """
+        Pick a random member.
+
+        Excluded members are skipped by picking again, which takes a constant number of tries on average
+        as long as most members aren't excluded.
+
+        Arguments:
+            exclude: IDs of members that can't be picked.
+            exclude_bots: Whether bots can't be picked.
+
+        Returns:
+            The member or None if there are no valid choices.
+        """
+
+        members = self.sample(1, exclude, exclude_bots)
+        return members[0] if members else None
+
+
+    def sample(self, count: int, exclude: set[int] = None, exclude_bots: bool = False) -> list[discord.Member]:
+        """
+        Pick distinct random members.
+
+        Arguments:
+            count: The number of members to pick.
+            exclude: IDs of members that can't be picked.
+            exclude_bots: Whether bots can't be picked.
+
+        Returns:
+            The members, fewer than requested if there aren't enough valid choices.
+        """
+
+        pool = self.humans if exclude_bots else self.members
+        exclude = exclude or set()
+        available = len(pool) - sum(member_id in pool for member_id in exclude)
+        count = min(count, available)
+        if count <= 0:
+            return []
+
+        picked, members = set(), []
+        if count * 2 <= available:
+            attempts = 0
+            while len(members) < count and attempts < count * self.MAX_ATTEMPTS:
+                attempts += 1
+                member_id = pool.ids[random.randrange(len(pool))]
+                if member_id in exclude or member_id in picked:
+                    continue
+
+                picked.add(member_id)
+                member = self._get_member(member_id)
+                if member:
+                    members.append(member)
+
+            if len(members) == count:
+                return members
+
+        # Shuffle the pool in place only as far as needed. Uncached members are dropped afterwards,
+        # since removing them during the shuffle would move the IDs that weren't visited yet.
+        uncached = []
+        for i in range(len(pool)):
+            if len(members) == count:
+                break
+
+            pool.swap(i, random.randrange(i, len(pool)))
+            member_id = pool.ids[i]
+            if member_id in exclude or member_id in picked:
+                continue
+
+            picked.add(member_id)
+            member = self.server.get_member(member_id)
+            if member:
+                members.append(member)
+            else:
+                uncached.append(member_id)
+
+        for member_id in uncached:
+            self.remove(member_id)
+
+        return members
+
+
+    def weighted(self, weights: dict[int, int | float], count: int = 1, exclude: set[int] = None,
+                 exclude_bots: bool = False) -> list[discord.Member]:
+        """
+        Pick random members with chances proportional to their weights. The same member can be picked more than once.
+
+        Arguments:
+            weights: The weight of each member ID. Members without a weight can't be picked.
+            count: The number of picks.
+            exclude: IDs of members that can't be picked.
+            exclude_bots: Whether bots can't be picked.
+
+        Returns:
+            The picked members, or nothing if there are no valid choices.
+        """
+
+        pool = self.humans if exclude_bots else self.members
+        exclude = exclude or set()
+        candidates = [
+            (member_id, weight) for member_id, weight in weights.items()
+            if weight > 0 and member_id in pool and member_id not in exclude
+        ]
+        if not candidates:
+            return []
+
+        ids, chances = zip(*candidates)
+        members = [self._get_member(member_id) for member_id in random.choices(ids, chances, k = count)]
+
+        return [member for member in members if member]
+
+
+__all__ = ['MemberPool']
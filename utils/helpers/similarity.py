@@ -0,0 +1,157 @@
+from difflib import SequenceMatcher
+
+from rapidfuzz import process, fuzz
+from thefuzz.utils import full_process
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Similarity:
+    """ Class for scoring one string against many, with the same results as Misc.get_similarity_ratio(). """
+
+    SCORERS = {
+        'fuzzy' : fuzz.ratio,
+        'partial' : fuzz.partial_ratio,
+        'positional' : fuzz.partial_ratio,
+        'token_sort' : fuzz.token_sort_ratio,
+        'token_set' : fuzz.token_set_ratio
+    }
+    PROCESSED_MODES = ('token_sort', 'token_set')
+    POSITIONAL_PENALTY = 1.75
+
+
+    @staticmethod
+    def _prepare(strings: list[str], mode: str) -> list[str]:
+        """ Helper function for normalising strings the way thefuzz does, once instead of for every pair. """
+
+        if mode in Similarity.PROCESSED_MODES:
+            return [full_process(string, force_ascii = True) for string in strings]
+
+        return list(strings)
+
+
+    @staticmethod
+    def _finish(query: str, choice: str, score: float, mode: str) -> float:
+        """ Helper function for turning a rapidfuzz score into the ratio thefuzz would give. """
+
+        ratio = int(round(score)) / 100
+        if mode == 'positional' and query not in choice:
+            ratio /= Similarity.POSITIONAL_PENALTY
+
+        return ratio
+
+
+    @staticmethod
+    def _get_sequence_ratios(query: str, choices: list[str], score_cutoff: float) -> list[tuple[int, float]]:
+        """ Helper function for sequence ratios, skipping pairs whose upper bounds fall below the cutoff. """
+
+        ratios = []
+        matcher = SequenceMatcher(None, query, '')
+        for i, choice in enumerate(choices):
+            matcher.set_seq2(choice)
+            if score_cutoff and (matcher.real_quick_ratio() < score_cutoff or matcher.quick_ratio() < score_cutoff):
+                continue
+
+            ratio = matcher.ratio()
+            if ratio >= score_cutoff:
+                ratios.append((i, ratio))
+
+        return ratios
+
+
+    @staticmethod
+    def _get_ratios(query: str, prepared_query: str, choices: list[str], prepared: list[str], mode: str,
+                    score_cutoff: float) -> list[tuple[int, float]]:
+        """ Helper function for the ratios of one query that reach the cutoff, as (index, ratio) pairs. """
+
+        if mode not in Similarity.SCORERS:
+            return Similarity._get_sequence_ratios(query, choices, score_cutoff)
+
+        matches = process.extract(
+            prepared_query, prepared, scorer = Similarity.SCORERS[mode], processor = None,
+            score_cutoff = max(score_cutoff * 100 - 1, 0), limit = None
+        )
+
+        ratios = []
+        for _, score, i in matches:
+            ratio = Similarity._finish(query, choices[i], score, mode)
+            if ratio >= score_cutoff:
+                ratios.append((i, ratio))
+
+        return ratios
+
+
+    @staticmethod
+    def extract(query: str, choices: list[str], mode: str = 'sequence', score_cutoff: float = 0.0,
+                limit: int = None) -> list[tuple[str, float, int]]:
+        """
+        Score a string against many strings.
+
+        Arguments:
+            query: The string to compare, passed as the first string of each pair.
+            choices: The strings to compare it to.
+            mode: The mode to use when calculating the similarity ratios, see Misc.get_similarity_ratio().
+            score_cutoff: The lowest ratio to return, which lets hopeless pairs be skipped early.
+            limit: The maximum number of results. Leave None to return all of them.
+
+        Returns:
+            The choices that reach the cutoff, their ratios and their indexes, from most to least similar.
+        """
+
+        choices = list(choices)
+        prepared = Similarity._prepare(choices, mode)
+        prepared_query = Similarity._prepare([query], mode)[0]
+
+        ratios = Similarity._get_ratios(query, prepared_query, choices, prepared, mode, score_cutoff)
+        ratios.sort(key = lambda item: (-item[1], item[0]))
+
+        return [(choices[i], ratio, i) for i, ratio in ratios[:limit]]
+
+
+    @staticmethod
+    def matrix(queries: list[str], choices: list[str], mode: str = 'sequence',
+               score_cutoff: float = 0.0) -> list[list[float]]:
+        """
+        Score every string of one list against every string of another.
+
+        Uses rapidfuzz's multithreaded cdist when NumPy is installed.
+
+        Arguments:
+            queries: The strings passed as the first string of each pair.
+            choices: The strings passed as the second string of each pair.
+            mode: The mode to use when calculating the similarity ratios, see Misc.get_similarity_ratio().
+            score_cutoff: The lowest ratio to keep, lower ratios are set to 0.
+
+        Returns:
+            One row of ratios for each query.
+        """
+
+        queries, choices = list(queries), list(choices)
+        prepared_queries, prepared = Similarity._prepare(queries, mode), Similarity._prepare(choices, mode)
+
+        if numpy is not None and mode in Similarity.SCORERS:
+            scores = process.cdist(
+                prepared_queries, prepared, scorer = Similarity.SCORERS[mode], processor = None,
+                score_cutoff = max(score_cutoff * 100 - 1, 0), dtype = numpy.float64, workers = -1
+            ).tolist()
+
+            rows = []
+            for query, row in zip(queries, scores):
+                ratios = [Similarity._finish(query, choice, score, mode) for choice, score in zip(choices, row)]
+                rows.append([ratio if ratio >= score_cutoff else 0.0 for ratio in ratios])
+            return rows
+
+        rows = []
+        for query, prepared_query in zip(queries, prepared_queries):
+            row = [0.0] * len(choices)
+            for i, ratio in Similarity._get_ratios(query, prepared_query, choices, prepared, mode, score_cutoff):
+                row[i] = ratio
+            rows.append(row)
+
+        return rows
+
+
+__all__ = ['Similarity']
@@ -1,13 +1,22 @@
 import os
-import glob
+import io
+import time
+import atexit
 import asyncio
 import logging
+import datetime
+import threading
+from typing import Iterator
 
 import discord
 
 from utils.core import Bot
 from utils.assets import Emoji, Channels, Coloring
 from utils.functions import Misc
+from .writer import LogWriter
+from .reporter import LogReporter
+from .rotation import LogRotator
+from .structured import JsonlSink
 
 
 client = Bot().client
@@ -17,18 +26,34 @@ Text = Coloring.Text
 class LogLevel:
     """ Class for log level definitions. """
 
-    def __init__(self, code: str, emoji: str, color: str, embed_color: int) -> None:
+    def __init__(self, code: str, emoji_name: str, color: str, embed_color: int, value: int = 0) -> None:
         """
         Create a new LogLevel object.
 
         Arguments:
             code: The prefix of each log message.
-            emoji: The emoji that appears in log entries sent to Discord.
+            emoji_name: Name of the emoji that appears in log entries sent to Discord, see Emoji.get().
             color: The text color of each log entry.
             embed_color: The embed color of log entries sent to Discord.
+            value: The severity of the log level, using the same scale as the logging module.
         """
 
-        self.code, self.emoji, self.color, self.embed_color = code, emoji, color, embed_color
+        self.code, self.emoji_name, self.color, self.embed_color = code, emoji_name, color, embed_color
+        self.value = value
+        self.name: str = None
+
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        """ Name the log level after the attribute it is defined as, for example WARNING becomes warning. """
+
+        self.name = name.lower()
+
+
+    @property
+    def emoji(self) -> str:
+        """ The emoji of the log level, looked up on every use so it follows emojis replaced after validation. """
+
+        return Emoji.get(self.emoji_name, '')
 
 
     def get_info(self) -> tuple[str, str, str, int]:
@@ -42,13 +67,23 @@ class Logger:
 
     _instance = None
     file: str = None
-    INFO = LogLevel('[i]', Emoji.info, Coloring.Text.li_blue, Coloring.blue)
-    OK = LogLevel('[o]', Emoji.check, Coloring.Text.li_green, Coloring.green)
-    NOTICE = LogLevel('[*]', Emoji.megaphone, Coloring.Text.yellow, Coloring.yellow)
-    WARNING = LogLevel('[!]', Emoji.warning, Coloring.Text.li_yellow, Coloring.gold)
-    ERROR = LogLevel('[-]', Emoji.error, Coloring.Text.li_red, Coloring.red)
-    CRITICAL = LogLevel('[X]', Emoji.error_crit, Coloring.Text.red, Coloring.black)
-    DEFAULT = LogLevel('[?]', Emoji.note, Coloring.Rest.fg, Coloring.white)
+    writer: LogWriter = None
+    reporter: LogReporter = None
+    rotator: LogRotator = None
+    structured: JsonlSink = None
+    thresholds: dict[str, int] = {}
+    _lock = threading.RLock()
+    _threshold_cache: dict[str, int] = {}
+    _levels: dict[str, LogLevel] = {}
+    file_size: int = 0
+    file_created: float = 0
+    INFO = LogLevel('[i]', 'info', Coloring.Text.li_blue, Coloring.blue, 20)
+    OK = LogLevel('[o]', 'check', Coloring.Text.li_green, Coloring.green, 20)
+    NOTICE = LogLevel('[*]', 'megaphone', Coloring.Text.yellow, Coloring.yellow, 25)
+    WARNING = LogLevel('[!]', 'warning', Coloring.Text.li_yellow, Coloring.gold, 30)
+    ERROR = LogLevel('[-]', 'error', Coloring.Text.li_red, Coloring.red, 40)
+    CRITICAL = LogLevel('[X]', 'error_crit', Coloring.Text.red, Coloring.black, 50)
+    DEFAULT = LogLevel('[?]', 'note', Coloring.Rest.fg, Coloring.white, 10)
 
 
     def __new__(cls) -> 'Logger':
@@ -68,7 +103,18 @@ class Logger:
              path: Path to the new logs file.
         """
 
-        self.file = path
+        with self._lock:
+            old_file, self.file = self.file, path
+            self.file_size = os.path.getsize(path) if os.path.exists(path) else 0
+            self.file_created = os.path.getctime(path) if os.path.exists(path) else time.time()
+            if self.rotator:
+                self.rotator.add(path, self.file_created)
+
+            if self.structured:
+                self._write_lines(self.structured.set_file(path))
+                if self.writer and old_file:
+                    for structured_path in JsonlSink.get_paths(old_file):
+                        self.writer.release(structured_path)
 
 
     def get_file(self) -> str | None:
@@ -77,14 +123,278 @@ class Logger:
         return self.file
 
 
+    def _get_files(self) -> list[str]:
+        """ Helper function for the paths to all known log files, only the current one if there is no rotator. """
+
+        if self.rotator:
+            return self.rotator.files()
+
+        return [self.file] if self.file else []
+
+
     def new_file(self) -> None:
         """ Create a new logs file and set it as the current one. """
 
-        time = Misc.get_current_time(time_format = '%d-%m-%Y %H-%M-%S')
-        self.file = f'logs/{time}.log'
+        name = Misc.get_current_time(time_format = '%d-%m-%Y %H-%M-%S')
+        path, counter = f'logs/{name}.log', 1
+        while path == self.file or os.path.exists(path):
+            counter += 1
+            path = f'logs/{name} ({counter}).log'
+
+        self.set_file(path)
         self.ok('Logger', 'New logs file created.')
 
 
+    def set_rotation(self, max_bytes: int = None, interval: float = None, compression: str = 'auto') -> None:
+        """
+        Set up automatic rotation of log files.
+
+        Compression Options:
+            - auto | Use zstd if the zstandard module is installed, otherwise gzip.
+            - gzip | Always use gzip.
+            - zstd | Always use zstd.
+            - None | Don't compress rotated files.
+
+        Arguments:
+            max_bytes: The size at which a logs file is rotated. Leave None to disable size-based rotation.
+            interval: The number of seconds after which a logs file is rotated. Leave None to disable.
+            compression: The compression used for rotated files.
+        """
+
+        directory = self.rotator.directory if self.rotator else 'logs'
+        self.rotator = LogRotator(directory, max_bytes, interval, compression)
+
+
+    def set_structured(self, enabled: bool = True, bucket_seconds: int = 60) -> None:
+        """
+        Enable or disable writing log entries as JSON lines next to each logs file, for use with query().
+
+        Arguments:
+            enabled: Whether to write structured log entries.
+            bucket_seconds: The length of each index bucket in seconds.
+        """
+
+        with self._lock:
+            if self.structured:
+                self._write_lines(self.structured.close_bucket())
+                self.structured = None
+
+            if enabled:
+                self.structured = JsonlSink(bucket_seconds)
+                if self.file:
+                    self.structured.set_file(self.file)
+
+
+    def _write_lines(self, lines: list[tuple[str, str]]) -> None:
+        """
+        Helper function for writing lines to files other than the current logs file.
+
+        The lines are never discarded by the writer, since the structured index relies on every line being written.
+        """
+
+        for path, line in lines:
+            if self.writer:
+                self.writer.put(path, line, None, LogWriter.REQUIRED)
+            else:
+                with open(path, 'a', encoding = 'UTF-8') as file:
+                    file.write(line + '\n')
+
+
+    def query(self, level: str | tuple[str, ...] = None, title: str = None,
+              since: float | datetime.datetime = None, until: float | datetime.datetime = None,
+              limit: int = None) -> Iterator[dict[str, ...]]:
+        """
+        Lazily find structured log entries across the current and rotated log files.
+
+        Requires structured logging to be enabled with set_structured().
+
+        Arguments:
+            level: The log level name(s) to match. Leave None to match all levels.
+            title: The exact title to match. Leave None to match all titles.
+            since: The earliest time to match, as a datetime object or seconds since the Epoch.
+            until: The latest time to match, as a datetime object or seconds since the Epoch.
+            limit: The maximum number of entries to return. Leave None for no limit.
+
+        Returns:
+            An iterator of entries with timestamp, time, level, title, and message fields, from oldest to newest.
+        """
+
+        if self.structured is None or (limit is not None and limit <= 0):
+            return
+
+        self.flush()
+
+        if level is not None:
+            names = (level, ) if isinstance(level, str) else level
+            level = tuple(
+                self._levels[name.lower()].name if name.lower() in self._levels else name.lower() for name in names
+            )
+
+        entries = self.structured.query(
+            self._get_files(), level, title, JsonlSink.to_timestamp(since), JsonlSink.to_timestamp(until)
+        )
+
+        for count, entry in enumerate(entries, 1):
+            yield entry
+            if count == limit:
+                return
+
+
+    def rotate(self) -> None:
+        """ Switch to a new logs file and compress the previous one in the background. """
+
+        old_file = self.file
+        self.new_file()
+
+        if old_file is None or self.rotator is None:
+            return
+
+        if self.writer:
+            self.writer.release(old_file, self.rotator.compress)
+        else:
+            threading.Thread(target = self.rotator.compress, args = (old_file,), daemon = True).start()
+
+
+    def start_writer(self, max_size: int = 10_000, batch_size: int = 256, flush_interval: float = 0.5,
+                     overflow: str = 'block') -> None:
+        """
+        Move console and file output to a background thread.
+
+        Overflow Policies:
+            - block | Wait for free space in the queue.
+            - drop_oldest | Discard the oldest queued entry.
+            - drop_low | Discard entries below the INFO level, block if all queued entries are important.
+
+        Arguments:
+            max_size: The maximum number of queued entries.
+            batch_size: The number of queued entries that triggers a write.
+            flush_interval: The maximum number of seconds an entry waits before being written.
+            overflow: What to do with new entries when the queue is full.
+        """
+
+        if self.writer:
+            return
+
+        self.writer = LogWriter(max_size, batch_size, flush_interval, overflow, self.INFO.value)
+        atexit.register(self.close)
+
+
+    def flush(self, timeout: float = None) -> None:
+        """
+        Wait until all queued log entries are written.
+
+        Arguments:
+            timeout: The maximum number of seconds to wait. Leave None to wait indefinitely.
+        """
+
+        if self.writer:
+            self.writer.flush(timeout)
+
+
+    def close(self) -> None:
+        """ Write all queued log entries and stop the background writer. """
+
+        with self._lock:
+            if self.structured:
+                self._write_lines(self.structured.close_bucket())
+
+            if self.writer:
+                self.writer.close()
+                self.writer = None
+
+
+    def start_reporter(self, flush_interval: float = 5.0, rate: int = 5, per: float = 5.0) -> None:
+        """
+        Start sending reported log entries to Discord. Must be called from within the client's event loop.
+
+        Entries reported before this are kept and sent once the reporter starts.
+
+        Arguments:
+            flush_interval: The maximum number of seconds an entry waits before being sent.
+            rate: The maximum number of messages per channel within the rate limit period.
+            per: The rate limit period in seconds.
+        """
+
+        if self.reporter is None:
+            self.reporter = LogReporter(client, self, flush_interval, rate, per)
+        else:
+            self.reporter.flush_interval, self.reporter.rate, self.reporter.per = flush_interval, rate, per
+
+        self.reporter.start()
+
+
+    async def stop_reporter(self) -> None:
+        """ Send all waiting log entries to Discord and stop the reporter. """
+
+        if self.reporter:
+            await self.reporter.stop()
+
+
+    @classmethod
+    def get_level(cls, level: str) -> LogLevel:
+        """
+        Get a specific log level.
+
+        Arguments:
+            level: The log level name.
+
+        Returns:
+            The LogLevel object with the given name or the default one if not found.
+        """
+
+        log_level = cls._levels.get(level)
+        if log_level is None:
+            log_level = cls._levels.get(level.lower(), cls.DEFAULT)
+
+        return log_level
+
+
+    def set_threshold(self, source: str, level: str | int) -> None:
+        """
+        Set the minimum log level for a source.
+
+        Sources are log titles or logging module logger names. Thresholds apply to
+        dotted sub-sources as well, so "discord" also covers "discord.gateway" unless it has its own threshold.
+        An empty source sets the default threshold.
+
+        Arguments:
+            source: The log title or logger name.
+            level: The log level name or value.
+        """
+
+        self.thresholds[source] = level if isinstance(level, int) else self.get_level(level).value
+        self._threshold_cache.clear()
+
+
+    def get_threshold(self, source: str) -> int:
+        """
+        Get the minimum log level for a source.
+
+        Arguments:
+            source: The log title or logger name.
+
+        Returns:
+            The minimum log level value.
+        """
+
+        threshold = self._threshold_cache.get(source)
+        if threshold is not None:
+            return threshold
+
+        name = source
+        while True:
+            if name in self.thresholds:
+                threshold = self.thresholds[name]
+                break
+            if not name:
+                threshold = 0
+                break
+            name = name.rpartition('.')[0]
+
+        self._threshold_cache[source] = threshold
+        return threshold
+
+
     @classmethod
     def get_level_info(cls, level: str) -> tuple[str, str, str, int]:
         """
@@ -97,30 +407,33 @@ class Logger:
             A tuple containing the code, emoji, color, and embed color for the given log level.
         """
 
-        level = level.lower()
-        for name, obj in dict(cls.__dict__).items():
-            if name.lower() == level and isinstance(obj, LogLevel):
-                return obj.get_info()
-
-        return cls.DEFAULT.get_info()
+        return cls.get_level(level).get_info()
 
 
-    def _log(self, level: str, title: str, message: str, report: bool = None) -> None:
+    def _log(self, level: str, title: str, message: str, *args, report: bool = None) -> None:
         """
         Helper function for making log entries.
 
         Arguments:
             level: The log level.
             title: Title of the log message, usually the module from which it is logged.
-            message: The log message.
+            message: The log message, formatted with the arguments using the % operator.
+            args: Arguments for the log message, only formatted if the entry isn't suppressed.
             report: Whether to send the log entry to Discord. Leave None to use config settings.
         """
 
-        time = Misc.get_current_time()
-        code, _, color, _ = self.get_level_info(level)
+        log_level = self.get_level(level)
+        if log_level.value < self.get_threshold(title):
+            return
+
+        if args:
+            message = message % args
+
+        current_time = Misc.get_current_time()
+        code, color = log_level.code, log_level.color
 
-        file_format = f'{code} [{time}][{title.center(25)}]'
-        cons_format = f'{color}{code} {Text.cyan}[{time}]{Text.li_magenta}[{title.center(25)}]'
+        file_format = f'{code} [{current_time}][{title.center(25)}]'
+        cons_format = f'{color}{code} {Text.cyan}[{current_time}]{Text.li_magenta}[{title.center(25)}]'
 
         lines = message.split('\n')
         file_entry = f'{file_format} {lines[0]}'
@@ -131,57 +444,70 @@ class Logger:
             file_entry += f'\n{spacing} {line}'
             cons_entry += f'\n{spacing} {color}{line}'
 
-        print(cons_entry)
-        with open(self.file, 'a', encoding = 'UTF-8') as file:
-            file.write(file_entry)
+        with self._lock:
+            written = True
+            if self.writer:
+                written = self.writer.put(self.file, file_entry, cons_entry, log_level.value)
+            else:
+                print(cons_entry)
+                with open(self.file, 'a', encoding = 'UTF-8') as file:
+                    file.write(file_entry + '\n')
+
+            if self.structured:
+                self._write_lines(self.structured.add(time.time(), current_time, log_level.name, title, message))
+
+            if written:
+                self.file_size += len(file_entry.encode('UTF-8')) + 1
+            if self.rotator and self.rotator.should_rotate(self.file_size, self.file_created):
+                self.rotate()
 
         if report is None:
             report = True  # TODO: Implement config logic.
 
         if report:
-            asyncio.run(self.report(level, message, title))
+            self.report(level, message, title)
 
 
-    def info(self, title: str, message: str, report: bool = None) -> None:
+    def info(self, title: str, message: str, *args, report: bool = None) -> None:
         """ Log an informational message. """
 
-        self._log('info', title, message, report)
+        self._log('info', title, message, *args, report = report)
 
 
-    def ok(self, title: str, message: str, report: bool = None) -> None:
+    def ok(self, title: str, message: str, *args, report: bool = None) -> None:
         """ Log an informational message of a successfully finished process. """
 
-        self._log('ok', title, message, report)
+        self._log('ok', title, message, *args, report = report)
 
 
-    def notice(self, title: str, message: str, report: bool = None) -> None:
+    def notice(self, title: str, message: str, *args, report: bool = None) -> None:
         """ Log a message that should be acknowledged. """
 
-        self._log('notice', title, message, report)
+        self._log('notice', title, message, *args, report = report)
 
 
-    def warning(self, title: str, message: str, report: bool = None) -> None:
+    def warning(self, title: str, message: str, *args, report: bool = None) -> None:
         """ Log a warning message. """
 
-        self._log('warn', title, message, report)
+        self._log('warning', title, message, *args, report = report)
 
 
-    def error(self, title: str, message: str, report: bool = None) -> None:
+    def error(self, title: str, message: str, *args, report: bool = None) -> None:
         """ Log an error message. """
 
-        self._log('error', title, message, report)
+        self._log('error', title, message, *args, report = report)
 
 
-    def critical(self, title: str, message: str, report: bool = None) -> None:
+    def critical(self, title: str, message: str, *args, report: bool = None) -> None:
         """ Log a critical error message. """
 
-        self._log('crit', title, message, report)
+        self._log('critical', title, message, *args, report = report)
 
 
-    def log(self, title: str, message: str, report: bool = None) -> None:
+    def log(self, title: str, message: str, *args, report: bool = None) -> None:
         """ Log a level-less message. """
 
-        self._log('?', title, message, report)
+        self._log('?', title, message, *args, report = report)
 
 
     def get_log(self, option: str = 'current') -> str | list[str]:
@@ -200,13 +526,12 @@ class Logger:
             The paths to the selected log files.
         """
 
-        files = glob.glob('logs/*')
-
         match option:
             case 'last':
-                return max(files, key = os.path.getctime)
+                files = [path for path in self._get_files() if path != self.file]
+                return files[-1] if files else self.file
             case 'all':
-                return files
+                return self._get_files()
             case _:
                 return self.file
 
@@ -215,21 +540,45 @@ class Logger:
         """
         Move a logs file to Discord.
 
+        The file is compressed on the fly and split into parts that fit under the server's upload limit.
+
         Arguments:
              path: The path to the specific logs file.
         """
 
         channel = client.get_channel(Channels.logs)
-        file_name = path.split('\\')[-1].split('/')[-1][:-4]
-        await channel.send(f'### {Emoji.folder} Archived: {file_name}', file = discord.File(path))
+        chunk_size = channel.guild.filesize_limit - 64 * 1024
+        rotator = self.rotator or LogRotator()
+        file_name = rotator.archive_name(path)
+        title = f'### {Emoji.folder} Archived: {file_name.split(".log")[0]}'
+
+        chunks = rotator.iter_chunks(path, chunk_size)
+        chunk = await asyncio.to_thread(next, chunks, None)
+        part = 1
+
+        while chunk is not None:
+            next_chunk = await asyncio.to_thread(next, chunks, None)
+            name = file_name if part == 1 and next_chunk is None else f'{file_name}.{part:03}'
+
+            await channel.send(title if part == 1 else None, file = discord.File(io.BytesIO(chunk), filename = name))
+            chunk = next_chunk
+            part += 1
 
         if path != self.file:
             os.remove(path)
+            if self.rotator:
+                self.rotator.remove(path)
 
+            for structured_path in JsonlSink.get_paths(path):
+                if os.path.exists(structured_path):
+                    os.remove(structured_path)
 
-    async def report(self, level: str, text: str, title: str = None) -> None:
+
+    def report(self, level: str, text: str, title: str = None) -> None:
         """
-        Send a log entry to Discord.
+        Queue a log entry for sending to Discord.
+
+        Entries are sent in batches by the reporter, with identical entries collapsed into one.
 
         Arguments:
             level: The log level.
@@ -238,29 +587,34 @@ class Logger:
         """
 
         level = level.lower()
-        if level in ('warn', 'error', 'crit'):
-            channel = client.get_channel(Channels.errors)
+        if self.get_level(level) in (self.WARNING, self.ERROR, self.CRITICAL):
+            channel_id = Channels.errors
         else:
-            channel = client.get_channel(Channels.logs)
+            channel_id = Channels.logs
 
         _, emoji, _, color = self.get_level_info(level)
 
-        if title:
-            title = f'### {emoji} {title}'
+        if self.reporter is None:
+            self.reporter = LogReporter(client, self)
 
-        embed = discord.Embed(color = color, description = text, timestamp = Misc.get_current_time(as_dt = True))
-        await channel.send(title, embed = embed)
+        self.reporter.submit(channel_id, emoji, color, title, text, Misc.get_current_time(as_dt = True))
+
+
+Logger._levels = {
+    **{obj.name : obj for obj in vars(Logger).values() if isinstance(obj, LogLevel)},
+    'warn' : Logger.WARNING, 'crit' : Logger.CRITICAL, 'debug' : Logger.DEFAULT, '?' : Logger.DEFAULT
+}
 
 
 class LogsHandler(logging.Handler):
     """ Class for redirecting Discord logs to the custom logger. """
 
     log_levels = {
-        logging.DEBUG : Logger.log,
-        logging.INFO : Logger.info,
-        logging.WARNING : Logger.warning,
-        logging.ERROR : Logger.error,
-        logging.CRITICAL : Logger.critical
+        logging.DEBUG : '?',
+        logging.INFO : 'info',
+        logging.WARNING : 'warning',
+        logging.ERROR : 'error',
+        logging.CRITICAL : 'critical'
     }
 
 
@@ -272,15 +626,36 @@ class LogsHandler(logging.Handler):
 
 
     def emit(self, record: logging.LogRecord) -> None:
-        """ Redirect log records to the custom logger. """
+        """ Redirect log records to the custom logger, formatting only those that pass the source's threshold. """
+
+        if record.levelno < self.logger.get_threshold(record.name):
+            return
+
+        message = self.format(record) if record.exc_info or record.stack_info else record.getMessage()
+        level = self.log_levels.get(record.levelno, '?')
+        self.logger._log(level, record.name, message, report = False)
 
-        message = self.format(record)
-        log_func = self.log_levels.get(record.levelno, self.logger.log)
-        log_func(title = record.name, message = message, report = False)
 
+def setup_logger(levels: dict[str, str | int] = None) -> None:
+    """
+    Set up the handler to redirect Discord logs to the custom logger, and the rotator keeping track of log files.
 
-def setup_logger() -> None:
-    """ Set up the handler to redirect Discord logs to the custom logger. """
+    Example levels: {'discord' : 'info', 'discord.gateway' : 'warning', 'Installer' : 'info'}
+
+    Arguments:
+        levels: Minimum log levels per log title or logger name. Loggers of the logging module
+                get the same levels, so suppressed records are never created.
+    """
+
+    logger = Logger()
+    for source, level in (levels or {}).items():
+        logger.set_threshold(source, level)
+
+    with logger._lock:
+        if logger.rotator is None:
+            logger.rotator = LogRotator()
+            if logger.file:
+                logger.rotator.add(logger.file, logger.file_created)
 
     logs_handler = LogsHandler()
     formatter = logging.Formatter('%(message)s')
@@ -288,11 +663,15 @@ def setup_logger() -> None:
 
     discord_logger = logging.getLogger('discord')
 
-    for handler in discord_logger.handlers:
+    for handler in list(discord_logger.handlers):
         discord_logger.removeHandler(handler)
 
     discord_logger.addHandler(logs_handler)
-    discord_logger.setLevel(logging.DEBUG)
+    discord_logger.setLevel(max(logger.get_threshold('discord'), logging.DEBUG))
+
+    for source in logger.thresholds:
+        if source.startswith('discord.'):
+            logging.getLogger(source).setLevel(max(logger.get_threshold(source), logging.DEBUG))
 
 
 __all__ = ['Logger', 'setup_logger']
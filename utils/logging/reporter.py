@@ -0,0 +1,192 @@
+import time
+import asyncio
+import datetime
+import threading
+from collections import deque
+
+import discord
+
+
+class LogReporter:
+    """ Class for sending log entries to Discord channels in batches. """
+
+    MAX_EMBEDS = 10
+    MAX_MESSAGE_CHARS = 6000
+    MAX_DESCRIPTION_CHARS = 4096
+
+
+    def __init__(self, client: discord.Client, logger, flush_interval: float = 5.0, rate: int = 5,
+                 per: float = 5.0, max_pending: int = 500) -> None:
+        """
+        Create a new LogReporter object.
+
+        Arguments:
+            client: The Discord client used for sending messages.
+            logger: The logger used for reporting failed sends, without reporting them to Discord.
+            flush_interval: The maximum number of seconds an entry waits before being sent.
+            rate: The maximum number of messages per channel within the rate limit period.
+            per: The rate limit period in seconds.
+            max_pending: The maximum number of distinct entries waiting per channel.
+        """
+
+        self.client, self.logger = client, logger
+        self.flush_interval, self.rate, self.per, self.max_pending = flush_interval, rate, per, max_pending
+        self.dropped = 0
+
+        self._pending: dict[int, dict[tuple, list]] = {}
+        self._sent: dict[int, deque[float]] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop = None
+        self._wakeup: asyncio.Event = None
+        self._task: asyncio.Task = None
+        self._stopping = False
+
+
+    def start(self) -> None:
+        """ Start the reporter task. Must be called from within the client's event loop. """
+
+        if self._task and not self._task.done():
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = self._loop.create_task(self._run(), name = 'LogReporter')
+
+        if self._pending:
+            self._wakeup.set()
+
+
+    async def stop(self) -> None:
+        """ Send all waiting entries and stop the reporter task. """
+
+        if self._task:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+        await self._flush()
+
+
+    def submit(self, channel_id: int, emoji: str, color: int, title: str, text: str,
+               timestamp: datetime.datetime) -> None:
+        """
+        Queue a log entry for a Discord channel. Safe to call from any thread.
+
+        Identical entries waiting for the same channel are collapsed into one entry with a counter.
+
+        Arguments:
+            channel_id: ID of the target channel.
+            emoji: The emoji shown next to the entry title.
+            color: The embed color.
+            title: The title of the log entry.
+            text: The log message.
+            timestamp: The time of the first occurrence.
+        """
+
+        key = (emoji, color, title, text)
+        with self._lock:
+            entries = self._pending.setdefault(channel_id, {})
+            if key in entries:
+                entries[key][0] += 1
+                return
+
+            if len(entries) >= self.max_pending:
+                self.dropped += 1
+                return
+
+            entries[key] = [1, timestamp]
+            batch_full = len(entries) >= self.MAX_EMBEDS
+
+        if batch_full and self._loop:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+
+            if running is self._loop:
+                self._wakeup.set()
+            else:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+
+
+    async def _run(self) -> None:
+        """ Send waiting entries on a timer or whenever a batch fills up. """
+
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+            try:
+                await self._flush()
+            except Exception as error:
+                self.logger.error('Logger', f'Failed to report log entries: {error}', report = False)
+
+
+    async def _flush(self) -> None:
+        """ Helper function for sending all waiting entries. """
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for channel_id, entries in pending.items():
+            channel = self.client.get_channel(channel_id)
+            if channel is None:
+                self.dropped += len(entries)
+                continue
+
+            for embeds in self._pack(entries):
+                await self._acquire(channel_id)
+                try:
+                    await channel.send(embeds = embeds)
+                except Exception as error:
+                    self.logger.error('Logger', f'Failed to report {len(embeds)} log entries: {error}', report = False)
+
+
+    def _pack(self, entries: dict[tuple, list]) -> list[list[discord.Embed]]:
+        """ Helper function for packing entries into messages within Discord's embed limits. """
+
+        messages, embeds, chars = [], [], 0
+        for (emoji, color, title, text), (count, timestamp) in entries.items():
+            header = f'### {emoji} {title}' if title else ''
+            if count > 1:
+                header += f' ×{count}'
+
+            description = f'{header}\n{text}' if header else text
+            description = description[:self.MAX_DESCRIPTION_CHARS]
+
+            if embeds and (len(embeds) == self.MAX_EMBEDS or chars + len(description) > self.MAX_MESSAGE_CHARS):
+                messages.append(embeds)
+                embeds, chars = [], 0
+
+            embeds.append(discord.Embed(color = color, description = description, timestamp = timestamp))
+            chars += len(description)
+
+        if embeds:
+            messages.append(embeds)
+
+        return messages
+
+
+    async def _acquire(self, channel_id: int) -> None:
+        """ Helper function for waiting until a message can be sent without hitting the channel's rate limit. """
+
+        # The deque isn't bounded by the rate, so changing the rate or period applies to channels already in use.
+        sent = self._sent.setdefault(channel_id, deque())
+        while True:
+            now = time.monotonic()
+            while sent and sent[0] <= now - self.per:
+                sent.popleft()
+
+            if len(sent) < self.rate:
+                break
+            await asyncio.sleep(sent[len(sent) - self.rate] + self.per - now)
+
+        sent.append(time.monotonic())
+
+
+__all__ = ['LogReporter']
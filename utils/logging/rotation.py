@@ -0,0 +1,250 @@
+import os
+import glob
+import json
+import time
+import zlib
+import threading
+from typing import Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class LogRotator:
+    """ Class for rotating, compressing and keeping track of log files. """
+
+    EXTENSIONS = {'gzip' : '.gz', 'zstd' : '.zst'}
+    READ_SIZE = 1024 * 1024
+
+
+    def __init__(self, directory: str = 'logs', max_bytes: int = None, interval: float = None,
+                 compression: str = 'auto') -> None:
+        """
+        Create a new LogRotator object.
+
+        Compression Options:
+            - auto | Use zstd if the zstandard module is installed, otherwise gzip.
+            - gzip | Always use gzip.
+            - zstd | Always use zstd.
+            - None | Don't compress rotated files.
+
+        Arguments:
+            directory: The directory containing the log files and the manifest.
+            max_bytes: The size at which a logs file is rotated. Leave None to disable size-based rotation.
+            interval: The number of seconds after which a logs file is rotated. Leave None to disable.
+            compression: The compression used for rotated files.
+        """
+
+        if compression == 'auto':
+            compression = 'zstd' if zstandard else 'gzip'
+
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError('The zstandard module is required for zstd compression.')
+
+        if compression is not None and compression not in self.EXTENSIONS:
+            raise ValueError(f'Unknown compression: {compression}.')
+
+        self.directory, self.max_bytes, self.interval, self.compression = directory, max_bytes, interval, compression
+        self.manifest = os.path.join(directory, 'manifest.json')
+
+        self._files: list[dict[str, ...]] | None = None
+        self._lock = threading.Lock()
+
+
+    def should_rotate(self, size: int, created: float) -> bool:
+        """
+        Check whether a logs file is due for rotation.
+
+        Arguments:
+            size: The size of the logs file in bytes.
+            created: The time at which the logs file was created, in seconds since the Epoch.
+
+        Returns:
+            Whether the logs file should be rotated.
+        """
+
+        if self.max_bytes is not None and size >= self.max_bytes:
+            return True
+
+        return self.interval is not None and time.time() - created >= self.interval
+
+
+    def _load(self) -> list[dict[str, ...]]:
+        """ Helper function for loading the manifest, rebuilding it from the directory only if it's missing. """
+
+        if self._files is not None:
+            return self._files
+
+        try:
+            with open(self.manifest, 'r', encoding = 'UTF-8') as file:
+                self._files = json.load(file)
+
+        except (OSError, ValueError):
+            paths = [
+                path for pattern in ('*.log', '*.log.gz', '*.log.zst')
+                for path in glob.glob(os.path.join(self.directory, pattern))
+            ]
+            self._files = sorted(
+                ({'path' : path, 'created' : os.path.getctime(path)} for path in paths),
+                key = lambda entry: entry['created']
+            )
+            self._save()
+
+        return self._files
+
+
+    def _save(self) -> None:
+        """ Helper function for atomically writing the manifest. """
+
+        os.makedirs(self.directory, exist_ok = True)
+        temp_path = f'{self.manifest}.tmp'
+        with open(temp_path, 'w', encoding = 'UTF-8') as file:
+            json.dump(self._files, file, indent = 1)
+
+        os.replace(temp_path, self.manifest)
+
+
+    def add(self, path: str, created: float = None) -> None:
+        """
+        Add a logs file to the manifest. Files outside the directory of the rotator are ignored.
+
+        Arguments:
+            path: Path to the logs file.
+            created: The time at which the logs file was created. Leave None to use the current time.
+        """
+
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            return
+
+        with self._lock:
+            files = self._load()
+            if any(entry['path'] == path for entry in files):
+                return
+
+            files.append({'path' : path, 'created' : time.time() if created is None else created})
+            self._save()
+
+
+    def remove(self, path: str) -> None:
+        """
+        Remove a logs file from the manifest.
+
+        Arguments:
+            path: Path to the logs file.
+        """
+
+        with self._lock:
+            self._files = [entry for entry in self._load() if entry['path'] != path]
+            self._save()
+
+
+    def files(self) -> list[str]:
+        """ Get paths to all known log files, from oldest to newest. """
+
+        with self._lock:
+            return [entry['path'] for entry in self._load()]
+
+
+    def compress(self, path: str) -> str:
+        """
+        Compress a rotated logs file and update the manifest.
+
+        Arguments:
+            path: Path to the logs file.
+
+        Returns:
+            Path to the compressed file, or the original path if compression is disabled.
+        """
+
+        if self.compression is None or not os.path.exists(path):
+            return path
+
+        new_path = path + self.EXTENSIONS[self.compression]
+        with open(new_path, 'wb') as output:
+            for chunk in self._compress_stream(path):
+                output.write(chunk)
+
+        os.remove(path)
+
+        with self._lock:
+            for entry in self._load():
+                if entry['path'] == path:
+                    entry['path'] = new_path
+            self._save()
+
+        return new_path
+
+
+    def _compressor(self):
+        """ Helper function for creating a streaming compressor object. """
+
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor().compressobj()
+
+        return zlib.compressobj(9, zlib.DEFLATED, 31)
+
+
+    def _compress_stream(self, path: str) -> Iterator[bytes]:
+        """ Helper function for compressing a file piece by piece. """
+
+        compressor = self._compressor()
+        with open(path, 'rb') as file:
+            while data := file.read(self.READ_SIZE):
+                if output := compressor.compress(data):
+                    yield output
+
+        yield compressor.flush()
+
+
+    def iter_chunks(self, path: str, chunk_size: int) -> Iterator[bytes]:
+        """
+        Read a logs file as compressed chunks of limited size.
+
+        Files that are already compressed are split as they are, others are compressed on the fly.
+
+        Arguments:
+            path: Path to the logs file.
+            chunk_size: The maximum size of each chunk in bytes.
+
+        Returns:
+            An iterator of chunks which together form one compressed file.
+        """
+
+        if path.endswith(tuple(self.EXTENSIONS.values())) or self.compression is None:
+            with open(path, 'rb') as file:
+                while chunk := file.read(chunk_size):
+                    yield chunk
+            return
+
+        buffer = bytearray()
+        for data in self._compress_stream(path):
+            buffer += data
+            while len(buffer) >= chunk_size:
+                yield bytes(buffer[:chunk_size])
+                del buffer[:chunk_size]
+
+        if buffer:
+            yield bytes(buffer)
+
+
+    def archive_name(self, path: str) -> str:
+        """
+        Get the file name under which a logs file is archived.
+
+        Arguments:
+            path: Path to the logs file.
+
+        Returns:
+            The file name including the compression extension.
+        """
+
+        name = os.path.basename(path)
+        if name.endswith(tuple(self.EXTENSIONS.values())) or self.compression is None:
+            return name
+
+        return name + self.EXTENSIONS[self.compression]
+
+
+__all__ = ['LogRotator']
@@ -0,0 +1,207 @@
+import os
+import json
+import datetime
+from typing import Iterator
+
+
+class JsonlSink:
+    """ Class for writing structured log entries as JSON lines with a sidecar index. """
+
+    def __init__(self, bucket_seconds: int = 60) -> None:
+        """
+        Create a new JsonlSink object.
+
+        Each logs file gets a .jsonl file with one entry per line and a .jsonl.idx file with
+        one line per time bucket, holding the byte range of the bucket and the offset of the first entry of each level.
+
+        Arguments:
+            bucket_seconds: The length of each index bucket in seconds.
+        """
+
+        self.bucket_seconds = bucket_seconds
+        self.path: str = None
+        self.size = 0
+        self.bucket: dict[str, ...] | None = None
+
+
+    @staticmethod
+    def get_paths(log_path: str) -> tuple[str, str]:
+        """
+        Get the paths to the structured files belonging to a logs file.
+
+        Arguments:
+            log_path: Path to the logs file, compressed or not.
+
+        Returns:
+            The paths to the .jsonl file and its index.
+        """
+
+        base, extension = os.path.splitext(log_path)
+        if extension != '.log' and os.path.splitext(base)[1] == '.log':
+            base = os.path.splitext(base)[0]
+        return f'{base}.jsonl', f'{base}.jsonl.idx'
+
+
+    def set_file(self, log_path: str) -> list[tuple[str, str]]:
+        """
+        Switch to the structured files of another logs file.
+
+        Arguments:
+            log_path: Path to the logs file.
+
+        Returns:
+            Lines that still have to be written, as (path, line) pairs.
+        """
+
+        pending = self.close_bucket()
+        self.path = self.get_paths(log_path)[0]
+        self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+        return pending
+
+
+    def add(self, timestamp: float, time: str, level: str, title: str, message: str) -> list[tuple[str, str]]:
+        """
+        Create a structured entry and update the index.
+
+        Arguments:
+            timestamp: The time of the entry in seconds since the Epoch.
+            time: The formatted time of the entry.
+            level: The log level name.
+            title: Title of the log message.
+            message: The log message.
+
+        Returns:
+            Lines to write, as (path, line) pairs.
+        """
+
+        line = json.dumps({
+            'timestamp' : timestamp, 'time' : time, 'level' : level, 'title' : title, 'message' : message
+        }, ensure_ascii = False)
+
+        lines = []
+        bucket_start = int(timestamp // self.bucket_seconds * self.bucket_seconds)
+        if self.bucket is None or self.bucket['t'] != bucket_start:
+            lines = self.close_bucket()
+            self.bucket = {'t' : bucket_start, 'start' : self.size, 'end' : self.size, 'levels' : {}}
+
+        self.bucket['levels'].setdefault(level, self.size)
+        self.size += len(line.encode('UTF-8')) + 1
+        self.bucket['end'] = self.size
+
+        lines.append((self.path, line))
+        return lines
+
+
+    def close_bucket(self) -> list[tuple[str, str]]:
+        """
+        Close the current index bucket.
+
+        Returns:
+            The index line to write, as a (path, line) pair, or nothing if there is no open bucket.
+        """
+
+        if self.bucket is None or self.path is None:
+            return []
+
+        bucket, self.bucket = self.bucket, None
+        return [(f'{self.path}.idx', json.dumps(bucket))]
+
+
+    def _load_index(self, path: str) -> list[dict[str, ...]] | None:
+        """ Helper function for reading the index of a .jsonl file, including the open bucket. """
+
+        try:
+            with open(f'{path}.idx', 'r', encoding = 'UTF-8') as file:
+                buckets = [json.loads(line) for line in file if line.strip()]
+        except OSError:
+            return None
+
+        if path == self.path and self.bucket is not None:
+            buckets.append(self.bucket)
+
+        return buckets
+
+
+    def query(self, log_paths: list[str], levels: tuple[str, ...] = None, title: str = None,
+              since: float = None, until: float = None) -> Iterator[dict[str, ...]]:
+        """
+        Lazily find structured entries across log files.
+
+        Arguments:
+            log_paths: Paths to the log files to search, from oldest to newest.
+            levels: The log level names to match. Leave None to match all levels.
+            title: The exact title to match. Leave None to match all titles.
+            since: The earliest time to match in seconds since the Epoch.
+            until: The latest time to match in seconds since the Epoch.
+
+        Returns:
+            An iterator of matching entries.
+        """
+
+        for log_path in log_paths:
+            path = self.get_paths(log_path)[0]
+            if not os.path.exists(path):
+                continue
+
+            buckets = self._load_index(path)
+            if not buckets:
+                ranges = [(0, None)]
+            else:
+                ranges = []
+                for bucket in buckets:
+                    if since is not None and bucket['t'] + self.bucket_seconds <= since:
+                        continue
+                    if until is not None and bucket['t'] > until:
+                        continue
+
+                    if levels is None:
+                        ranges.append((bucket['start'], bucket['end']))
+                        continue
+
+                    offsets = [bucket['levels'][level] for level in levels if level in bucket['levels']]
+                    if offsets:
+                        ranges.append((min(offsets), bucket['end']))
+
+                if os.path.getsize(path) > buckets[-1]['end']:
+                    ranges.append((buckets[-1]['end'], None))
+
+            if not ranges:
+                continue
+
+            with open(path, 'rb') as file:
+                for start, end in ranges:
+                    file.seek(start)
+                    while end is None or file.tell() < end:
+                        line = file.readline()
+                        if not line:
+                            break
+
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+
+                        if levels is not None and entry['level'] not in levels:
+                            continue
+                        if title is not None and entry['title'] != title:
+                            continue
+                        if since is not None and entry['timestamp'] < since:
+                            continue
+                        if until is not None and entry['timestamp'] > until:
+                            continue
+
+                        yield entry
+
+
+    @staticmethod
+    def to_timestamp(value: float | datetime.datetime | None) -> float | None:
+        """ Convert a datetime object into seconds since the Epoch. """
+
+        if isinstance(value, datetime.datetime):
+            return value.timestamp()
+
+        return value
+
+
+__all__ = ['JsonlSink']
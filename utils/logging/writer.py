@@ -0,0 +1,248 @@
+import sys
+import time
+import threading
+from typing import Callable
+from collections import deque
+
+
+class LogWriter:
+    """ Class for writing log entries from a dedicated background thread. """
+
+    OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_low')
+    REQUIRED = sys.maxsize
+
+
+    def __init__(self, max_size: int = 10_000, batch_size: int = 256, flush_interval: float = 0.5,
+                 overflow: str = 'block', low_level: int = 20) -> None:
+        """
+        Create a new LogWriter object and start its thread.
+
+        Overflow Policies:
+            - block | Wait for free space in the queue.
+            - drop_oldest | Discard the oldest queued entry.
+            - drop_low | Discard low level entries, block if all queued entries are important.
+
+        Arguments:
+            max_size: The maximum number of queued entries.
+            batch_size: The number of queued entries that triggers a write.
+            flush_interval: The maximum number of seconds an entry waits before being written.
+            overflow: What to do with new entries when the queue is full.
+            low_level: Entries with a level value below this one are discarded by the drop_low policy.
+        """
+
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy: {overflow}.')
+
+        self.max_size, self.batch_size, self.flush_interval = max_size, batch_size, flush_interval
+        self.overflow, self.low_level = overflow, low_level
+        self.dropped = 0
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._writing = False
+        self._flushing = False
+        self._closed = False
+
+        self._files = {}
+        self._thread = threading.Thread(target = self._run, name = 'LogWriter', daemon = True)
+        self._thread.start()
+
+
+    def put(self, path: str, file_entry: str, cons_entry: str = None, level: int = 0) -> bool:
+        """
+        Queue a log entry.
+
+        Arguments:
+            path: Path to the logs file the entry belongs to.
+            file_entry: The entry written to the logs file.
+            cons_entry: The entry printed to the console.
+            level: The level value of the entry. Entries with the REQUIRED level are never discarded.
+
+        Returns:
+            Whether the entry was queued or discarded.
+        """
+
+        with self._lock:
+            if self._closed:
+                return False
+
+            if len(self._queue) >= self.max_size and not self._make_room(level):
+                self.dropped += 1
+                return False
+
+            self._queue.append((path, file_entry, cons_entry, level, None))
+            if len(self._queue) == 1 or len(self._queue) >= min(self.batch_size, self.max_size):
+                self._not_empty.notify()
+
+        return True
+
+
+    def release(self, path: str, callback: Callable[[str], None] = None) -> None:
+        """
+        Close a logs file once all entries queued before this call are written.
+
+        Arguments:
+            path: Path to the logs file.
+            callback: A function called with the path on a separate thread after the file is closed.
+        """
+
+        with self._lock:
+            if self._closed:
+                if callback:
+                    threading.Thread(target = callback, args = (path,), daemon = True).start()
+                return
+
+            self._queue.append((path, None, None, self.low_level, callback))
+            self._not_empty.notify()
+
+
+    def _make_room(self, level: int) -> bool:
+        """ Helper function for applying the overflow policy. Must be called while holding the lock. """
+
+        if self.overflow == 'drop_oldest':
+            for i, item in enumerate(self._queue):
+                if item[1] is not None and item[3] != self.REQUIRED:
+                    del self._queue[i]
+                    self.dropped += 1
+                    return True
+
+        if self.overflow == 'drop_low':
+            if level < self.low_level:
+                return False
+
+            for i, item in enumerate(self._queue):
+                if item[3] < self.low_level:
+                    del self._queue[i]
+                    self.dropped += 1
+                    return True
+
+        while len(self._queue) >= self.max_size and not self._closed:
+            self._not_full.wait()
+
+        return not self._closed
+
+
+    def _run(self) -> None:
+        """ Write queued entries in batches until the writer is closed. """
+
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+
+                deadline = time.monotonic() + self.flush_interval
+                threshold = min(self.batch_size, self.max_size)
+                while len(self._queue) < threshold and not self._closed and not self._flushing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._not_empty.wait(remaining)
+
+                batch = list(self._queue)
+                self._queue.clear()
+                self._writing = True
+                self._flushing = False
+                self._not_full.notify_all()
+
+            self._write_batch(batch)
+
+            with self._lock:
+                self._writing = False
+                if not self._queue:
+                    self._idle.notify_all()
+                    if self._closed:
+                        break
+
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+
+    def _write_batch(self, batch: list[tuple[str, str, str, int, Callable]]) -> None:
+        """ Helper function for writing a batch of entries, grouped by file. """
+
+        console = [cons_entry for _, _, cons_entry, _, _ in batch if cons_entry is not None]
+        if console:
+            sys.stdout.write('\n'.join(console) + '\n')
+            sys.stdout.flush()
+
+        grouped: dict[str, list[str]] = {}
+        for path, file_entry, _, _, callback in batch:
+            if file_entry is not None:
+                if path:
+                    grouped.setdefault(path, []).append(file_entry)
+                continue
+
+            self._write(path, grouped.pop(path, None))
+            if path in self._files:
+                self._files.pop(path).close()
+            if callback:
+                threading.Thread(target = callback, args = (path,), daemon = True).start()
+
+        for path, entries in grouped.items():
+            self._write(path, entries)
+
+
+    def _write(self, path: str, entries: list[str] | None) -> None:
+        """ Helper function for writing entries to a file, keeping it open for later batches. """
+
+        if not entries:
+            return
+
+        try:
+            file = self._files.get(path)
+            if file is None:
+                file = self._files[path] = open(path, 'a', encoding = 'UTF-8')
+
+            file.write('\n'.join(entries) + '\n')
+            file.flush()
+
+        except OSError as error:
+            sys.stderr.write(f'LogWriter: Failed to write to {path}: {error}\n')
+
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until all queued entries are written.
+
+        Arguments:
+            timeout: The maximum number of seconds to wait. Leave None to wait indefinitely.
+
+        Returns:
+            Whether all entries were written before the timeout.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._flushing = True
+            self._not_empty.notify()
+
+            while (self._queue or self._writing) and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+
+        return True
+
+
+    def close(self, timeout: float = None) -> None:
+        """
+        Write all queued entries, stop the thread and close all open files.
+
+        Arguments:
+            timeout: The maximum number of seconds to wait for the thread.
+        """
+
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+        self._thread.join(timeout)
+
+
+__all__ = ['LogWriter']